@@ -3,6 +3,10 @@ Legal Training Dataset API - PostgreSQL Backend
 Main Flask application with ORM-based data access.
 """
 
+import atexit
+import logging
+import logging.handlers
+import queue
 import sys
 from pathlib import Path
 
@@ -14,13 +18,24 @@ if str(backend_path) not in sys.path:
 from flask import Flask, jsonify
 from flask_cors import CORS
 from models import db
-from config import DATABASE_URI
+from config import DATABASE_URI, DB_MAX_OVERFLOW, DB_POOL_RECYCLE, DB_POOL_SIZE, DB_POOL_TIMEOUT
+from sqlalchemy import event
 from routes.data_routes import data_bp
 from routes.generation_routes import generation_bp
 from routes.provider_routes import provider_bp
 from routes.chat_routes import chat_bp
 import os
 
+# Logging: records are queued and written by a listener thread, so batch
+# workers never block on stdout
+log_queue = queue.SimpleQueue()
+queue_handler = logging.handlers.QueueHandler(log_queue)
+queue_handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(name)s: %(message)s'))
+logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
+log_listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler())
+log_listener.start()
+atexit.register(log_listener.stop)
+
 # Create Flask app
 app = Flask(__name__)
 
@@ -36,8 +51,15 @@ app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URI
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
     'pool_pre_ping': True,
-    'pool_recycle': 300,
+    'pool_recycle': DB_POOL_RECYCLE,
 }
+if not DATABASE_URI.startswith('sqlite'):
+    # Size the QueuePool for concurrent batch workers (SQLite uses its own pool class)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'].update({
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+    })
 
 # Initialize SQLAlchemy
 db.init_app(app)
@@ -53,6 +75,14 @@ with app.app_context():
     db.create_all()
     print("✅ Database tables created/verified")
 
+    if not DATABASE_URI.startswith('sqlite'):
+        @event.listens_for(db.engine, 'checkout')
+        def warn_on_pool_exhaustion(dbapi_connection, connection_record, connection_proxy):
+            """Log pool status whenever checkouts spill into overflow connections."""
+            pool = db.engine.pool
+            if pool.checkedout() > pool.size():
+                print(f"⚠️  Database pool exhausted, using overflow: {pool.status()}")
+
 
 # ============================================================================
 # HEALTH CHECK & INFO ROUTES
@@ -72,7 +102,7 @@ def health_check():
     try:
         from services.data_service import DataService
         service = DataService()
-        total_samples = service.count()
+        total_samples = service.count_estimate()
     except:
         total_samples = 'unknown'
 
@@ -114,6 +144,7 @@ def get_info():
                 'POST /api/generate/batch/stop - Stop batch generation',
                 'GET /api/generate/batch/status - Get batch status',
                 'GET /api/generate/batch/history - Get batch history',
+                'GET /api/generate/batch/history/<batch_id> - Get one batch history record',
                 'GET /api/generate/batch/stream - SSE stream for updates',
                 'GET /api/batches/stuck - Check for stuck batches',
                 'GET /api/models - Get available models',
@@ -198,6 +198,12 @@ THINKING_MODELS = [
 MAX_SAMPLE_RETRIES = 3  # Maximum retry attempts per sample
 MAX_MODEL_SWITCHES = 25  # Maximum model switches per batch (allow trying most models)
 MAX_BATCH_TIMEOUT = 7200  # 2 hours in seconds (realistic for large batches)
+BATCH_CONCURRENCY = 8  # Provider calls a batch worker keeps in flight per wave (within the shared rate bucket)
+BATCH_SAMPLES_PER_REQUEST = 1  # Samples packed into one provider call (>1 enables multi-sample prompts)
+BATCH_FLUSH_SIZE = 10  # Buffered samples before a DB insert + SSE update
+BATCH_FLUSH_INTERVAL = 2.0  # Max seconds between flushes while samples trickle in
+BATCH_HISTORY_FLUSH_INTERVAL = 1.0  # Seconds the history writer coalesces batch snapshots
+BATCH_HISTORY_SAVE_EVERY = 50  # Samples between periodic history saves (switches/stops save immediately)
 
 # ============================================================================
 # CIRCUIT BREAKER CONFIGURATION
@@ -206,6 +212,7 @@ MAX_BATCH_TIMEOUT = 7200  # 2 hours in seconds (realistic for large batches)
 CIRCUIT_BREAKER_FAILURE_THRESHOLD = 3  # Open circuit after 3 consecutive failures
 CIRCUIT_BREAKER_RECOVERY_TIMEOUT = 300  # Try again after 5 minutes (300 seconds)
 CIRCUIT_BREAKER_SUCCESS_THRESHOLD = 2  # Close circuit after 2 consecutive successes
+PROVIDER_CIRCUIT_COOLDOWN = 60  # Seconds a provider is skipped after all its models failed
 
 # ============================================================================
 # QUALITY THRESHOLDS & DIFFICULTY SPECIFICATIONS
@@ -477,6 +484,12 @@ TOPICS: List[Tuple[str, str, str]] = [
     ("Legal Ethics", "Money Laundering", "advanced"),
 ]
 
+# "Practice Area - Topic" key -> TOPICS entry, for O(1) topic filter lookups
+TOPICS_BY_KEY: Dict[str, Tuple[str, str, str]] = {
+    f"{practice_area} - {topic}": (practice_area, topic, difficulty)
+    for practice_area, topic, difficulty in TOPICS
+}
+
 # Jurisdiction-specific topic extensions
 # These will be merged with the main TOPICS list when jurisdiction filtering is enabled
 JURISDICTION_TOPICS: Dict[str, List[Tuple[str, str, str]]] = {
@@ -536,3 +549,23 @@ DATABASE_URI = os.getenv(
     'DATABASE_URL',
     f'sqlite:///{Path(__file__).parent / "data" / "batches.db"}'
 )
+
+# Connection pool sizing (PostgreSQL only): by default one connection per
+# running batch plus one for the request handlers polling/streaming it
+MAX_CONCURRENT_BATCHES = int(os.getenv('MAX_CONCURRENT_BATCHES', '5'))
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', str(MAX_CONCURRENT_BATCHES * 2)))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', str(DB_POOL_SIZE)))  # Extra connections allowed under bursts
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '300'))  # Seconds before a pooled connection is replaced
+DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))  # Seconds to wait for a free connection
+
+# ============================================================================
+# LLM RESPONSE CACHE
+# ============================================================================
+
+# Development aid: reuse provider responses for identical requests (see
+# services/llm_cache.py). Off by default so batches always get fresh samples.
+LLM_CACHE_BACKEND = os.getenv('LLM_CACHE_BACKEND', '')  # '', 'memory', 'sqlite' or 'redis'
+LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', '86400'))  # Seconds a cached response stays valid
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '10000'))  # Memory backend LRU bound
+LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH', str(Path(__file__).parent / "data" / "llm_cache.db"))
+LLM_CACHE_REDIS_URL = os.getenv('LLM_CACHE_REDIS_URL', 'redis://localhost:6379/0')
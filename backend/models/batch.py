@@ -1,10 +1,25 @@
 """
 Database models for batch management.
 """
+import json
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects.postgresql import JSONB
 
 db = SQLAlchemy()
 
+# JSON list columns: JSONB on PostgreSQL (so saves can append in place), JSON text elsewhere
+JSONList = db.JSON().with_variant(JSONB(), 'postgresql')
+
+
+def _json_list(value):
+    """Column value as a list (rows written before the JSONB migration hold JSON strings)."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        return json.loads(value)
+    return value
+
 
 class BatchHistory(db.Model):
     """
@@ -25,13 +40,24 @@ class BatchHistory(db.Model):
     samples_generated = db.Column(db.Integer, default=0)
     total_tokens = db.Column(db.Integer, default=0)
     status = db.Column(db.String(20))  # running, completed, stopped
-    errors = db.Column(db.Text)  # JSON string
-    model_switches = db.Column(db.Text)  # JSON string tracking model switches
+    errors = db.Column(JSONList)  # List of error dicts
+    model_switches = db.Column(JSONList)  # List of model switch dicts
+
+    # Columns needed for list views (everything except the JSON trails)
+    SUMMARY_COLUMNS = (
+        'batch_id', 'started_at', 'completed_at', 'model', 'topic_filter', 'difficulty_filter',
+        'reasoning_instruction', 'target_count', 'samples_generated', 'total_tokens', 'status'
+    )
+
+    def to_dict(self, include_details: bool = True):
+        """
+        Convert batch to dictionary for API responses.
 
-    def to_dict(self):
-        """Convert batch to dictionary for API responses."""
-        import json
-        return {
+        Args:
+            include_details: Include the errors/model_switches lists (leave False
+                             for rows loaded with only SUMMARY_COLUMNS)
+        """
+        data = {
             'id': self.batch_id,
             'started_at': self.started_at,
             'completed_at': self.completed_at,
@@ -42,10 +68,12 @@ class BatchHistory(db.Model):
             'target': self.target_count,
             'samples_generated': self.samples_generated,
             'tokens_used': self.total_tokens,
-            'status': self.status,
-            'errors': json.loads(self.errors) if self.errors else [],
-            'model_switches': json.loads(self.model_switches) if self.model_switches else []
+            'status': self.status
         }
+        if include_details:
+            data['errors'] = _json_list(self.errors)
+            data['model_switches'] = _json_list(self.model_switches)
+        return data
 
     def __repr__(self):
         return f'<BatchHistory {self.batch_id}>'
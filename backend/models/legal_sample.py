@@ -44,6 +44,8 @@ class LegalSample(db.Model):
         db.Index('idx_sample_type', 'sample_type'),
         db.Index('idx_batch_id', 'batch_id'),
         db.Index('idx_created_at', 'created_at'),
+        # get_filtered() combines these equality filters
+        db.Index('idx_filter', 'topic', 'difficulty', 'jurisdiction', 'sample_type'),
     )
 
     def to_dict(self):
@@ -560,7 +560,6 @@ def get_token_stats():
         from models import LegalSample
 
         service = DataService()
-        samples = service.get_all()
 
         # Initialize tiktoken encoder (GPT-4 encoding)
         enc = tiktoken.get_encoding("cl100k_base")
@@ -570,8 +569,10 @@ def get_token_stats():
                 return 0
             return len(enc.encode(text))
 
-        # Calculate total tokens and per-field breakdown
+        # Single streaming pass: each sample is tokenized once and feeds the
+        # per-field, per-difficulty and per-practice-area totals
         total_tokens = 0
+        num_samples = 0
         field_tokens = {
             'question': 0,
             'answer': 0,
@@ -579,56 +580,44 @@ def get_token_stats():
             'case_citation': 0,
             'topic': 0
         }
+        difficulty_totals = {}
+        practice_area_tokens = {}
 
-        for sample in samples:
-            for field in field_tokens.keys():
+        for sample in service.iter_all():
+            num_samples += 1
+            sample_tokens = 0
+            for field in field_tokens:
                 tokens = count_tokens(sample.get(field, ''))
                 field_tokens[field] += tokens
-                total_tokens += tokens
-
-        num_samples = len(samples)
-        avg_tokens_per_sample = total_tokens / num_samples if num_samples > 0 else 0
-
-        # Calculate tokens by difficulty
-        tokens_by_difficulty = {}
-        difficulty_samples = {}
+                sample_tokens += tokens
+            total_tokens += sample_tokens
 
-        for sample in samples:
             difficulty = sample.get('difficulty', 'unknown')
-            if difficulty not in difficulty_samples:
-                difficulty_samples[difficulty] = []
-            difficulty_samples[difficulty].append(sample)
-
-        for difficulty, diff_samples in difficulty_samples.items():
-            difficulty_tokens = 0
-            for sample in diff_samples:
-                for field in ['question', 'answer', 'reasoning', 'case_citation', 'topic']:
-                    difficulty_tokens += count_tokens(sample.get(field, ''))
-
-            tokens_by_difficulty[difficulty] = {
-                'total_tokens': difficulty_tokens,
-                'avg_tokens': difficulty_tokens / len(diff_samples) if diff_samples else 0,
-                'sample_count': len(diff_samples)
-            }
+            totals = difficulty_totals.setdefault(difficulty, {'tokens': 0, 'count': 0})
+            totals['tokens'] += sample_tokens
+            totals['count'] += 1
 
-        # Calculate tokens by practice area (top 10)
-        practice_area_tokens = {}
-        for sample in samples:
             topic = sample.get('topic', '')
             if ' - ' in topic:
                 practice_area = topic.split(' - ')[0]
             else:
                 practice_area = topic
 
-            if practice_area not in practice_area_tokens:
-                practice_area_tokens[practice_area] = {'tokens': 0, 'count': 0}
+            area_totals = practice_area_tokens.setdefault(practice_area, {'tokens': 0, 'count': 0})
+            area_totals['tokens'] += sample_tokens
+            area_totals['count'] += 1
 
-            sample_tokens = sum(
-                count_tokens(sample.get(field, ''))
-                for field in ['question', 'answer', 'reasoning', 'case_citation', 'topic']
-            )
-            practice_area_tokens[practice_area]['tokens'] += sample_tokens
-            practice_area_tokens[practice_area]['count'] += 1
+        avg_tokens_per_sample = total_tokens / num_samples if num_samples > 0 else 0
+
+        # Calculate tokens by difficulty
+        tokens_by_difficulty = {
+            difficulty: {
+                'total_tokens': totals['tokens'],
+                'avg_tokens': totals['tokens'] / totals['count'],
+                'sample_count': totals['count']
+            }
+            for difficulty, totals in difficulty_totals.items()
+        }
 
         # Sort and limit to top 10 practice areas
         sorted_practice_areas = sorted(
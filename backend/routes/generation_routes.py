@@ -9,8 +9,8 @@ from services.llm_service import LLMProviderFactory
 from services.batch_service import BatchService
 from services.sse_service import get_sse_service
 from config import PROVIDERS, SAMPLE_TYPES, TOPICS
+from utils.json_utils import sse_event
 import queue
-import json
 
 generation_bp = Blueprint('generation', __name__)
 
@@ -194,14 +194,20 @@ def stop_batch_generation():
 
 @generation_bp.route('/api/generate/batch/status')
 def batch_generation_status():
-    """Get batch generation status - all batches or specific batch"""
+    """
+    Get batch generation status - all batches or specific batch.
+
+    Returns compact progress summaries; pass ?verbose=1 for the full state
+    including errors, model/provider switches and tried models.
+    """
     batch_id = request.args.get('batch_id')
+    verbose = request.args.get('verbose', default='0', type=str).lower() in ('1', 'true')
 
     batch_service = BatchService()
 
     if batch_id:
         # Return specific batch
-        batch = batch_service.get_batch(batch_id)
+        batch = batch_service.get_batch_status(batch_id, verbose=verbose)
         if not batch:
             return jsonify({
                 'success': False,
@@ -210,19 +216,21 @@ def batch_generation_status():
         return jsonify(batch)
     else:
         # Return all active batches
-        batches = batch_service.get_all_batches()
-        return jsonify({
-            'batches': batches,
-            'count': len(batches)
-        })
+        return jsonify(batch_service.get_batch_status(verbose=verbose))
 
 
 @generation_bp.route('/api/generate/batch/history')
 def get_batch_history():
-    """Get all batch generation history from database"""
+    """
+    Get all batch generation history from database.
+
+    Pass ?summary=1 to skip the stored errors/model_switches lists (fetch
+    them per batch from /api/generate/batch/history/<batch_id>).
+    """
     try:
+        summary = request.args.get('summary', default='0', type=str).lower() in ('1', 'true')
         batch_service = BatchService()
-        batches = batch_service.get_batch_history()
+        batches = batch_service.get_batch_history(summary=summary)
 
         return jsonify({
             'success': True,
@@ -236,6 +244,28 @@ def get_batch_history():
         }), 500
 
 
+@generation_bp.route('/api/generate/batch/history/<batch_id>')
+def get_batch_history_entry(batch_id):
+    """Get one batch's full history record, including errors and model switches"""
+    try:
+        batch = BatchService().get_batch_history_entry(batch_id)
+        if not batch:
+            return jsonify({
+                'success': False,
+                'error': f'Batch {batch_id} not found'
+            }), 404
+
+        return jsonify({
+            'success': True,
+            'batch': batch
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @generation_bp.route('/api/generate/batch/stream')
 def batch_generation_stream():
     """SSE endpoint for real-time batch generation updates"""
@@ -246,7 +276,7 @@ def batch_generation_stream():
             # Send initial state - all active batches
             batch_service = BatchService()
             all_batches = batch_service.get_all_batches()
-            yield f"data: {json.dumps({'type': 'all_batches', 'batches': all_batches})}\n\n"
+            yield sse_event({'type': 'all_batches', 'batches': all_batches})
 
             # Stream updates
             while True:
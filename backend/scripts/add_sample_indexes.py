@@ -0,0 +1,59 @@
+"""
+Migration script adding LegalSample indexes to an existing legal_samples table.
+
+db.create_all() only creates indexes together with a new table, so indexes
+added to the model later (e.g. idx_filter) must be created here. On
+PostgreSQL they are built with CREATE INDEX CONCURRENTLY, which does not
+block writes while a large table is indexed.
+
+Safe to re-run (every statement is IF NOT EXISTS).
+
+Usage:
+    python -m scripts.add_sample_indexes
+"""
+
+import sys
+from pathlib import Path
+
+# Add backend to path
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from sqlalchemy import text
+
+from models import db, LegalSample
+from app import app
+
+
+def add_sample_indexes():
+    """Create every LegalSample index that is missing."""
+    with app.app_context():
+        print("=" * 80)
+        print("🗂️  Adding legal_samples Indexes")
+        print("=" * 80)
+
+        concurrently = 'CONCURRENTLY ' if db.engine.dialect.name == 'postgresql' else ''
+
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            for index in LegalSample.__table__.indexes:
+                columns = ', '.join(column.name for column in index.columns)
+                print(f"  🔧 {index.name} ({columns})...")
+                conn.execute(text(
+                    f"CREATE INDEX {concurrently}IF NOT EXISTS {index.name} "
+                    f"ON {LegalSample.__tablename__} ({columns})"
+                ))
+
+        print("=" * 80)
+        print("✅ Indexes ready")
+        print("=" * 80)
+
+
+if __name__ == '__main__':
+    try:
+        add_sample_indexes()
+    except Exception as e:
+        print(f"\n❌ Error during migration: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,72 @@
+"""
+Migration script adding full-text and trigram search indexes to legal_samples (PostgreSQL only).
+
+Creates:
+- search_vec: generated tsvector over question, answer, topic and case_citation,
+  with a GIN index used by DataService.search(field='all')
+- pg_trgm GIN indexes on the individual columns used by per-field ILIKE searches
+
+Safe to re-run (every statement is IF NOT EXISTS).
+
+Usage:
+    python -m scripts.add_search_index
+"""
+
+import sys
+from pathlib import Path
+
+# Add backend to path
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from sqlalchemy import text
+
+from models import db
+from app import app
+
+STATEMENTS = [
+    ("Enabling pg_trgm extension", "CREATE EXTENSION IF NOT EXISTS pg_trgm"),
+    ("Adding search_vec column", """
+        ALTER TABLE legal_samples ADD COLUMN IF NOT EXISTS search_vec tsvector
+        GENERATED ALWAYS AS (to_tsvector('english',
+            coalesce(question, '') || ' ' || coalesce(answer, '') || ' ' ||
+            coalesce(topic, '') || ' ' || coalesce(case_citation, ''))) STORED
+    """),
+    ("Creating GIN index on search_vec",
+     "CREATE INDEX IF NOT EXISTS idx_samples_search ON legal_samples USING GIN (search_vec)"),
+] + [
+    (f"Creating trigram index on {column}",
+     f"CREATE INDEX IF NOT EXISTS idx_{column}_trgm ON legal_samples USING GIN ({column} gin_trgm_ops)")
+    for column in ('question', 'answer', 'topic', 'case_citation')
+]
+
+
+def add_search_index():
+    """Create the search column and indexes."""
+    with app.app_context():
+        print("=" * 80)
+        print("🔎 Adding Full-Text Search Indexes")
+        print("=" * 80)
+
+        if db.engine.dialect.name != 'postgresql':
+            print("⏭️  Not a PostgreSQL database - search keeps using ILIKE, nothing to do.")
+            return
+
+        for description, statement in STATEMENTS:
+            print(f"  🔧 {description}...")
+            db.session.execute(text(statement))
+        db.session.commit()
+
+        print("=" * 80)
+        print("✅ Search indexes ready (restart the API to pick up search_vec)")
+        print("=" * 80)
+
+
+if __name__ == '__main__':
+    try:
+        add_search_index()
+    except Exception as e:
+        print(f"\n❌ Error during migration: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
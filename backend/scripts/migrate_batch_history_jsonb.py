@@ -0,0 +1,72 @@
+"""
+Migration script converting batch_history.errors / model_switches from TEXT to JSONB (PostgreSQL only).
+
+With JSONB columns, batch history saves append only the new errors and
+model switches instead of rewriting the whole JSON document.
+
+Safe to re-run (columns that are already JSONB are skipped).
+
+Usage:
+    python -m scripts.migrate_batch_history_jsonb
+"""
+
+import sys
+from pathlib import Path
+
+# Add backend to path
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from sqlalchemy import text
+
+from models import db
+from app import app
+
+COLUMNS = ('errors', 'model_switches')
+
+
+def migrate_batch_history_jsonb():
+    """Convert the JSON list columns to JSONB."""
+    with app.app_context():
+        print("=" * 80)
+        print("🔄 Converting batch_history JSON columns to JSONB")
+        print("=" * 80)
+
+        if db.engine.dialect.name != 'postgresql':
+            print("⏭️  Not a PostgreSQL database - JSON columns stay as text, nothing to do.")
+            return
+
+        for column in COLUMNS:
+            data_type = db.session.execute(
+                text(
+                    "SELECT data_type FROM information_schema.columns "
+                    "WHERE table_name = 'batch_history' AND column_name = :column"
+                ),
+                {'column': column}
+            ).scalar()
+
+            if data_type == 'jsonb':
+                print(f"  ⏭️  {column} is already JSONB")
+                continue
+
+            print(f"  🔧 Converting {column} ({data_type} → jsonb)...")
+            db.session.execute(text(
+                f"ALTER TABLE batch_history ALTER COLUMN {column} TYPE jsonb "
+                f"USING NULLIF({column}, '')::jsonb"
+            ))
+
+        db.session.commit()
+
+        print("=" * 80)
+        print("✅ Migration complete (restart the API to enable in-place appends)")
+        print("=" * 80)
+
+
+if __name__ == '__main__':
+    try:
+        migrate_batch_history_jsonb()
+    except Exception as e:
+        print(f"\n❌ Error during migration: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
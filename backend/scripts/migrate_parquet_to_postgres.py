@@ -12,7 +12,9 @@ Usage:
     python3 backend/scripts/migrate_parquet_to_postgres.py
 """
 
+import asyncio
 import sys
+import time
 from pathlib import Path
 
 # Add project root to path
@@ -20,12 +22,37 @@ project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
 import polars as pl
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 from backend.models import db, LegalSample
 from backend.config import DATABASE_URI, PARQUET_PATH
 from datetime import datetime
 
+# Optional fast path: asyncpg COPY with several concurrent connections
+try:
+    import asyncpg
+except ImportError:
+    asyncpg = None
+
+# Second choice when COPY is unavailable: psycopg 3 pipeline mode
+try:
+    import psycopg
+except ImportError:
+    psycopg = None
+
+COPY_WORKERS = 8
+# NOT NULL columns of legal_samples that prepare_frame() does not backfill
+REQUIRED_COLUMNS = ['id', 'question', 'answer', 'topic', 'difficulty']
+SAMPLE_COLUMNS = [
+    'id', 'question', 'answer', 'topic', 'difficulty', 'case_citation', 'reasoning',
+    'sample_type', 'jurisdiction', 'batch_id', 'created_at', 'updated_at'
+]
+
+def libpq_dsn():
+    """DATABASE_URI as a plain libpq DSN (asyncpg/psycopg reject SQLAlchemy driver URLs)."""
+    return make_url(DATABASE_URI).set(drivername='postgresql').render_as_string(hide_password=False)
+
 def count_parquet_records():
     """Count records in parquet file."""
     df = pl.read_parquet(PARQUET_PATH)
@@ -35,6 +62,137 @@ def count_postgres_records(session):
     """Count records in PostgreSQL."""
     return session.query(LegalSample).count()
 
+def prepare_frame(df):
+    """
+    Normalise the parquet frame to SAMPLE_COLUMNS.
+
+    Missing optional columns and NULL/empty citation or reasoning values are
+    backfilled here once, so the insert paths never need per-row defaults.
+    """
+    now = datetime.utcnow()
+    optional_defaults = {'sample_type': 'case_analysis', 'jurisdiction': 'uk', 'batch_id': None}
+    missing = [
+        pl.lit(default, dtype=pl.Utf8).alias(column)
+        for column, default in optional_defaults.items()
+        if column not in df.columns
+    ]
+    if missing:
+        df = df.with_columns(missing)
+
+    return df.with_columns(
+        pl.when(pl.col('case_citation').is_null() | (pl.col('case_citation') == ''))
+          .then(pl.lit('No case citation provided'))
+          .otherwise(pl.col('case_citation'))
+          .alias('case_citation'),
+        pl.when(pl.col('reasoning').is_null() | (pl.col('reasoning') == ''))
+          .then(pl.lit('No reasoning provided'))
+          .otherwise(pl.col('reasoning'))
+          .alias('reasoning'),
+        pl.lit(now).alias('created_at'),
+        pl.lit(now).alias('updated_at'),
+    ).select(SAMPLE_COLUMNS)
+
+STAGING_TABLE = f'{LegalSample.__tablename__}_staging'
+
+async def _copy_shard(pool, shard):
+    """COPY one shard of rows into the staging table over a pooled connection."""
+    async with pool.acquire() as conn:
+        await conn.copy_records_to_table(
+            STAGING_TABLE,
+            records=shard.iter_rows(),
+            columns=SAMPLE_COLUMNS
+        )
+    return len(shard)
+
+async def _copy_all(dsn, df):
+    """
+    Split the frame into shards and COPY them concurrently.
+
+    Shards are copied into an UNLOGGED staging table (one transaction per
+    connection), then moved into legal_samples with a single INSERT ... SELECT,
+    so a failed shard or conflicting row leaves legal_samples untouched.
+    """
+    shard_size = -(-len(df) // COPY_WORKERS) or 1
+    shards = [df.slice(offset, shard_size) for offset in range(0, len(df), shard_size)]
+    columns = ', '.join(SAMPLE_COLUMNS)
+    pool = await asyncpg.create_pool(dsn, min_size=len(shards) or 1, max_size=COPY_WORKERS)
+    try:
+        async with pool.acquire() as conn:
+            await conn.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+            await conn.execute(
+                f"CREATE UNLOGGED TABLE {STAGING_TABLE} "
+                f"(LIKE {LegalSample.__tablename__} INCLUDING DEFAULTS)"
+            )
+        try:
+            await asyncio.gather(*[_copy_shard(pool, shard) for shard in shards])
+            async with pool.acquire() as conn:
+                result = await conn.execute(
+                    f"INSERT INTO {LegalSample.__tablename__} ({columns}) "
+                    f"SELECT {columns} FROM {STAGING_TABLE}"
+                )
+        finally:
+            async with pool.acquire() as conn:
+                await conn.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+    finally:
+        await pool.close()
+    # Command tag is 'INSERT 0 <rows>'
+    return int(result.rsplit(' ', 1)[1])
+
+def copy_into_postgres(df):
+    """Load the frame with asyncpg COPY (uvloop is used when installed)."""
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+
+    return asyncio.run(_copy_all(libpq_dsn(), prepare_frame(df)))
+
+def insert_with_pipeline(df):
+    """
+    Insert rows through a psycopg 3 pipeline.
+
+    Statements are sent without waiting for each result, so a remote server's
+    round-trip latency is paid per pipeline sync rather than per row.
+    """
+    columns = ', '.join(SAMPLE_COLUMNS)
+    placeholders = ', '.join(['%s'] * len(SAMPLE_COLUMNS))
+    sql = f"INSERT INTO {LegalSample.__tablename__} ({columns}) VALUES ({placeholders})"
+
+    with psycopg.connect(libpq_dsn()) as conn:
+        with conn.pipeline(), conn.cursor() as cur:
+            cur.executemany(sql, prepare_frame(df).iter_rows())
+    return len(df)
+
+def insert_with_core(engine, records):
+    """
+    Insert records with one compiled Core INSERT executed per chunk.
+
+    Portable fallback when neither asyncpg nor psycopg 3 is available: avoids
+    building an ORM instance (and identity-map entry) for every row.
+    """
+    stmt = insert(LegalSample.__table__)
+    chunk_size = 5000
+    progress_interval = 0.5  # Seconds between progress line updates
+    last_progress = 0.0
+
+    # Rows were validated up front, so one transaction (and at most one
+    # rollback) covers the whole load
+    with engine.begin() as conn:
+        for offset in range(0, len(records), chunk_size):
+            chunk = records[offset:offset + chunk_size]
+            conn.execute(stmt, chunk)
+
+            # Throttle terminal writes so they don't dominate short batches
+            done = offset + len(chunk)
+            now = time.monotonic()
+            if now - last_progress >= progress_interval:
+                print(f"   Progress: {done:,}/{len(records):,} ({done/len(records)*100:.1f}%)", end='\r')
+                last_progress = now
+
+    print(f"\n   ✅ Inserted {len(records):,} records")
+    return len(records)
+
 def migrate():
     """Execute the migration."""
     print("=" * 80)
@@ -52,6 +210,22 @@ def migrate():
     print(f"   ✅ Loaded {len(df):,} records")
     print(f"   Columns: {df.columns}")
 
+    # Drop rows that cannot be inserted once here: the load runs as a single
+    # transaction, so one NULL in a NOT NULL column or a repeated id would
+    # abort the whole migration
+    valid_df = df.filter(pl.all_horizontal([pl.col(column).is_not_null() for column in REQUIRED_COLUMNS]))
+    invalid_count = len(df) - len(valid_df)
+    if invalid_count:
+        print(f"   ⚠️  Dropping {invalid_count:,} invalid rows (NULL in {', '.join(REQUIRED_COLUMNS)})")
+
+    # Keep the first row for each id
+    unique_df = valid_df.filter(pl.col('id').is_first_distinct())
+    duplicate_count = len(valid_df) - len(unique_df)
+    if duplicate_count:
+        print(f"   ⚠️  Dropping {duplicate_count:,} rows with duplicate ids")
+    df = unique_df
+    failed_count = invalid_count + duplicate_count
+
     # Step 3: Create database connection
     print("\n🔌 Step 3: Connecting to PostgreSQL...")
     print(f"   Database: {DATABASE_URI.split('@')[1] if '@' in DATABASE_URI else 'SQLite'}")
@@ -63,95 +237,77 @@ def migrate():
     LegalSample.__table__.create(engine, checkfirst=True)
     print("   ✅ Table 'legal_samples' ready")
 
-    # Step 5: Prepare session
-    Session = sessionmaker(bind=engine)
+    # Session is only used for counts and verification; rows are inserted
+    # through Core/COPY, so autoflush and expire-on-commit are unnecessary
+    Session = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
     session = Session()
 
-    # Check if table already has data
+    # Re-runs only load ids that are not in the table yet (they would hit the primary key)
     existing_count = count_postgres_records(session)
+    skipped_count = 0
     if existing_count > 0:
-        print(f"\n⚠️  WARNING: Table already contains {existing_count:,} records")
-        response = input("   Do you want to continue? This will add duplicates. (yes/no): ")
-        if response.lower() != 'yes':
-            print("   ❌ Migration cancelled")
-            return
-
-    # Step 6: Convert to records
-    print("\n🔄 Step 5: Converting records...")
-    records = df.to_dicts()
-    print(f"   ✅ Converted {len(records):,} records")
-
-    # Step 7: Insert records with progress tracking
-    print("\n💾 Step 6: Inserting records into PostgreSQL...")
-    print("   This may take a few minutes...")
-
-    inserted_count = 0
-    failed_count = 0
-    batch_size = 100
-
-    try:
-        for i, record in enumerate(records, 1):
-            try:
-                # Handle NULL/empty case_citation and reasoning values
-                case_citation = record.get('case_citation')
-                if not case_citation or case_citation == '':
-                    case_citation = 'No case citation provided'
-
-                reasoning = record.get('reasoning')
-                if not reasoning or reasoning == '':
-                    reasoning = 'No reasoning provided'
-
-                # Create LegalSample object
-                sample = LegalSample(
-                    id=record['id'],
-                    question=record['question'],
-                    answer=record['answer'],
-                    topic=record['topic'],
-                    difficulty=record['difficulty'],
-                    case_citation=case_citation,
-                    reasoning=reasoning,
-                    sample_type=record.get('sample_type', 'case_analysis'),
-                    jurisdiction=record.get('jurisdiction', 'uk'),
-                    batch_id=record.get('batch_id'),
-                )
-                session.add(sample)
-                inserted_count += 1
-
-                # Commit in batches for performance
-                if i % batch_size == 0:
-                    session.commit()
-                    print(f"   Progress: {i:,}/{len(records):,} ({i/len(records)*100:.1f}%)", end='\r')
-
-            except Exception as e:
-                failed_count += 1
-                print(f"\n   ⚠️  Failed to insert record {record.get('id', 'unknown')}: {e}")
-                session.rollback()
-
-        # Final commit
-        session.commit()
-        print(f"\n   ✅ Inserted {inserted_count:,} records")
-        if failed_count > 0:
-            print(f"   ⚠️  Failed: {failed_count:,} records")
-
-    except Exception as e:
-        print(f"\n   ❌ Migration failed: {e}")
-        session.rollback()
-        raise
-
-    # Step 8: Verify record count
-    print("\n✅ Step 7: Verifying migration...")
+        print(f"\n⚠️  Table already contains {existing_count:,} records - skipping ids already present")
+        existing_ids = pl.DataFrame(
+            {'id': session.execute(text(f"SELECT id FROM {LegalSample.__tablename__}")).scalars().all()},
+            schema={'id': df.schema['id']}
+        )
+        new_df = df.join(existing_ids, on='id', how='anti')
+        skipped_count = len(df) - len(new_df)
+        df = new_df
+        print(f"   Skipping {skipped_count:,} existing records, {len(df):,} left to insert")
+
+    if len(df) == 0:
+        print("\n✅ Nothing to insert")
+        session.close()
+        return
+
+    if asyncpg is not None and engine.dialect.name == 'postgresql':
+        # Step 5: Parallel COPY into staging, then one INSERT ... SELECT (no per-row Python objects)
+        print(f"\n💾 Step 5: Streaming records into PostgreSQL via COPY ({COPY_WORKERS} connections)...")
+        try:
+            inserted_count = copy_into_postgres(df)
+        except Exception as e:
+            print(f"\n   ❌ Migration failed (legal_samples unchanged): {e}")
+            raise
+        print(f"   ✅ Inserted {inserted_count:,} records")
+    elif psycopg is not None and engine.dialect.name == 'postgresql':
+        # Step 5: Pipelined INSERTs (no COPY, but no per-row round-trip either)
+        print("\n💾 Step 5: Inserting records into PostgreSQL via psycopg pipeline...")
+        try:
+            inserted_count = insert_with_pipeline(df)
+        except Exception as e:
+            print(f"\n   ❌ Migration failed: {e}")
+            raise
+        print(f"   ✅ Inserted {inserted_count:,} records")
+    else:
+        # Step 5: Convert to records and insert with progress tracking
+        print("\n💾 Step 5: Inserting records into PostgreSQL...")
+        records = prepare_frame(df).to_dicts()
+        print(f"   Converted {len(records):,} records")
+        print("   This may take a few minutes...")
+        try:
+            inserted_count = insert_with_core(engine, records)
+        except Exception as e:
+            print(f"\n   ❌ Migration failed: {e}")
+            raise
+
+    # Step 6: Verify record count
+    print("\n✅ Step 6: Verifying migration...")
     postgres_count = count_postgres_records(session)
     print(f"   Source (Parquet): {parquet_count:,} records")
     print(f"   Target (PostgreSQL): {postgres_count:,} records")
 
-    if postgres_count >= parquet_count:
-        print(f"   ✅ SUCCESS: All {parquet_count:,} records migrated!")
+    # Dropped rows are never inserted, so they are not expected in the table
+    expected_count = parquet_count - failed_count
+    if postgres_count >= expected_count:
+        print(f"   ✅ SUCCESS: All {expected_count:,} valid records migrated!")
 
         # Calculate statistics
         print("\n📊 Migration Statistics:")
         print(f"   Total records: {postgres_count:,}")
         print(f"   Inserted: {inserted_count:,}")
-        print(f"   Failed: {failed_count:,}")
+        print(f"   Already present: {skipped_count:,}")
+        print(f"   Dropped (invalid or duplicate): {failed_count:,}")
 
         # Sample distribution
         by_difficulty = session.query(
@@ -173,9 +329,9 @@ def migrate():
             print(f"      {sample_type}: {count:,}")
     else:
         print(f"   ❌ ERROR: Record count mismatch!")
-        print(f"      Expected: {parquet_count:,}")
+        print(f"      Expected: {expected_count:,}")
         print(f"      Got: {postgres_count:,}")
-        print(f"      Missing: {parquet_count - postgres_count:,}")
+        print(f"      Missing: {expected_count - postgres_count:,}")
 
     session.close()
 
@@ -26,6 +26,9 @@ from config import (
 from app import app
 import os
 
+# Membership is checked once per model while seeding; use O(1) lookups
+THINKING_MODELS = frozenset(THINKING_MODELS)
+
 
 def get_fallback_order(provider_id: str) -> list:
     """Get fallback order for a provider."""
@@ -39,26 +42,29 @@ def get_fallback_order(provider_id: str) -> list:
     return fallback_orders.get(provider_id, [])
 
 
+# Display emoji by model characteristic, checked in priority order
+MODEL_DISPLAY_TAGS = (
+    ('thinking', '🧠'),
+    ('large', '🏆'),
+    ('70b', '🏆'),
+    ('120b', '🏆'),
+    ('medium', '🥈'),
+    ('small', '⚡'),
+    ('8b', '⚡'),
+    ('code', '💻'),
+)
+
+
 def get_model_display_name(model_id: str, provider_id: str) -> str:
     """Generate display name for model."""
     # Clean up model ID for display
     name = model_id.replace('-', ' ').replace('_', ' ').title()
 
-    # Add emoji based on characteristics
-    if 'thinking' in model_id.lower():
-        name = f"🧠 {name}"
-    elif 'large' in model_id.lower() or '70b' in model_id or '120b' in model_id:
-        name = f"🏆 {name}"
-    elif 'medium' in model_id.lower():
-        name = f"🥈 {name}"
-    elif 'small' in model_id.lower() or '8b' in model_id:
-        name = f"⚡ {name}"
-    elif 'code' in model_id.lower():
-        name = f"💻 {name}"
-    else:
-        name = f"🔮 {name}"
-
-    return name
+    # Add emoji based on characteristics (first matching tag wins)
+    model_id_lc = model_id.lower()
+    emoji = next((tag_emoji for keyword, tag_emoji in MODEL_DISPLAY_TAGS if keyword in model_id_lc), '🔮')
+
+    return f"{emoji} {name}"
 
 
 def seed_providers():
@@ -2,29 +2,133 @@
 Batch Generation Service - Handles background batch generation logic.
 Extracted from api_server.py for better separation of concerns.
 """
+import asyncio
+import atexit
+import copy
+import itertools
+import logging
+import queue
+import re
 import time
 import threading
+from dataclasses import asdict, dataclass
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+import traceback
 import uuid
-import json
+from collections import defaultdict
 
 from config import (
+    BATCH_CONCURRENCY,
+    BATCH_FLUSH_INTERVAL,
+    BATCH_FLUSH_SIZE,
+    BATCH_HISTORY_FLUSH_INTERVAL,
+    BATCH_HISTORY_SAVE_EVERY,
+    BATCH_SAMPLES_PER_REQUEST,
     MAX_BATCH_TIMEOUT,
     MAX_MODEL_SWITCHES,
     MAX_SAMPLE_RETRIES,
     SAMPLE_TYPE_CYCLE,
     TOPICS,
+    TOPICS_BY_KEY,
+    PROVIDER_CIRCUIT_COOLDOWN,
     PROVIDERS
 )
-from models import db
+from flask import current_app
+from sqlalchemy import cast, func, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import load_only
+
+from models import db, Provider
 from models.batch import BatchHistory
 from services.generation_service import GenerationService
-from services.llm_service import LLMProviderFactory
+from services.llm_service import LLMProviderFactory, BaseLLMProvider, close_async_http_client
+from services.rate_limit import TokenBucket
 from services.sse_service import get_sse_service
 from utils.circuit_breaker import CircuitBreaker
+from utils.json_utils import dumps
 from services.data_service import DataService
 
+logger = logging.getLogger(__name__)
+
+# Optional: fastrlock's FastRLock avoids a kernel round-trip on uncontended
+# acquires; fall back to the stdlib reentrant lock when it isn't installed
+try:
+    from fastrlock.rlock import FastRLock
+except ImportError:
+    FastRLock = threading.RLock
+
+# Error classifiers for provider failover (one regex scan per category)
+_RATE_LIMIT_RE = re.compile(r'rate[ _]limit|429|too many requests', re.IGNORECASE)
+_MODEL_UNAVAILABLE_RE = re.compile(r'model_unavailable|model not found|invalid model', re.IGNORECASE)
+_AUTH_RE = re.compile(r'authentication|api key|unauthorized|401|403', re.IGNORECASE)
+
+# Provider preference: Cerebras (fastest) → Mistral (high quality) → Google → Groq → Ollama
+PROVIDER_PRIORITY = {
+    provider_id: rank
+    for rank, provider_id in enumerate(['cerebras', 'mistral', 'google', 'groq', 'ollama'])
+}
+
+
+def _provider_rank(provider_id: str) -> int:
+    """Sort key for PROVIDER_PRIORITY; unlisted providers go last in their original order."""
+    return PROVIDER_PRIORITY.get(provider_id, len(PROVIDER_PRIORITY))
+
+
+@dataclass(slots=True)
+class BatchCounters:
+    """Hot per-sample counters, updated by attribute instead of dict key."""
+    samples_generated: int = 0
+    total_tokens: int = 0
+    consecutive_failures: int = 0
+
+
+# batch_state lists the worker appends to while readers may be serializing
+_APPENDED_FIELDS = ('errors', 'model_switches', 'provider_switches', 'skipped_topics')
+
+
+def _json_safe_state(batch_state: Dict) -> Dict:
+    """
+    Shallow copy of a batch state that jsonify/json.dumps can serialize.
+
+    tried_models_by_provider holds sets for O(1) membership checks; they are
+    emitted as sorted lists, and defaultdicts become plain dicts.
+    BatchCounters fields are flattened back into the top-level keys API
+    clients expect. The lists the worker appends to are copied so a caller
+    serializing the snapshot after the lock is released never races them.
+    """
+    state = dict(batch_state)
+    for field in _APPENDED_FIELDS:
+        if field in state:
+            state[field] = list(state[field])
+    counters = state.pop('counters', None)
+    if counters is not None:
+        state.update(asdict(counters))
+    state['tried_models_by_provider'] = {
+        provider: sorted(models)
+        for provider, models in batch_state.get('tried_models_by_provider', {}).items()
+    }
+    if 'provider_failures' in state:
+        state['provider_failures'] = dict(state['provider_failures'])
+    return state
+
+
+# Scalar fields reported by the compact status view (no unbounded trails)
+SUMMARY_FIELDS = (
+    'batch_id', 'running', 'progress', 'total', 'samples_generated', 'total_tokens',
+    'current_provider', 'current_model', 'current_sample', 'started_at', 'completed_at'
+)
+
+
+def _summary_state(batch_state: Dict) -> Dict:
+    """Compact status view: scalar progress fields plus an error count."""
+    summary = {field: batch_state.get(field) for field in SUMMARY_FIELDS}
+    counters = batch_state['counters']
+    summary['samples_generated'] = counters.samples_generated
+    summary['total_tokens'] = counters.total_tokens
+    summary['error_count'] = len(batch_state.get('errors', []))
+    return summary
+
 
 class BatchService:
     """
@@ -34,8 +138,27 @@ class BatchService:
 
     # Class-level shared state (persists across all instances)
     _active_batches: Dict = {}  # In-memory batch state shared across all instances
-    _batch_lock = threading.Lock()  # Shared lock for thread-safe access
-    _parquet_lock = threading.Lock()  # Shared lock for parquet writes
+    _batch_locks: Dict[str, FastRLock] = {}  # Per-batch locks guarding each batch_state
+    _batch_lock = FastRLock()  # Registry lock: guards adding/removing batches only
+    _fallback_order_cache: Dict[str, Tuple[float, List[str]]] = {}  # provider -> (fetched_at, models)
+    FALLBACK_ORDER_TTL = 60  # Seconds a provider's fallback order is reused
+    _event_loop: Optional[asyncio.AbstractEventLoop] = None  # Background loop running all batch workers
+    _event_loop_lock = threading.Lock()
+    _history_queue = queue.SimpleQueue()  # (batch_id, seq, snapshot) awaiting a BatchHistory write
+    _history_writer: Optional[threading.Thread] = None
+    _history_writer_lock = threading.Lock()
+    _history_seq = itertools.count(1)  # Orders snapshots so a stale one never overwrites a newer save
+    _history_pending: Dict[str, Tuple[int, Dict]] = {}  # batch_id -> latest (seq, snapshot) taken off the queue
+    _history_pending_lock = threading.Lock()
+    _history_write_lock = threading.Lock()  # Serializes writes with the seq check
+    _history_written_seq: Dict[str, int] = {}  # batch_id -> seq of the last snapshot written
+    _history_saved_lengths: Dict[str, Tuple[int, int]] = {}  # batch_id -> (errors, model_switches) last written
+    _history_jsonb: Optional[bool] = None  # batch_history JSON columns are JSONB (None = not checked yet)
+    _buckets: Dict[str, TokenBucket] = {}  # provider -> request budget shared by all batches
+    # Providers whose models all failed are skipped by every batch until the cooldown passes
+    _provider_breaker = CircuitBreaker(recovery_timeout=PROVIDER_CIRCUIT_COOLDOWN)
+    _history_cache: Dict[bool, Tuple[float, List[Dict]]] = {}  # summary flag -> (fetched_at, BatchHistory dicts)
+    HISTORY_CACHE_TTL = 2  # Seconds the history rows are reused between dashboard polls
 
     def __init__(self):
         """Initialize batch service (uses class-level shared state)."""
@@ -51,10 +174,66 @@ class BatchService:
         """Access shared batch_lock"""
         return BatchService._batch_lock
 
-    @property
-    def parquet_lock(self):
-        """Access shared parquet_lock"""
-        return BatchService._parquet_lock
+    def _get_state_lock(self, batch_id: str) -> Optional[FastRLock]:
+        """Look up the per-batch lock (registry lock is held only for the lookup)."""
+        with self.batch_lock:
+            return BatchService._batch_locks.get(batch_id)
+
+    def _snapshot_batch(self, batch_id: str, verbose: bool = True) -> Optional[Dict]:
+        """
+        Copy of a batch state taken under its own lock.
+
+        Args:
+            batch_id: Batch identifier
+            verbose: Full state (errors, switches, tried models) if True,
+                     otherwise the compact summary view
+        """
+        with self.batch_lock:
+            batch_state = self.active_batches.get(batch_id)
+            state_lock = BatchService._batch_locks.get(batch_id)
+        if batch_state is None:
+            return None
+        with state_lock:
+            return _json_safe_state(batch_state) if verbose else _summary_state(batch_state)
+
+    def _get_event_loop(self) -> asyncio.AbstractEventLoop:
+        """
+        Get the shared batch event loop, starting its thread on first use.
+
+        Every batch worker runs as a coroutine on this one loop, so concurrent
+        batches overlap their LLM calls without a thread per batch.
+        """
+        with BatchService._event_loop_lock:
+            if BatchService._event_loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name='batch-event-loop')
+                thread.daemon = True
+                thread.start()
+                BatchService._event_loop = loop
+                atexit.register(BatchService._close_event_loop_clients, loop)
+            return BatchService._event_loop
+
+    @staticmethod
+    def _close_event_loop_clients(loop: asyncio.AbstractEventLoop) -> None:
+        """Close the batch loop's async HTTP client at interpreter shutdown."""
+        if not loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(close_async_http_client(), loop).result(timeout=5)
+        except Exception as e:
+            logger.warning("Failed to close batch HTTP client: %s", e)
+
+    def _get_rate_bucket(self, provider: str, requests_per_minute: float) -> TokenBucket:
+        """
+        Get the shared token bucket for a provider.
+
+        The bucket is replaced when the provider's configured rate changes.
+        """
+        with self.batch_lock:
+            bucket = BatchService._buckets.get(provider)
+            if bucket is None or bucket.capacity != requests_per_minute:
+                bucket = BatchService._buckets[provider] = TokenBucket(requests_per_minute)
+            return bucket
 
     def create_batch_state(self, batch_id: str, provider: str, model: str, total: int = 0) -> Dict:
         """Create initial batch state object."""
@@ -69,12 +248,10 @@ class BatchService:
             'batch_id': batch_id,
             'started_at': datetime.now().isoformat(),
             'completed_at': None,
-            'samples_generated': 0,
-            'total_tokens': 0,
+            'counters': BatchCounters(),
             'model_switches': [],
             'provider_switches': [],
             'failed_models_by_provider': {provider: []},
-            'consecutive_failures': 0,
             'skipped_topics': [],
             'circuit_breaker_summary': {}
         }
@@ -84,7 +261,7 @@ class BatchService:
                     reasoning_instruction: Optional[str] = None, sample_type_filter: str = 'balance',
                     smart_mode: bool = True):
         """
-        Start a new batch generation job in background thread.
+        Start a new batch generation job on the background event loop.
 
         Args:
             target_count: Target total sample count
@@ -101,7 +278,7 @@ class BatchService:
         """
         # Calculate samples needed from database
         data_service = DataService()
-        current_count = data_service.count()
+        current_count = data_service.count_cached()
         samples_needed = target_count - current_count
 
         if samples_needed <= 0:
@@ -113,12 +290,12 @@ class BatchService:
         # Smart mode: Auto-select best available provider
         if smart_mode and (provider == 'auto' or not provider):
             provider = self._select_best_provider()
-            print(f"🤖 Smart mode: Selected provider '{provider}'")
+            logger.info("🤖 Smart mode: Selected provider '%s'", provider)
 
         # Smart mode: Use provider's champion model if not specified
         if not model and provider in PROVIDERS:
             model = PROVIDERS[provider].get('champion_model') or PROVIDERS[provider]['default_model']
-            print(f"🤖 Smart mode: Using model '{model}'")
+            logger.info("🤖 Smart mode: Using model '%s'", model)
 
         # Generate unique batch ID
         batch_id = f"batch_{int(time.time())}_{str(uuid.uuid4())[:8]}"
@@ -132,26 +309,24 @@ class BatchService:
                 'reasoning_instruction': reasoning_instruction,
                 'sample_type_filter': sample_type_filter or 'balance',
                 'smart_mode': smart_mode,
-                'provider_failures': {},  # Track failures per provider
+                'provider_failures': defaultdict(int),  # Track failures per provider
                 'available_providers': [p for p in PROVIDERS.keys() if PROVIDERS[p]['enabled']],
-                'tried_models_by_provider': {provider: [model]}  # Mark initial model as tried
+                'tried_models_by_provider': defaultdict(set, {provider: {model}})  # Mark initial model as tried
             })
             self.active_batches[batch_id] = batch_state
+            BatchService._batch_locks[batch_id] = FastRLock()
 
         # Save to database
-        self._save_batch_to_db(batch_state)
+        self._queue_batch_save(batch_state)
 
-        # Get Flask app instance to pass to worker thread
-        from flask import current_app
+        # Get Flask app instance to pass to the worker
         app = current_app._get_current_object()
 
-        # Start background worker thread
-        thread = threading.Thread(
-            target=self._batch_worker,
-            args=(batch_id, target_count, provider, model, app)
+        # Schedule the worker on the shared background event loop
+        asyncio.run_coroutine_threadsafe(
+            self._batch_worker(batch_id, target_count, current_count, provider, model, app),
+            self._get_event_loop()
         )
-        thread.daemon = True
-        thread.start()
 
         return {
             'success': True,
@@ -174,40 +349,28 @@ class BatchService:
         """
         # Try database first
         try:
-            from models import Provider
-            from flask import current_app
-
             with current_app.app_context():
-                # Priority order: Cerebras (fastest) → Mistral (high quality) → Google → Groq → Ollama
-                priority_order = ['cerebras', 'mistral', 'google', 'groq', 'ollama']
-
-                for provider_id in priority_order:
-                    provider = Provider.query.filter_by(id=provider_id, enabled=True).first()
-                    if provider:
-                        print(f"🔍 Database: Selected provider '{provider_id}' (RPM: {provider.requests_per_minute})")
-                        return provider_id
-
-                # Fallback to first enabled provider in database
-                first_enabled = Provider.query.filter_by(enabled=True).first()
-                if first_enabled:
-                    print(f"🔍 Database: Selected provider '{first_enabled.id}' (fallback)")
-                    return first_enabled.id
+                # One query for all enabled providers, ranked in memory
+                providers = Provider.query.filter_by(enabled=True).all()
+                if providers:
+                    best = min(providers, key=lambda p: _provider_rank(p.id))
+                    if best.id in PROVIDER_PRIORITY:
+                        logger.info("🔍 Database: Selected provider '%s' (RPM: %s)", best.id, best.requests_per_minute)
+                    else:
+                        logger.info("🔍 Database: Selected provider '%s' (fallback)", best.id)
+                    return best.id
         except Exception as e:
-            print(f"⚠️  Database provider selection failed, using config.py: {e}")
+            logger.warning("⚠️  Database provider selection failed, using config.py: %s", e)
 
         # Fallback to config.py
-        priority_order = ['cerebras', 'mistral', 'google', 'groq', 'ollama']
-
-        for provider_id in priority_order:
-            if provider_id in PROVIDERS and PROVIDERS[provider_id].get('enabled', False):
-                print(f"🔍 Config: Selected provider '{provider_id}'")
-                return provider_id
-
-        # Fallback to first enabled provider
-        for provider_id, config in PROVIDERS.items():
-            if config.get('enabled', False):
-                print(f"🔍 Config: Selected provider '{provider_id}' (fallback)")
-                return provider_id
+        enabled = [provider_id for provider_id, config in PROVIDERS.items() if config.get('enabled', False)]
+        if enabled:
+            best = min(enabled, key=_provider_rank)
+            if best in PROVIDER_PRIORITY:
+                logger.info("🔍 Config: Selected provider '%s'", best)
+            else:
+                logger.info("🔍 Config: Selected provider '%s' (fallback)", best)
+            return best
 
         return 'groq'  # Final fallback
 
@@ -226,30 +389,56 @@ class BatchService:
         if not error:
             return False
 
-        error_lower = str(error).lower()
+        error_text = str(error)
 
         # Rate limit errors - immediate switch
-        if any(keyword in error_lower for keyword in ['rate limit', 'rate_limit', '429', 'too many requests']):
-            print(f"⚠️  Rate limit detected on {current_provider}")
+        if _RATE_LIMIT_RE.search(error_text):
+            logger.warning("⚠️  Rate limit detected on %s", current_provider)
             return True
 
         # Model unavailable errors
-        if any(keyword in error_lower for keyword in ['model_unavailable', 'model not found', 'invalid model']):
-            print(f"⚠️  Model unavailable on {current_provider}")
+        if _MODEL_UNAVAILABLE_RE.search(error_text):
+            logger.warning("⚠️  Model unavailable on %s", current_provider)
             return True
 
         # Authentication/API key errors
-        if any(keyword in error_lower for keyword in ['authentication', 'api key', 'unauthorized', '401', '403']):
-            print(f"⚠️  Authentication issue on {current_provider}")
+        if _AUTH_RE.search(error_text):
+            logger.warning("⚠️  Authentication issue on %s", current_provider)
             return True
 
         # Consecutive failures threshold (switch after 5 consecutive failures)
-        if batch_state.get('consecutive_failures', 0) >= 5:
-            print(f"⚠️  Too many consecutive failures ({batch_state['consecutive_failures']}) on {current_provider}")
+        consecutive_failures = batch_state['counters'].consecutive_failures
+        if consecutive_failures >= 5:
+            logger.warning("⚠️  Too many consecutive failures (%s) on %s", consecutive_failures, current_provider)
             return True
 
         return False
 
+    def _get_fallback_order(self, provider: str, ttl: Optional[float] = None) -> List[str]:
+        """
+        Get a provider's model fallback order, cached for ttl seconds.
+
+        Failure loops ask for the fallback order on every retry; caching it
+        avoids a provider lookup (and DB query) each time.
+
+        Args:
+            provider: Provider ID
+            ttl: Cache lifetime in seconds (defaults to FALLBACK_ORDER_TTL)
+
+        Returns:
+            List of model IDs in fallback order
+        """
+        ttl = self.FALLBACK_ORDER_TTL if ttl is None else ttl
+        cached = BatchService._fallback_order_cache.get(provider)
+        if cached and time.monotonic() - cached[0] < ttl:
+            return cached[1]
+
+        # Use database-driven configuration
+        provider_instance = LLMProviderFactory.get_provider(provider, use_db=True)
+        available_models = provider_instance.get_fallback_order()
+        BatchService._fallback_order_cache[provider] = (time.monotonic(), available_models)
+        return available_models
+
     def _get_next_model_for_provider(self, provider: str, batch_state: Dict) -> Optional[str]:
         """
         Get the next untried model for a provider.
@@ -262,23 +451,14 @@ class BatchService:
         Returns:
             str: Model name to try next, or None if all models exhausted
         """
-        # Initialize tried_models tracking if not exists
-        if 'tried_models_by_provider' not in batch_state:
-            batch_state['tried_models_by_provider'] = {}
-
-        if provider not in batch_state['tried_models_by_provider']:
-            batch_state['tried_models_by_provider'][provider] = []
-
-        tried_models = batch_state['tried_models_by_provider'][provider]
+        # tried_models_by_provider is a defaultdict(set): first access creates the entry
+        tried_models = batch_state.setdefault('tried_models_by_provider', defaultdict(set))[provider]
 
         # Get fallback order from provider instance (DRY - don't repeat provider logic)
         try:
-            from services.llm_service import LLMProviderFactory
-            # Use database-driven configuration
-            provider_instance = LLMProviderFactory.get_provider(provider, use_db=True)
-            available_models = provider_instance.get_fallback_order()
+            available_models = self._get_fallback_order(provider)
         except Exception as e:
-            print(f"⚠️  Error getting fallback order for {provider}: {e}")
+            logger.warning("⚠️  Error getting fallback order for %s: %s", provider, e)
             # Fallback to champion/default model from config
             return PROVIDERS[provider].get('champion_model') or PROVIDERS[provider]['default_model']
 
@@ -286,12 +466,12 @@ class BatchService:
         for model in available_models:
             if model not in tried_models:
                 # Mark this model as tried
-                tried_models.append(model)
-                print(f"🔄 Trying next model on {provider}: {model} ({len(tried_models)}/{len(available_models)} models tried)")
+                tried_models.add(model)
+                logger.info("🔄 Trying next model on %s: %s (%d/%d models tried)", provider, model, len(tried_models), len(available_models))
                 return model
 
         # All models tried on this provider
-        print(f"❌ All {len(available_models)} models exhausted on {provider}")
+        logger.warning("❌ All %d models exhausted on %s", len(available_models), provider)
         return None
 
     def _has_more_models(self, provider: str, batch_state: Dict) -> bool:
@@ -305,26 +485,19 @@ class BatchService:
         Returns:
             bool: True if there are more models to try
         """
-        if 'tried_models_by_provider' not in batch_state:
+        tried_models = batch_state.get('tried_models_by_provider', {}).get(provider)
+        if tried_models is None:
             return True
 
-        if provider not in batch_state['tried_models_by_provider']:
-            return True
-
-        tried_models = batch_state['tried_models_by_provider'][provider]
-
         # Get fallback order from provider instance (DRY - centralized logic)
         try:
-            from services.llm_service import LLMProviderFactory
-            # Use database-driven configuration
-            provider_instance = LLMProviderFactory.get_provider(provider, use_db=True)
-            available_models = provider_instance.get_fallback_order()
+            available_models = self._get_fallback_order(provider)
         except Exception as e:
-            print(f"⚠️  Error getting fallback order for {provider}: {e}")
+            logger.warning("⚠️  Error getting fallback order for %s: %s", provider, e)
             return False  # If we can't get models, assume none available
 
-        # Check if there are untried models
-        return len(tried_models) < len(available_models)
+        # Check if there are untried models (set comparison, so repeats can't skew it)
+        return not tried_models.issuperset(available_models)
 
     def _switch_to_next_provider(self, current_provider: str, batch_state: Dict) -> Optional[str]:
         """
@@ -338,46 +511,41 @@ class BatchService:
             str: Next provider to use, or None if all providers exhausted
         """
         available_providers = batch_state.get('available_providers', [])
-        provider_failures = batch_state.get('provider_failures', {})
+        provider_failures = batch_state.setdefault('provider_failures', defaultdict(int))
 
         # Record failure for current provider
-        if current_provider not in provider_failures:
-            provider_failures[current_provider] = 0
         provider_failures[current_provider] += 1
 
         # Check if all available providers have been tried and failed
+        # (.get so the check doesn't insert zero entries into the defaultdict)
         all_providers_failed = all(
-            provider_id in provider_failures and provider_failures[provider_id] > 0
+            provider_failures.get(provider_id, 0) > 0
             for provider_id in available_providers
         )
 
         if all_providers_failed:
-            print(f"❌ All providers exhausted! Failures: {provider_failures}")
+            logger.warning("❌ All providers exhausted! Failures: %s", provider_failures)
             # Check if all failures are rate limits
             if provider_failures[current_provider] < 3:
                 # Give each provider a few tries before giving up completely
-                print(f"⏳ Will retry providers (attempt {provider_failures[current_provider]}/3)")
+                logger.info("⏳ Will retry providers (attempt %d/3)", provider_failures[current_provider])
             else:
-                print(f"🛑 Stopping batch - all providers have been tried multiple times")
+                logger.warning("🛑 Stopping batch - all providers have been tried multiple times")
                 return None
 
-        # Remove current provider from available list
+        # Remove current provider from available list, skipping providers whose
+        # breaker is open (unless that would leave nothing to try)
         remaining_providers = [p for p in available_providers if p != current_provider]
+        healthy_providers = [p for p in remaining_providers if not BatchService._provider_breaker.is_open(p)]
+        if healthy_providers:
+            remaining_providers = healthy_providers
 
         if not remaining_providers:
             # Reset to try all providers again with backoff
             remaining_providers = available_providers
 
-        # Priority order for switching
-        priority_order = ['cerebras', 'mistral', 'google', 'groq', 'ollama']
-
-        # Try providers in priority order
-        for provider_id in priority_order:
-            if provider_id in remaining_providers:
-                return provider_id
-
-        # Fallback to first remaining provider
-        return remaining_providers[0] if remaining_providers else None
+        # Highest-priority remaining provider (unlisted providers keep their order)
+        return min(remaining_providers, key=_provider_rank) if remaining_providers else None
 
     def stop_batch(self, batch_id: Optional[str] = None):
         """
@@ -392,65 +560,102 @@ class BatchService:
         """
         stopped_batches = []
 
-        with self.batch_lock:
-            if batch_id:
-                # Stop specific batch - check in-memory first
-                if batch_id in self.active_batches:
-                    batch_state = self.active_batches[batch_id]
+        if batch_id:
+            # Stop specific batch - check in-memory first
+            state_lock = self._get_state_lock(batch_id)
+            if state_lock is not None:
+                batch_state = self.active_batches[batch_id]
+                with state_lock:
                     if batch_state['running']:
                         batch_state['running'] = False
                         batch_state['completed_at'] = datetime.now().isoformat()
                         stopped_batches.append(batch_id)
-                        # Save to database
-                        self._save_batch_to_db(batch_state)
-                else:
-                    # Not in memory - check database for stuck batch
-                    from flask import current_app
-                    with current_app.app_context():
-                        db_batch = BatchHistory.query.filter_by(batch_id=batch_id).first()
-                        if db_batch and db_batch.status == 'running':
-                            # Found stuck batch in database - stop it
-                            db_batch.status = 'stopped'
-                            db_batch.completed_at = datetime.now().isoformat()
-                            db.session.commit()
-                            stopped_batches.append(batch_id)
-                            print(f"✅ Stopped stuck batch {batch_id} from database (not in memory)")
-                        else:
-                            return {'success': False, 'error': f'Batch {batch_id} not found or already stopped'}
+                # Save to database (snapshots under its own lock acquisition)
+                if stopped_batches:
+                    self._queue_batch_save(batch_state)
             else:
-                # Stop all running batches (in-memory)
-                for bid, batch_state in self.active_batches.items():
+                # Not in memory - check database for stuck batch
+                with current_app.app_context():
+                    db_batch = BatchHistory.query.filter_by(batch_id=batch_id).first()
+                    if db_batch and db_batch.status == 'running':
+                        # Found stuck batch in database - stop it
+                        db_batch.status = 'stopped'
+                        db_batch.completed_at = datetime.now().isoformat()
+                        db.session.commit()
+                        BatchService._history_cache.clear()
+                        stopped_batches.append(batch_id)
+                        logger.info("✅ Stopped stuck batch %s from database (not in memory)", batch_id)
+                    else:
+                        return {'success': False, 'error': f'Batch {batch_id} not found or already stopped'}
+        else:
+            # Stop all running batches (in-memory): snapshot the registry,
+            # flip each batch's flags under its own lock, then queue the
+            # history saves once no lock is held
+            with self.batch_lock:
+                batches = [
+                    (bid, batch_state, BatchService._batch_locks[bid])
+                    for bid, batch_state in self.active_batches.items()
+                ]
+            now = datetime.now().isoformat()
+            to_save = []
+            for bid, batch_state, state_lock in batches:
+                with state_lock:
                     if batch_state.get('running', False):
                         batch_state['running'] = False
-                        batch_state['completed_at'] = datetime.now().isoformat()
+                        batch_state['completed_at'] = now
+                        to_save.append(batch_state)
                         stopped_batches.append(bid)
-                        # Save to database
-                        self._save_batch_to_db(batch_state)
+            for batch_state in to_save:
+                self._queue_batch_save(batch_state)
 
         if len(stopped_batches) > 0:
             return {'success': True, 'stopped_batches': stopped_batches, 'count': len(stopped_batches)}
         else:
             return {'success': False, 'error': 'Batch not found or already stopped'}
 
-    def get_batch_status(self, batch_id: Optional[str] = None):
-        """Get status of specific batch or all batches."""
+    def get_batch_status(self, batch_id: Optional[str] = None, verbose: bool = False):
+        """
+        Get status of specific batch or all batches.
+
+        Args:
+            batch_id: Specific batch, or None for all active batches
+            verbose: Include the full error/switch trail instead of the
+                     compact summary (which stays small for long batches)
+        """
+        if batch_id:
+            return self._snapshot_batch(batch_id, verbose)
+
         with self.batch_lock:
-            if batch_id:
-                return self.active_batches.get(batch_id)
-            else:
-                return {
-                    'batches': self.active_batches,
-                    'count': len(self.active_batches)
-                }
+            batch_ids = list(self.active_batches.keys())
+        batches = {}
+        for bid in batch_ids:
+            snapshot = self._snapshot_batch(bid, verbose)
+            if snapshot is not None:
+                batches[bid] = snapshot
+        return {
+            'batches': batches,
+            'count': len(batches)
+        }
 
-    def _batch_worker(self, batch_id: str, target_count: int, provider: str, model: str, app):
+    async def _batch_worker(self, batch_id: str, target_count: int, current_count: int,
+                            provider: str, model: str, app):
         """
         Background worker for batch generation.
         This is the main batch generation loop extracted from api_server.py.
 
+        Runs as a coroutine on the shared batch event loop: samples are
+        generated in waves of up to BATCH_CONCURRENCY provider calls through
+        GenerationService.generate_batch (sharing the provider's rate bucket),
+        failed samples are retried in the next wave, and LLM calls and
+        rate-limit waits are awaited, and blocking database work (sample
+        inserts, rate-limit/fallback lookups) runs via asyncio.to_thread, so
+        other batches progress meanwhile. State mutations still take the per-batch lock (never across an await)
+        because Flask request threads read the same state.
+
         Args:
             batch_id: Unique batch identifier
             target_count: Target total sample count
+            current_count: Sample count measured by start_batch
             provider: LLM provider name
             model: Model name
             app: Flask app instance for app_context
@@ -470,21 +675,27 @@ class BatchService:
 
                 with self.batch_lock:
                     if batch_id not in self.active_batches:
-                        print(f"❌ Batch {batch_id} not found in active_batches")
+                        logger.error("❌ Batch %s not found in active_batches", batch_id)
                         return
                     batch_state = self.active_batches[batch_id]
+                    # Mutations below only take this batch's lock, so other
+                    # batches and status readers never wait on this worker
+                    state_lock = BatchService._batch_locks[batch_id]
 
-                # Get rate limits from database
-                rate_limits = LLMProviderFactory.get_rate_limits(provider, use_db=True)
+                # Get rate limits from database (off the event loop thread)
+                rate_limits = await asyncio.to_thread(LLMProviderFactory.get_rate_limits, provider, use_db=True)
                 requests_per_minute = rate_limits['requests_per_minute']
-                request_delay = 60 / requests_per_minute
+                bucket = self._get_rate_bucket(provider, requests_per_minute)
+
+                # Resolve the provider once (DB lookup + key decryption, off the loop
+                # thread) and reuse it, with its async client, for every sample
+                provider_instance = await self._resolve_provider(provider)
 
                 # Initialize circuit breaker
                 circuit_breaker = CircuitBreaker()
 
-                # Load existing dataset from database (not parquet)
+                # Reuse the count start_batch just took instead of another COUNT(*)
                 data_service = DataService()
-                current_count = data_service.count()
                 samples_needed = target_count - current_count
 
                 # Get filters
@@ -494,274 +705,409 @@ class BatchService:
                 sample_type_filter = batch_state.get('sample_type_filter', 'case_analysis')
 
                 # Prepare topic cycle
-                if topic_filter:
-                    filtered_topics = [t for t in TOPICS if f"{t[0]} - {t[1]}" == topic_filter]
-                    if not filtered_topics:
-                        filtered_topics = TOPICS
+                if topic_filter in TOPICS_BY_KEY:
+                    filtered_topics = [TOPICS_BY_KEY[topic_filter]]
                 else:
                     filtered_topics = TOPICS
 
-                topic_cycle = filtered_topics * ((samples_needed // len(filtered_topics)) + 10)
+                # Lazy round-robin iterators (no list sized to the batch target)
+                topic_iter = itertools.cycle(filtered_topics)
+                sample_type_iter = itertools.cycle(SAMPLE_TYPE_CYCLE)
 
                 generated_samples = []
-                minute_start = time.time()
-                minute_requests = 0
-                minute_tokens = 0
-                batch_start_time = time.time()
+                last_flush = time.monotonic()
+                batch_start_time = time.monotonic()
                 iteration = 0
                 max_iterations = samples_needed * 3
 
-                # Main generation loop
-                while batch_state['samples_generated'] < samples_needed and iteration < max_iterations:
+                # Failed samples retried in the next wave:
+                # (practice_area, topic, difficulty, sample_type, attempts)
+                retry_queue: List[Tuple[str, str, str, str, int]] = []
+                wave_limit = BATCH_CONCURRENCY * max(BATCH_SAMPLES_PER_REQUEST, 1)
+                # Cache variant per attempt: counters never repeat within a batch,
+                # so a retry can't be served another sample's cached response
+                sample_counter = itertools.count(current_count + 1)
+
+                # Main generation loop: each wave fans out through generate_batch
+                counters = batch_state['counters']
+                last_history_save = 0
+                while counters.samples_generated < samples_needed and iteration < max_iterations:
                     # Check for manual stop
                     if not batch_state['running']:
                         break
 
                     # Check timeout
-                    elapsed_time = time.time() - batch_start_time
+                    elapsed_time = time.monotonic() - batch_start_time
                     if elapsed_time > MAX_BATCH_TIMEOUT:
-                        batch_state['errors'].append({
-                            'error': f"Batch timed out after {int(elapsed_time/60)} minutes",
-                            'timeout': True
-                        })
-                        batch_state['running'] = False
+                        with state_lock:
+                            batch_state['errors'].append({
+                                'error': f"Batch timed out after {int(elapsed_time/60)} minutes",
+                                'timeout': True
+                            })
+                            batch_state['running'] = False
                         break
 
-                    # Get current topic
-                    topic_index = iteration % len(topic_cycle)
-                    practice_area, topic, original_difficulty = topic_cycle[topic_index]
-                    topic_key = f"{practice_area} - {topic}"
-                    difficulty = difficulty_filter if difficulty_filter else original_difficulty
-
-                    # Circuit breaker check
-                    if circuit_breaker.is_open(topic_key):
-                        if topic_key not in batch_state['skipped_topics']:
-                            batch_state['skipped_topics'].append(topic_key)
-                        iteration += 1
+                    # Build the wave: pending retries first, then fresh topics
+                    wave_size = min(wave_limit, samples_needed - counters.samples_generated)
+                    wave = retry_queue[:wave_size]
+                    del retry_queue[:wave_size]
+                    while len(wave) < wave_size and iteration < max_iterations:
+                        practice_area, topic, original_difficulty = next(topic_iter)
+                        topic_key = f"{practice_area} - {topic}"
+
+                        # Circuit breaker check
+                        if circuit_breaker.is_open(topic_key):
+                            with state_lock:
+                                if topic_key not in batch_state['skipped_topics']:
+                                    batch_state['skipped_topics'].append(topic_key)
+                            iteration += 1
+                            continue
+
+                        difficulty = difficulty_filter if difficulty_filter else original_difficulty
+
+                        # Determine sample type
+                        if sample_type_filter == 'balance':
+                            current_sample_type = next(sample_type_iter)
+                        else:
+                            current_sample_type = sample_type_filter
+
+                        wave.append((practice_area, topic, difficulty, current_sample_type, 0))
+
+                    if not wave:
                         continue
 
-                    # Determine sample type
-                    if sample_type_filter == 'balance':
-                        sample_type_index = iteration % len(SAMPLE_TYPE_CYCLE)
-                        current_sample_type = SAMPLE_TYPE_CYCLE[sample_type_index]
-                    else:
-                        current_sample_type = sample_type_filter
-
-                    # Rate limiting
-                    elapsed_minute = time.time() - minute_start
-                    if elapsed_minute < 60 and minute_requests >= requests_per_minute:
-                        wait_time = 60 - elapsed_minute
-                        time.sleep(wait_time)
-                        minute_start = time.time()
-                        minute_tokens = 0
-                        minute_requests = 0
-                    elif elapsed_minute >= 60:
-                        minute_start = time.time()
-                        minute_tokens = 0
-                        minute_requests = 0
-
-                    batch_state['current_sample'] = topic_key
-
-                    # Generate sample with retries
-                    sample_success = False
-                    sample_retries = 0
-
-                    while not sample_success and sample_retries < MAX_SAMPLE_RETRIES:
-                        sample, tokens_used, elapsed, error = self.generation_service.generate_single_sample(
-                            practice_area, topic, difficulty,
-                            current_count + batch_state['samples_generated'] + 1,
-                            provider, model, reasoning_instruction, batch_id, current_sample_type
-                        )
+                    batch_state['current_sample'] = f"{wave[-1][0]} - {wave[-1][1]}"
+
+                    # Every provider call (including retries) takes a token from the
+                    # provider's shared bucket inside generate_batch
+                    specs = [
+                        {
+                            'practice_area': practice_area,
+                            'topic': topic,
+                            'difficulty': difficulty,
+                            'counter': next(sample_counter),
+                            'provider': provider,
+                            'model': model,
+                            'reasoning_instruction': reasoning_instruction,
+                            'batch_id': batch_id,
+                            'sample_type': sample_type,
+                            'provider_instance': provider_instance
+                        }
+                        for practice_area, topic, difficulty, sample_type, _ in wave
+                    ]
+                    results = await self.generation_service.generate_batch(
+                        specs,
+                        concurrency=BATCH_CONCURRENCY,
+                        few_shot_offset=counters.samples_generated,
+                        bucket=bucket,
+                        samples_per_request=BATCH_SAMPLES_PER_REQUEST
+                    )
+
+                    wave_provider = provider
+                    switched = False
+                    for (practice_area, topic, difficulty, sample_type, attempts), (sample, tokens_used, elapsed, error) in zip(wave, results):
+                        topic_key = f"{practice_area} - {topic}"
 
                         if sample:
                             generated_samples.append(sample)
-                            batch_state['samples_generated'] += 1
-                            batch_state['total_tokens'] += tokens_used
-                            batch_state['consecutive_failures'] = 0
-                            minute_tokens += tokens_used
-                            minute_requests += 1
-                            sample_success = True
+                            counters.samples_generated += 1
+                            counters.total_tokens += tokens_used
+                            counters.consecutive_failures = 0
+                            iteration += 1
 
                             circuit_breaker.record_success(topic_key)
+                            BatchService._provider_breaker.record_success(wave_provider)
+                            continue
+
+                        # Handle failure: retry in the next wave until MAX_SAMPLE_RETRIES
+                        counters.consecutive_failures += 1
+                        circuit_breaker.record_failure(topic_key, error)
+                        if attempts + 1 < MAX_SAMPLE_RETRIES:
+                            retry_queue.append((practice_area, topic, difficulty, sample_type, attempts + 1))
+                        else:
+                            iteration += 1
 
-                            # Auto-save to database every sample
-                            if generated_samples:
-                                data_service.add_bulk(generated_samples)
-                                generated_samples = []
-                            batch_state['circuit_breaker_summary'] = circuit_breaker.get_summary()
+                        # Smart provider failover, at most once per wave: later failures
+                        # in the wave came from the provider/model just replaced
+                        if (not batch_state.get('smart_mode', False) or switched
+                                or not batch_state['running']
+                                or not self._should_switch_provider(error, provider, batch_state)):
+                            continue
 
-                            # Broadcast real-time update to SSE subscribers
-                            sse_service = get_sse_service()
-                            sse_service.broadcast_batch_update(batch_id=batch_id, batch_data=batch_state)
+                        target = await self._fail_over(batch_id, batch_state, state_lock, provider, error)
+                        if target is None:
+                            continue  # All providers exhausted; the batch is stopped
+                        switched = True
+                        new_provider, new_model = target
 
-                        else:
-                            # Handle failure
-                            sample_retries += 1
-                            batch_state['consecutive_failures'] += 1
-                            circuit_breaker.record_failure(topic_key, error)
-
-                            # Smart provider failover logic
-                            if batch_state.get('smart_mode', False):
-                                should_switch = self._should_switch_provider(error, provider, batch_state)
-
-                                if should_switch:
-                                    # STRATEGY: Try all models on current provider FIRST, then switch providers
-
-                                    # Check if current provider has more untried models
-                                    if self._has_more_models(provider, batch_state):
-                                        # Try next model on SAME provider
-                                        new_model = self._get_next_model_for_provider(provider, batch_state)
-
-                                        if new_model:
-                                            model = new_model
-                                            batch_state['current_model'] = model
-                                            batch_state['model_switches'].append({
-                                                'from': batch_state.get('last_model', model),
-                                                'to': model,
-                                                'provider': provider,
-                                                'reason': error,
-                                                'at_sample': batch_state['samples_generated']
-                                            })
-                                            batch_state['last_model'] = model
-
-                                            # Reset failure counters
-                                            batch_state['consecutive_failures'] = 0
-                                            sample_retries = 0
-
-                                            print(f"✅ Switched to next model on {provider}: {model}")
-                                            continue  # Try with new model immediately
-
-                                    # All models exhausted on current provider - switch to next provider
-                                    print(f"⚠️  All models tried on {provider}, switching providers...")
-                                    new_provider = self._switch_to_next_provider(provider, batch_state)
-
-                                    # Check if all providers are exhausted
-                                    if new_provider is None:
-                                        print(f"🛑 All providers exhausted - stopping batch")
-                                        batch_state['running'] = False
-                                        batch_state['completed_at'] = datetime.now().isoformat()
-                                        batch_state['errors'].append({
-                                            'error': 'All providers and models exhausted',
-                                            'provider_failures': batch_state.get('provider_failures', {}),
-                                            'timestamp': datetime.now().isoformat()
-                                        })
-                                        # Save to database
-                                        self._save_batch_to_db(batch_state)
-
-                                        # Broadcast error state to SSE subscribers
-                                        sse_service = get_sse_service()
-                                        sse_service.broadcast_batch_update(batch_id=batch_id, batch_data=batch_state)
-
-                                        break  # Exit the sample generation loop
-
-                                    if new_provider != provider:
-                                        print(f"🔄 Provider failover: {provider} → {new_provider} (reason: {error})")
-                                        provider = new_provider
-
-                                        # Get first model for new provider
-                                        model = self._get_next_model_for_provider(provider, batch_state)
-
-                                        if model is None:
-                                            # Shouldn't happen, but handle gracefully
-                                            print(f"❌ No models available for {provider}")
-                                            continue
-
-                                        # Update batch state
-                                        batch_state['current_provider'] = provider
-                                        batch_state['current_model'] = model
-                                        batch_state['provider_switches'].append({
-                                            'from': batch_state.get('last_provider', provider),
-                                            'to': provider,
-                                            'reason': error,
-                                            'at_sample': batch_state['samples_generated']
-                                        })
-                                        batch_state['last_provider'] = provider
-
-                                        # Get new rate limits for new provider from database
-                                        rate_limits = LLMProviderFactory.get_rate_limits(provider, use_db=True)
-                                        requests_per_minute = rate_limits['requests_per_minute']
-                                        request_delay = 60 / requests_per_minute
-
-                                        # Reset minute tracking
-                                        minute_start = time.time()
-                                        minute_requests = 0
-                                        minute_tokens = 0
-
-                                        # Reset failure counters after successful switch
-                                        batch_state['consecutive_failures'] = 0
-                                        sample_retries = 0  # Reset retries to try with new provider
-
-                                        print(f"✅ Switched to {provider}/{model} (rate limit: {requests_per_minute} req/min)")
-
-                                        # Break retry loop to use new provider immediately
-                                        continue
-
-                            if sample_retries < MAX_SAMPLE_RETRIES:
-                                time.sleep(2)
-
-                    iteration += 1
-                    batch_state['progress'] = iteration
-
-                    if batch_state['samples_generated'] % 10 == 0:
-                        self._save_batch_to_db(batch_state)
-
-                    time.sleep(request_delay)
-
-                # Final save (after loop completes)
-                if generated_samples:
-                    data_service.add_bulk(generated_samples)
-
-                batch_state['completed_at'] = datetime.now().isoformat()
-                batch_state['running'] = False
-                batch_state['circuit_breaker_summary'] = circuit_breaker.get_summary()
+                        if new_provider != provider:
+                            provider = new_provider
+
+                            # Get new rate limits for new provider from database
+                            rate_limits = await asyncio.to_thread(
+                                LLMProviderFactory.get_rate_limits, provider, use_db=True
+                            )
+                            requests_per_minute = rate_limits['requests_per_minute']
 
-                self._save_batch_to_db(batch_state)
+                            # Draw from the new provider's shared bucket
+                            bucket = self._get_rate_bucket(provider, requests_per_minute)
 
-                # Broadcast final completion update to SSE subscribers
-                sse_service = get_sse_service()
-                sse_service.broadcast_batch_update(batch_id=batch_id, batch_data=batch_state)
+                            provider_instance = await self._resolve_provider(provider)
+
+                            logger.info("✅ Switched to %s/%s (rate limit: %s req/min)", provider, new_model, requests_per_minute)
+                        model = new_model
+
+                    if switched:
+                        # Queued samples get their full retries on the new model
+                        retry_queue = [(*entry[:4], 0) for entry in retry_queue]
+
+                    with state_lock:
+                        batch_state['circuit_breaker_summary'] = circuit_breaker.get_summary()
+                        batch_state['progress'] = iteration
+
+                    # Save and broadcast in batches rather than per sample
+                    last_flush = await self._maybe_flush(
+                        batch_id, batch_state, generated_samples, data_service, last_flush
+                    )
+
+                    if counters.samples_generated - last_history_save >= BATCH_HISTORY_SAVE_EVERY:
+                        last_history_save = counters.samples_generated
+                        self._queue_batch_save(batch_state)
+
+                    if retry_queue and not switched and batch_state['running']:
+                        await asyncio.sleep(2)
+
+                with state_lock:
+                    batch_state['completed_at'] = datetime.now().isoformat()
+                    batch_state['running'] = False
+                    batch_state['circuit_breaker_summary'] = circuit_breaker.get_summary()
+
+                # Final flush: remaining samples plus the completion update for SSE subscribers
+                await self._maybe_flush(batch_id, batch_state, generated_samples, data_service, last_flush, force=True)
+
+                # Final save goes straight to the database (off the loop thread), after the
+                # flush so the recorded count excludes samples that failed to save
+                await asyncio.to_thread(self._queue_batch_save, batch_state)
 
         except Exception as e:
             # Catch and log any unhandled exceptions
-            import traceback
             error_msg = f"Batch worker crashed: {str(e)}"
             error_trace = traceback.format_exc()
-            print(f"❌ {error_msg}")
-            print(error_trace)
+            logger.error("❌ %s\n%s", error_msg, error_trace)
 
             # Save error to batch state (needs app context for DB access)
             with app.app_context():
                 with self.batch_lock:
-                    if batch_id in self.active_batches:
-                        batch_state = self.active_batches[batch_id]
+                    batch_state = self.active_batches.get(batch_id)
+                    state_lock = BatchService._batch_locks.get(batch_id)
+                if batch_state is not None:
+                    now_iso = datetime.now().isoformat()
+                    with state_lock:
                         batch_state['running'] = False
-                        batch_state['completed_at'] = datetime.now().isoformat()
+                        batch_state['completed_at'] = now_iso
                         batch_state['errors'].append({
                             'error': error_msg,
                             'traceback': error_trace,
-                            'timestamp': datetime.now().isoformat()
+                            'timestamp': now_iso
                         })
-                        self._save_batch_to_db(batch_state)
+                    await asyncio.to_thread(self._queue_batch_save, batch_state)
+
+    async def _fail_over(self, batch_id: str, batch_state: Dict, state_lock: FastRLock,
+                         provider: str, error: str) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        Smart-mode failover after a failure that warrants a switch.
+
+        Tries every model on the current provider first, then moves to the
+        next provider; the switch is recorded in batch_state and saved.
+
+        Returns:
+            The (provider, model) to continue with, or None when all providers
+            are exhausted (the batch is then stopped and saved)
+        """
+        counters = batch_state['counters']
+
+        # Check if current provider has more untried models (its fallback order is
+        # fetched off the loop thread first, so the model helpers don't hit the database)
+        if await self._prefetch_fallback_order(provider) and self._has_more_models(provider, batch_state):
+            # Try next model on SAME provider
+            new_model = self._get_next_model_for_provider(provider, batch_state)
+
+            if new_model:
+                with state_lock:
+                    batch_state['current_model'] = new_model
+                    batch_state['model_switches'].append({
+                        'from': batch_state.get('last_model', new_model),
+                        'to': new_model,
+                        'provider': provider,
+                        'reason': error,
+                        'at_sample': counters.samples_generated
+                    })
+                    batch_state['last_model'] = new_model
+                self._queue_batch_save(batch_state)
+                counters.consecutive_failures = 0
+
+                logger.info("✅ Switched to next model on %s: %s", provider, new_model)
+                return provider, new_model
+
+        # All models exhausted on current provider - switch to next provider
+        logger.warning("⚠️  All models tried on %s, switching providers...", provider)
+        BatchService._provider_breaker.trip(provider)
+        new_provider = self._switch_to_next_provider(provider, batch_state)
+
+        # A provider that can't be built (disabled, no API key) has no models: move past it
+        while new_provider is not None and not await self._prefetch_fallback_order(new_provider):
+            BatchService._provider_breaker.trip(new_provider)
+            new_provider = self._switch_to_next_provider(new_provider, batch_state)
+
+        # Check if all providers are exhausted
+        if new_provider is None:
+            logger.warning("🛑 All providers exhausted - stopping batch")
+            now_iso = datetime.now().isoformat()
+            with state_lock:
+                batch_state['running'] = False
+                batch_state['completed_at'] = now_iso
+                batch_state['errors'].append({
+                    'error': 'All providers and models exhausted',
+                    'provider_failures': dict(batch_state.get('provider_failures', {})),
+                    'timestamp': now_iso
+                })
+            # Final save goes straight to the database (off the loop thread)
+            await asyncio.to_thread(self._queue_batch_save, batch_state)
+
+            # Broadcast error state to SSE subscribers
+            sse_service = get_sse_service()
+            sse_service.broadcast_batch_update(batch_id=batch_id, batch_data=_json_safe_state(batch_state))
+            return None
+
+        logger.info("🔄 Provider failover: %s → %s (reason: %s)", provider, new_provider, error)
+
+        # Get first model for new provider (fallback order already fetched above)
+        new_model = self._get_next_model_for_provider(new_provider, batch_state)
+        if new_model is None:
+            # Shouldn't happen, but handle gracefully
+            logger.error("❌ No models available for %s", new_provider)
+
+        # Update batch state
+        with state_lock:
+            batch_state['current_provider'] = new_provider
+            batch_state['current_model'] = new_model
+            batch_state['provider_switches'].append({
+                'from': batch_state.get('last_provider', new_provider),
+                'to': new_provider,
+                'reason': error,
+                'at_sample': counters.samples_generated
+            })
+            batch_state['last_provider'] = new_provider
+        self._queue_batch_save(batch_state)
+        counters.consecutive_failures = 0
+        return new_provider, new_model
+
+    async def _prefetch_fallback_order(self, provider: str) -> bool:
+        """
+        Refresh a provider's cached fallback order off the event loop thread.
+
+        Returns:
+            False if the provider can't be built (disabled, no API key), so
+            callers treat it as having no models to try
+        """
+        try:
+            await asyncio.to_thread(self._get_fallback_order, provider)
+            return True
+        except Exception as e:
+            logger.warning("⚠️  Error getting fallback order for %s: %s", provider, e)
+            return False
+
+    @staticmethod
+    async def _resolve_provider(provider: str) -> Optional[BaseLLMProvider]:
+        """
+        Build a provider instance off the event loop thread.
+
+        Returns None if the provider cannot be built (disabled, no API key);
+        generation then reports that error per sample so smart mode can fail over.
+        """
+        try:
+            return await asyncio.to_thread(LLMProviderFactory.get_provider, provider, use_db=True)
+        except Exception as e:
+            logger.warning("⚠️  Could not initialize provider %s: %s", provider, e)
+            return None
+
+    async def _maybe_flush(self, batch_id: str, batch_state: Dict, generated_samples: List[Dict],
+                           data_service: DataService, last_flush: float, force: bool = False) -> float:
+        """
+        Insert buffered samples and broadcast one SSE update once the buffer
+        reaches BATCH_FLUSH_SIZE or BATCH_FLUSH_INTERVAL has elapsed.
+
+        Samples the insert rejects are recorded in the batch errors and taken
+        back out of counters.samples_generated.
+
+        The bulk insert runs in a worker thread so other batches on the event
+        loop keep generating while it commits.
+
+        Args:
+            batch_id: Batch identifier
+            batch_state: Live batch state to broadcast
+            generated_samples: Sample buffer (cleared in place on flush)
+            data_service: DataService used for the bulk insert
+            last_flush: time.monotonic() of the previous flush
+            force: Flush regardless of buffer size/interval (end of batch)
+
+        Returns:
+            Time of the most recent flush
+        """
+        now = time.monotonic()
+        if not force and len(generated_samples) < BATCH_FLUSH_SIZE and now - last_flush < BATCH_FLUSH_INTERVAL:
+            return last_flush
+
+        if generated_samples:
+            pending = list(generated_samples)
+            generated_samples.clear()
+            result = await asyncio.to_thread(data_service.add_bulk, pending)
+            failed = result['errors']
+            if failed:
+                # Rejected rows were never stored: stop counting them so the
+                # worker generates replacements
+                logger.warning("⚠️  %d of %d samples failed to save for batch %s: %s",
+                               len(failed), len(pending), batch_id, failed[0]['error'])
+                state_lock = self._get_state_lock(batch_id)
+                with state_lock:
+                    batch_state['counters'].samples_generated -= len(failed)
+                    batch_state['errors'].append({
+                        'error': f"{len(failed)} samples failed to save: {failed[0]['error']}",
+                        'failed_ids': [error['id'] for error in failed],
+                        'timestamp': datetime.now().isoformat()
+                    })
+
+        # Broadcast real-time update to SSE subscribers
+        sse_service = get_sse_service()
+        sse_service.broadcast_batch_update(batch_id=batch_id, batch_data=_json_safe_state(batch_state))
+        return now
 
     def get_batch(self, batch_id: str) -> Optional[Dict]:
         """Get specific batch status."""
+        return self._snapshot_batch(batch_id)
+
+    def _snapshot_all(self) -> Dict:
+        """Snapshot every active batch; the registry lock is held only to list ids."""
         with self.batch_lock:
-            return self.active_batches.get(batch_id)
+            batch_ids = list(self.active_batches.keys())
+        snapshots = {}
+        for bid in batch_ids:
+            snapshot = self._snapshot_batch(bid)
+            if snapshot is not None:
+                snapshots[bid] = snapshot
+        return snapshots
 
     def get_running_batches(self) -> Dict:
         """Get all running batches."""
-        with self.batch_lock:
-            running = {
-                bid: batch
-                for bid, batch in self.active_batches.items()
-                if batch.get('running', False)
-            }
-            return running
+        return {
+            bid: batch
+            for bid, batch in self._snapshot_all().items()
+            if batch.get('running', False)
+        }
 
     def get_all_batches(self) -> Dict:
         """Get all active batches."""
-        with self.batch_lock:
-            return self.active_batches.copy()
+        return self._snapshot_all()
 
     def stop_all_batches(self) -> Dict:
         """Stop all running batches."""
@@ -774,19 +1120,22 @@ class BatchService:
                 if batch.get('running', False)
             ]
 
-            for bid in running_batch_ids:
-                batch_state = self.active_batches[bid]
+            running_batches = [
+                (bid, self.active_batches[bid], BatchService._batch_locks[bid])
+                for bid in running_batch_ids
+            ]
+
+        now_iso = datetime.now().isoformat()
+        for bid, batch_state, state_lock in running_batches:
+            with state_lock:
                 batch_state['running'] = False
-                batch_state['completed_at'] = datetime.now().isoformat()
-                stopped_batch_ids.append(bid)
-                stopped_batch_states.append(batch_state)
+                batch_state['completed_at'] = now_iso
+            stopped_batch_ids.append(bid)
+            stopped_batch_states.append(batch_state)
 
         # Save all stopped batches to database
         for batch_state in stopped_batch_states:
-            try:
-                self._save_batch_to_db(batch_state)
-            except Exception as e:
-                print(f"Warning: Failed to save batch {batch_state.get('batch_id')} to database: {e}")
+            self._queue_batch_save(batch_state)
 
         if len(stopped_batch_ids) > 0:
             return {
@@ -796,14 +1145,15 @@ class BatchService:
             }
 
         # Check for stuck batches in database
-        from flask import current_app
         with current_app.app_context():
             stuck_batches = BatchHistory.query.filter_by(status='running').all()
             if stuck_batches:
+                now_iso = datetime.now().isoformat()
                 for batch in stuck_batches:
                     batch.status = 'stopped'
-                    batch.completed_at = datetime.now().isoformat()
+                    batch.completed_at = now_iso
                 db.session.commit()
+                BatchService._history_cache.clear()
                 return {
                     'success': True,
                     'message': f'Stopped {len(stuck_batches)} stuck batch(es) from database'
@@ -814,65 +1164,90 @@ class BatchService:
             'error': 'No batch generation running'
         }
 
-    def get_batch_history(self) -> List[Dict]:
-        """Get all batch generation history from database."""
-        from flask import current_app
+    def get_batch_history(self, summary: bool = False) -> List[Dict]:
+        """
+        Get all batch generation history from database.
 
-        with current_app.app_context():
-            batches = BatchHistory.query.order_by(BatchHistory.started_at.desc()).all()
-            batch_list = [batch.to_dict() for batch in batches]
+        History rows are cached for HISTORY_CACHE_TTL seconds (cleared on every
+        history write); live state from running batches is merged per call.
 
-            # Merge live state from active batches
-            with self.batch_lock:
-                for batch_id, batch_state in self.active_batches.items():
-                    if batch_state.get('running'):
-                        # Find and update or add
-                        found = False
-                        for i, batch in enumerate(batch_list):
-                            if batch['id'] == batch_id:
-                                # Update with live data
-                                batch_list[i].update({
-                                    'samples_generated': batch_state.get('samples_generated', 0),
-                                    'tokens_used': batch_state.get('total_tokens', 0),
-                                    'status': 'running',
-                                    'errors': batch_state.get('errors', []),
-                                    'model_switches': batch_state.get('model_switches', []),
-                                    'provider_switches': batch_state.get('provider_switches', []),
-                                    'model': batch_state.get('current_model'),
-                                    'provider': batch_state.get('current_provider'),
-                                    'progress': batch_state.get('progress', 0),
-                                    'current_sample': batch_state.get('current_sample')
-                                })
-                                found = True
-                                break
-
-                        if not found:
-                            batch_list.insert(0, {
-                                'id': batch_id,
-                                'started_at': batch_state['started_at'],
-                                'completed_at': None,
-                                'model': batch_state.get('current_model'),
-                                'provider': batch_state.get('current_provider'),
-                                'topic_filter': batch_state.get('topic_filter'),
-                                'difficulty_filter': batch_state.get('difficulty_filter'),
-                                'target': batch_state.get('total', 0),
-                                'samples_generated': batch_state.get('samples_generated', 0),
-                                'tokens_used': batch_state.get('total_tokens', 0),
-                                'status': 'running',
-                                'errors': batch_state.get('errors', []),
-                                'model_switches': batch_state.get('model_switches', []),
-                                'progress': batch_state.get('progress', 0),
-                                'current_sample': batch_state.get('current_sample')
-                            })
+        Args:
+            summary: Skip loading the errors/model_switches columns (use
+                     get_batch_history_entry() for one batch's full record)
+        """
+        cached = BatchService._history_cache.get(summary)
+        if cached and time.monotonic() - cached[0] < self.HISTORY_CACHE_TTL:
+            history = cached[1]
+        else:
+            with current_app.app_context():
+                query = BatchHistory.query
+                if summary:
+                    query = query.options(load_only(
+                        *(getattr(BatchHistory, column) for column in BatchHistory.SUMMARY_COLUMNS)
+                    ))
+                batches = query.order_by(BatchHistory.started_at.desc()).all()
+                history = [batch.to_dict(include_details=not summary) for batch in batches]
+            BatchService._history_cache[summary] = (time.monotonic(), history)
+
+        # Copy so live updates never leak into the cached rows
+        batch_list = list(history)
+        index_by_id = {batch['id']: i for i, batch in enumerate(batch_list)}
+        new_batches = []
+
+        # Merge live state from active batches
+        with self.batch_lock:
+            running_batches = [
+                (bid, batch_state, BatchService._batch_locks[bid])
+                for bid, batch_state in self.active_batches.items()
+                if batch_state.get('running')
+            ]
 
-            return batch_list
+        for batch_id, batch_state, state_lock in running_batches:
+            with state_lock:
+                live = {
+                    'samples_generated': batch_state['counters'].samples_generated,
+                    'tokens_used': batch_state['counters'].total_tokens,
+                    'status': 'running',
+                    'model': batch_state.get('current_model'),
+                    'provider': batch_state.get('current_provider'),
+                    'progress': batch_state.get('progress', 0),
+                    'current_sample': batch_state.get('current_sample')
+                }
+                if not summary:
+                    # Copied so serialization never races the worker's appends
+                    for field in ('errors', 'model_switches', 'provider_switches'):
+                        live[field] = list(batch_state.get(field, []))
+
+                i = index_by_id.get(batch_id)
+                if i is not None:
+                    # Update with live data
+                    batch_list[i] = {**batch_list[i], **live}
+                else:
+                    new_batches.append({
+                        'id': batch_id,
+                        'started_at': batch_state['started_at'],
+                        'completed_at': None,
+                        'topic_filter': batch_state.get('topic_filter'),
+                        'difficulty_filter': batch_state.get('difficulty_filter'),
+                        'target': batch_state.get('total', 0),
+                        **live
+                    })
+
+        # Not-yet-saved batches go first (most recently started on top)
+        new_batches.reverse()
+        return new_batches + batch_list
+
+    def get_batch_history_entry(self, batch_id: str) -> Optional[Dict]:
+        """Get one batch's full history record (including errors and model switches)."""
+        with current_app.app_context():
+            batch = BatchHistory.query.filter_by(batch_id=batch_id).first()
+            return batch.to_dict() if batch else None
 
     def check_stuck_batches(self) -> Dict:
         """Detect stuck batches (disabled zombie detection - only checks truly stuck batches)."""
-        from flask import current_app
-
         stuck_threshold_minutes = 60  # Increased threshold to 1 hour
         now = datetime.now()
+        now_iso = now.isoformat()
 
         with current_app.app_context():
             running_batches = BatchHistory.query.filter_by(status='running').all()
@@ -907,11 +1282,12 @@ class BatchService:
                         stuck_batches.append(stuck_info)
 
                         # Stop the batch
-                        with self.batch_lock:
-                            if batch.batch_id in self.active_batches:
-                                batch_state = self.active_batches[batch.batch_id]
+                        state_lock = self._get_state_lock(batch.batch_id)
+                        if state_lock is not None:
+                            batch_state = self.active_batches[batch.batch_id]
+                            with state_lock:
                                 batch_state['running'] = False
-                                batch_state['completed_at'] = datetime.now().isoformat()
+                                batch_state['completed_at'] = now_iso
                                 batch_state['errors'].append({
                                     'error': f'Automatically stopped: stuck for {round(time_elapsed, 1)} minutes',
                                     'auto_stopped': True
@@ -919,14 +1295,15 @@ class BatchService:
 
                         # Update database
                         batch.status = 'stopped'
-                        batch.completed_at = datetime.now().isoformat()
+                        batch.completed_at = now_iso
                         db.session.commit()
+                        BatchService._history_cache.clear()
 
                         stopped_batches.append(stuck_info)
-                        print(f"🛑 Auto-stopped stuck batch {batch.batch_id} (running {round(time_elapsed, 1)} min)")
+                        logger.warning("🛑 Auto-stopped stuck batch %s (running %.1f min)", batch.batch_id, time_elapsed)
 
                 except Exception as e:
-                    print(f"Error checking batch {batch.batch_id}: {str(e)}")
+                    logger.error("Error checking batch %s: %s", batch.batch_id, e)
                     continue
 
             message = f'Automatically stopped {len(stopped_batches)} stuck batch(es)' if stopped_batches else 'No stuck batches found'
@@ -941,29 +1318,134 @@ class BatchService:
                 'message': message
             }
 
+    def _queue_batch_save(self, batch_state: Dict):
+        """
+        Queue a snapshot of batch_state for the background history writer.
+
+        Callers no longer wait on a DB commit; the writer coalesces queued
+        snapshots per batch (latest wins) and saves them every
+        BATCH_HISTORY_FLUSH_INTERVAL seconds. A finished batch (not running)
+        is saved directly instead, so its final status never sits in the
+        queue of a daemon thread that dies with the process. Coroutines must
+        call this through asyncio.to_thread and outside the batch's lock.
+        """
+        batch_id = batch_state.get('batch_id')
+        state_lock = self._get_state_lock(batch_id)
+        if state_lock is not None:
+            with state_lock:
+                snapshot = copy.deepcopy(_json_safe_state(batch_state))
+                seq = next(BatchService._history_seq)
+        else:
+            snapshot = copy.deepcopy(_json_safe_state(batch_state))
+            seq = next(BatchService._history_seq)
+
+        if not snapshot.get('running'):
+            self._write_history_snapshot(batch_id, seq, snapshot)
+            return
+
+        self._ensure_history_writer(current_app._get_current_object())
+        BatchService._history_queue.put((batch_id, seq, snapshot))
+
+    def _ensure_history_writer(self, app):
+        """Start the history writer thread on first use (and drain it at exit)."""
+        with BatchService._history_writer_lock:
+            if BatchService._history_writer is None:
+                writer = threading.Thread(target=self._history_writer_loop, args=(app,), name='batch-history-writer')
+                writer.daemon = True
+                writer.start()
+                BatchService._history_writer = writer
+                atexit.register(self._flush_history, app)
+
+    def _history_writer_loop(self, app):
+        """Drain queued snapshots, keep the latest per batch, and save them."""
+        while True:
+            batch_id, seq, snapshot = BatchService._history_queue.get()  # Block until there is work
+            with BatchService._history_pending_lock:
+                self._stage_history_snapshot(batch_id, seq, snapshot)
+
+            # Let further updates arrive so bursts collapse into one write per batch
+            time.sleep(BATCH_HISTORY_FLUSH_INTERVAL)
+            self._flush_history(app)
+
+    @staticmethod
+    def _stage_history_snapshot(batch_id: str, seq: int, snapshot: Dict):
+        """Keep the newest snapshot per batch in _history_pending (caller holds its lock)."""
+        staged = BatchService._history_pending.get(batch_id)
+        if staged is None or staged[0] < seq:
+            BatchService._history_pending[batch_id] = (seq, snapshot)
+
+    def _flush_history(self, app):
+        """
+        Write every queued and staged snapshot now.
+
+        Runs on the writer thread after each flush interval and synchronously
+        from atexit, so updates queued just before shutdown still reach the DB.
+        """
+        with BatchService._history_pending_lock:
+            while True:
+                try:
+                    batch_id, seq, snapshot = BatchService._history_queue.get_nowait()
+                except queue.Empty:
+                    break
+                self._stage_history_snapshot(batch_id, seq, snapshot)
+            pending = BatchService._history_pending
+            BatchService._history_pending = {}
+
+        if pending:
+            with app.app_context():
+                for batch_id, (seq, snapshot) in pending.items():
+                    self._write_history_snapshot(batch_id, seq, snapshot)
+
+    def _write_history_snapshot(self, batch_id: str, seq: int, snapshot: Dict):
+        """Save a snapshot unless a newer one for the same batch was already written."""
+        with BatchService._history_write_lock:
+            if BatchService._history_written_seq.get(batch_id, 0) > seq:
+                return
+            BatchService._history_written_seq[batch_id] = seq
+            self._save_batch_to_db(snapshot)
+
     def _save_batch_to_db(self, batch_state: Dict):
-        """Save batch state to database."""
-        import json
-        from flask import current_app
+        """
+        Save batch state to database.
 
+        Existing rows are updated in place (no SELECT first), and the errors /
+        model_switches columns are only written when those append-only lists
+        have grown since the last save of this batch. On JSONB columns only
+        the new entries are sent and appended with ||.
+        """
         try:
             batch_id = batch_state.get('batch_id')
             if not batch_id:
                 return
 
             with current_app.app_context():
-                batch = BatchHistory.query.filter_by(batch_id=batch_id).first()
-
-                if batch:
-                    # Update existing
-                    batch.completed_at = batch_state.get('completed_at')
-                    batch.samples_generated = batch_state.get('samples_generated', 0)
-                    batch.total_tokens = batch_state.get('total_tokens', 0)
-                    batch.status = 'running' if batch_state.get('running') else 'completed'
-                    batch.errors = json.dumps(batch_state.get('errors', []))
-                    batch.model_switches = json.dumps(batch_state.get('model_switches', []))
-                    batch.model = batch_state.get('current_model', batch.model)
-                else:
+                errors = batch_state.get('errors', [])
+                model_switches = batch_state.get('model_switches', [])
+                lengths = (len(errors), len(model_switches))
+                saved_lengths = BatchService._history_saved_lengths.get(batch_id)
+
+                # Update existing
+                updates = {
+                    'completed_at': batch_state.get('completed_at'),
+                    'samples_generated': batch_state.get('samples_generated', 0),
+                    'total_tokens': batch_state.get('total_tokens', 0),
+                    'status': 'running' if batch_state.get('running') else 'completed'
+                }
+                if batch_state.get('current_model'):
+                    updates['model'] = batch_state['current_model']
+                if saved_lengths is None or lengths[0] != saved_lengths[0]:
+                    updates['errors'] = self._json_list_update(
+                        BatchHistory.errors, errors, saved_lengths and saved_lengths[0]
+                    )
+                if saved_lengths is None or lengths[1] != saved_lengths[1]:
+                    updates['model_switches'] = self._json_list_update(
+                        BatchHistory.model_switches, model_switches, saved_lengths and saved_lengths[1]
+                    )
+                updated = BatchHistory.query.filter_by(batch_id=batch_id).update(
+                    updates, synchronize_session=False
+                )
+
+                if not updated:
                     # Create new
                     batch = BatchHistory(
                         batch_id=batch_id,
@@ -976,12 +1458,49 @@ class BatchService:
                         samples_generated=batch_state.get('samples_generated', 0),
                         total_tokens=batch_state.get('total_tokens', 0),
                         status='running' if batch_state.get('running') else 'stopped',
-                        errors=json.dumps(batch_state.get('errors', [])),
-                        model_switches=json.dumps(batch_state.get('model_switches', []))
+                        errors=errors,
+                        model_switches=model_switches
                     )
                     db.session.add(batch)
 
                 db.session.commit()
+                BatchService._history_cache.clear()
+                if batch_state.get('running'):
+                    BatchService._history_saved_lengths[batch_id] = lengths
+                else:
+                    BatchService._history_saved_lengths.pop(batch_id, None)
         except Exception as e:
-            print(f"Error saving batch to database: {str(e)}")
+            logger.error("Error saving batch to database: %s", e)
             db.session.rollback()
+
+    def _json_list_update(self, column, items: List, saved_count: Optional[int]):
+        """
+        UPDATE value for an append-only JSON list column.
+
+        Args:
+            column: BatchHistory column being updated
+            items: Full list from the batch snapshot
+            saved_count: Entries already written by this process (None/0 = unknown)
+
+        Returns:
+            A JSONB append expression for just the new entries, or the full list
+        """
+        if saved_count and self._history_jsonb_enabled():
+            new_items = cast(dumps(items[saved_count:]), JSONB)
+            return func.coalesce(column, cast('[]', JSONB)).op('||')(new_items)
+        return items
+
+    def _history_jsonb_enabled(self) -> bool:
+        """Check once whether batch_history uses JSONB (scripts/migrate_batch_history_jsonb.py)."""
+        if BatchService._history_jsonb is None:
+            if db.engine.dialect.name != 'postgresql':
+                BatchService._history_jsonb = False
+            else:
+                data_type = db.session.execute(
+                    text(
+                        "SELECT data_type FROM information_schema.columns "
+                        "WHERE table_name = 'batch_history' AND column_name = 'errors'"
+                    )
+                ).scalar()
+                BatchService._history_jsonb = data_type == 'jsonb'
+        return BatchService._history_jsonb
@@ -5,11 +5,70 @@ This service provides a clean interface for CRUD operations on legal training sa
 replacing direct parquet file access with database-backed persistence.
 """
 
-from typing import List, Dict, Optional
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
 from models import db, LegalSample
-from sqlalchemy import func, or_
+from sqlalchemy import func, insert, or_, select, tablesample, text
 from datetime import datetime
 
+# Fields every new sample must provide
+_REQUIRED_FIELDS = frozenset({
+    'id', 'question', 'answer', 'topic', 'difficulty', 'case_citation', 'reasoning'
+})
+# NOT NULL columns without an insert default (case_citation/reasoning get placeholders)
+_NON_NULL_FIELDS = ('id', 'question', 'answer', 'topic', 'difficulty')
+
+# Searchable fields -> columns (each has a pg_trgm GIN index once
+# scripts/add_search_index.py has run, so ILIKE '%q%' is index-assisted)
+_SEARCH_COLUMNS = {
+    'question': LegalSample.question,
+    'answer': LegalSample.answer,
+    'topic': LegalSample.topic,
+    'case_citation': LegalSample.case_citation,
+}
+
+# Filterable fields -> columns (all covered by the idx_filter composite index)
+_FILTER_COLUMNS = {
+    'topic': LegalSample.topic,
+    'difficulty': LegalSample.difficulty,
+    'jurisdiction': LegalSample.jurisdiction,
+    'sample_type': LegalSample.sample_type,
+}
+
+# Column projection used by list reads (same keys as LegalSample.to_dict())
+_SAMPLE_COLS = tuple(LegalSample.__table__.columns)
+
+
+def _row_to_dict(row) -> Dict:
+    """Convert a projected sample row mapping to the to_dict() shape."""
+    sample = dict(row)
+    for field in ('created_at', 'updated_at'):
+        value = sample[field]
+        sample[field] = value.isoformat() if value else None
+    return sample
+
+
+# All get_stats() aggregates in one scan: the () set yields the total and the
+# average lengths, each single-column set yields one distribution
+_STATS_SQL = f"""
+    SELECT
+        CASE
+            WHEN GROUPING(difficulty) = 0 THEN 'difficulty'
+            WHEN GROUPING(topic) = 0 THEN 'topic'
+            WHEN GROUPING(sample_type) = 0 THEN 'sample_type'
+            WHEN GROUPING(jurisdiction) = 0 THEN 'jurisdiction'
+            ELSE 'total'
+        END AS grouped_by,
+        difficulty, topic, sample_type, jurisdiction,
+        count(id) AS count,
+        avg(length(question)) AS avg_question,
+        avg(length(answer)) AS avg_answer,
+        avg(length(reasoning)) AS avg_reasoning,
+        avg(length(case_citation)) AS avg_case_citation
+    FROM {LegalSample.__tablename__}
+    GROUP BY GROUPING SETS ((), (difficulty), (topic), (sample_type), (jurisdiction))
+"""
+
 
 class DataService:
     """
@@ -24,6 +83,13 @@ class DataService:
     - Statistics and aggregations
     """
 
+    # Process-wide (fetched_at, total) for count_cached(); cleared on writes
+    _count_cache: Optional[Tuple[float, int]] = None
+    # Whether PostgreSQL's tsm_system_rows extension is installed (None = not checked yet)
+    _has_system_rows: Optional[bool] = None
+    # Whether legal_samples has the search_vec column (scripts/add_search_index.py)
+    _has_search_vec: Optional[bool] = None
+
     def __init__(self, session=None):
         """
         Initialize data service.
@@ -37,6 +103,10 @@ class DataService:
     # READ OPERATIONS
     # ========================================================================
 
+    def _fetch_dicts(self, stmt) -> List[Dict]:
+        """Run a select over _SAMPLE_COLS and return plain dicts (no ORM instances)."""
+        return [_row_to_dict(row) for row in self.session.execute(stmt).mappings()]
+
     def get_all(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
         """
         Get all legal samples.
@@ -48,15 +118,31 @@ class DataService:
         Returns:
             List of sample dictionaries
         """
-        query = self.session.query(LegalSample).order_by(LegalSample.created_at.desc())
+        stmt = select(*_SAMPLE_COLS).order_by(LegalSample.created_at.desc())
 
         if offset > 0:
-            query = query.offset(offset)
+            stmt = stmt.offset(offset)
         if limit:
-            query = query.limit(limit)
+            stmt = stmt.limit(limit)
+
+        return self._fetch_dicts(stmt)
 
-        samples = query.all()
-        return [sample.to_dict() for sample in samples]
+    def iter_all(self, chunk_size: int = 1000) -> Iterator[Dict]:
+        """
+        Stream every sample without loading the whole table into memory.
+
+        Rows are fetched through a server-side cursor (where the driver
+        supports one) chunk_size at a time.
+
+        Args:
+            chunk_size: Rows buffered per fetch
+
+        Yields:
+            Sample dictionaries (same shape as get_all())
+        """
+        stmt = select(*_SAMPLE_COLS).execution_options(stream_results=True, yield_per=chunk_size)
+        for row in self.session.execute(stmt).mappings():
+            yield _row_to_dict(row)
 
     def get_by_id(self, sample_id: str) -> Optional[Dict]:
         """
@@ -81,8 +167,7 @@ class DataService:
         Returns:
             List of sample dictionaries
         """
-        samples = self.session.query(LegalSample).filter_by(batch_id=batch_id).all()
-        return [sample.to_dict() for sample in samples]
+        return self._fetch_dicts(select(*_SAMPLE_COLS).where(LegalSample.batch_id == batch_id))
 
     def get_filtered(self,
                     topic: Optional[str] = None,
@@ -103,27 +188,33 @@ class DataService:
         Returns:
             List of matching sample dictionaries
         """
-        query = self.session.query(LegalSample)
-
-        if topic:
-            query = query.filter(LegalSample.topic == topic)
-        if difficulty:
-            query = query.filter(LegalSample.difficulty == difficulty)
-        if jurisdiction:
-            query = query.filter(LegalSample.jurisdiction == jurisdiction)
-        if sample_type:
-            query = query.filter(LegalSample.sample_type == sample_type)
+        values = {
+            'topic': topic,
+            'difficulty': difficulty,
+            'jurisdiction': jurisdiction,
+            'sample_type': sample_type,
+        }
+        # Values stay bound parameters, so each combination of active filters
+        # compiles once and is reused from SQLAlchemy's statement cache
+        stmt = select(*_SAMPLE_COLS).where(*(
+            column == values[name]
+            for name, column in _FILTER_COLUMNS.items()
+            if values[name]
+        ))
 
         if limit:
-            query = query.limit(limit)
+            stmt = stmt.limit(limit)
 
-        samples = query.all()
-        return [sample.to_dict() for sample in samples]
+        return self._fetch_dicts(stmt)
 
     def search(self, query_text: str, field: str = 'all', limit: int = 100) -> List[Dict]:
         """
         Full-text search across samples.
 
+        field='all' uses the GIN-indexed search_vec column (word/stem match)
+        once scripts/add_search_index.py has been run on PostgreSQL; otherwise
+        every search is a substring ILIKE (trigram-indexed by the same script).
+
         Args:
             query_text: Search query
             field: Field to search in ('all', 'question', 'answer', 'topic', 'case_citation')
@@ -134,34 +225,29 @@ class DataService:
         """
         search_pattern = f'%{query_text}%'
 
-        if field == 'all':
+        if field == 'all' and self._search_vec_available():
+            # GIN-indexed full-text match instead of four ILIKE scans
+            filters = text("search_vec @@ plainto_tsquery('english', :q)").bindparams(q=query_text)
+        elif field == 'all':
             # Search across multiple fields
-            filters = or_(
-                LegalSample.question.ilike(search_pattern),
-                LegalSample.answer.ilike(search_pattern),
-                LegalSample.topic.ilike(search_pattern),
-                LegalSample.case_citation.ilike(search_pattern)
-            )
+            filters = or_(*(column.ilike(search_pattern) for column in _SEARCH_COLUMNS.values()))
         else:
             # Search specific field
-            if field == 'question':
-                filters = LegalSample.question.ilike(search_pattern)
-            elif field == 'answer':
-                filters = LegalSample.answer.ilike(search_pattern)
-            elif field == 'topic':
-                filters = LegalSample.topic.ilike(search_pattern)
-            elif field == 'case_citation':
-                filters = LegalSample.case_citation.ilike(search_pattern)
-            else:
+            column = _SEARCH_COLUMNS.get(field)
+            if column is None:
                 raise ValueError(f'Invalid search field: {field}')
+            filters = column.ilike(search_pattern)
 
-        samples = self.session.query(LegalSample).filter(filters).limit(limit).all()
-        return [sample.to_dict() for sample in samples]
+        return self._fetch_dicts(select(*_SAMPLE_COLS).where(filters).limit(limit))
 
     def get_random(self, count: int = 5, difficulty: Optional[str] = None) -> List[Dict]:
         """
         Get random samples.
 
+        On PostgreSQL with the tsm_system_rows extension, rows come from
+        TABLESAMPLE SYSTEM_ROWS; otherwise (or if the sample is short) the
+        full ORDER BY random() query is used.
+
         Args:
             count: Number of random samples
             difficulty: Optional difficulty filter
@@ -169,14 +255,52 @@ class DataService:
         Returns:
             List of random sample dictionaries
         """
-        query = self.session.query(LegalSample)
+        if self._system_rows_available():
+            # Read a fixed number of random rows from a few pages instead of
+            # sorting the whole table; oversample so a difficulty filter
+            # still leaves enough rows
+            oversample = count * (10 if difficulty else 3)
+            sampled = tablesample(LegalSample.__table__, func.system_rows(oversample))
+            stmt = select(*sampled.c)
+            if difficulty:
+                stmt = stmt.where(sampled.c.difficulty == difficulty)
+            samples = self._fetch_dicts(stmt.order_by(func.random()).limit(count))
+            if len(samples) == count:
+                return samples
+
+        stmt = select(*_SAMPLE_COLS)
 
         if difficulty:
-            query = query.filter(LegalSample.difficulty == difficulty)
+            stmt = stmt.where(LegalSample.difficulty == difficulty)
 
         # Use database random function
-        samples = query.order_by(func.random()).limit(count).all()
-        return [sample.to_dict() for sample in samples]
+        return self._fetch_dicts(stmt.order_by(func.random()).limit(count))
+
+    def _system_rows_available(self) -> bool:
+        """Check once per process whether TABLESAMPLE SYSTEM_ROWS can be used."""
+        if DataService._has_system_rows is None:
+            if self.session.get_bind().dialect.name != 'postgresql':
+                DataService._has_system_rows = False
+            else:
+                DataService._has_system_rows = self.session.execute(
+                    text("SELECT 1 FROM pg_extension WHERE extname = 'tsm_system_rows'")
+                ).first() is not None
+        return DataService._has_system_rows
+
+    def _search_vec_available(self) -> bool:
+        """Check once per process whether the full-text search column exists."""
+        if DataService._has_search_vec is None:
+            if self.session.get_bind().dialect.name != 'postgresql':
+                DataService._has_search_vec = False
+            else:
+                DataService._has_search_vec = self.session.execute(
+                    text(
+                        "SELECT 1 FROM information_schema.columns "
+                        "WHERE table_name = :table AND column_name = 'search_vec'"
+                    ),
+                    {'table': LegalSample.__tablename__}
+                ).first() is not None
+        return DataService._has_search_vec
 
     # ========================================================================
     # WRITE OPERATIONS
@@ -196,25 +320,17 @@ class DataService:
             ValueError: If required fields are missing or ID already exists
         """
         # Validate required fields
-        required_fields = ['id', 'question', 'answer', 'topic', 'difficulty',
-                          'case_citation', 'reasoning']
-        missing = [f for f in required_fields if f not in sample_data]
+        missing = _REQUIRED_FIELDS - sample_data.keys()
         if missing:
-            raise ValueError(f'Missing required fields: {", ".join(missing)}')
+            raise ValueError(f'Missing required fields: {", ".join(sorted(missing))}')
 
         # Check for duplicate ID
-        existing = self.session.query(LegalSample).filter_by(id=sample_data['id']).first()
-        if existing:
+        if self.exists(sample_data['id']):
             raise ValueError(f'Sample with ID "{sample_data["id"]}" already exists')
 
         # Handle NULL/empty values with defaults
-        case_citation = sample_data.get('case_citation')
-        if not case_citation or case_citation == '':
-            sample_data['case_citation'] = 'No case citation provided'
-
-        reasoning = sample_data.get('reasoning')
-        if not reasoning or reasoning == '':
-            sample_data['reasoning'] = 'No reasoning provided'
+        sample_data['case_citation'] = sample_data['case_citation'] or 'No case citation provided'
+        sample_data['reasoning'] = sample_data['reasoning'] or 'No reasoning provided'
 
         # Create new sample
         sample = LegalSample(
@@ -232,6 +348,7 @@ class DataService:
 
         self.session.add(sample)
         self.session.commit()
+        DataService._count_cache = None
 
         return sample.to_dict()
 
@@ -239,26 +356,97 @@ class DataService:
         """
         Add multiple samples in bulk.
 
+        Rows are validated in Python, duplicate IDs are found with a single
+        IN query, and the remaining rows go in with one executemany INSERT
+        and one commit. If that INSERT fails, rows are retried one by one in
+        savepoints so only the rows the database rejects are reported.
+
         Args:
             samples_data: List of sample dictionaries
 
         Returns:
             Dictionary with success count and any errors
         """
-        added = 0
         errors = []
+        candidates = []
 
+        # Validate required fields
         for idx, sample_data in enumerate(samples_data):
-            try:
-                self.add(sample_data)
-                added += 1
-            except Exception as e:
+            missing = _REQUIRED_FIELDS - sample_data.keys()
+            null_fields = [field for field in _NON_NULL_FIELDS if field not in missing and sample_data[field] is None]
+            if missing:
                 errors.append({
                     'index': idx,
                     'id': sample_data.get('id', 'unknown'),
-                    'error': str(e)
+                    'error': f'Missing required fields: {", ".join(sorted(missing))}'
                 })
+            elif null_fields:
+                errors.append({
+                    'index': idx,
+                    'id': sample_data.get('id', 'unknown'),
+                    'error': f'Required fields are null: {", ".join(null_fields)}'
+                })
+            else:
+                candidates.append((idx, sample_data))
+
+        # Check for duplicate IDs (already stored, or repeated within this call)
+        ids = [sample_data['id'] for _, sample_data in candidates]
+        existing_ids = set(
+            self.session.scalars(select(LegalSample.id).where(LegalSample.id.in_(ids)))
+        ) if ids else set()
+
+        now = datetime.utcnow()
+        rows = []
+        row_indexes = []
+        for idx, sample_data in candidates:
+            sample_id = sample_data['id']
+            if sample_id in existing_ids:
+                errors.append({
+                    'index': idx,
+                    'id': sample_id,
+                    'error': f'Sample with ID "{sample_id}" already exists'
+                })
+                continue
+            existing_ids.add(sample_id)
+
+            # Handle NULL/empty values with defaults; every row carries the same
+            # keys so the INSERT can be sent as one executemany batch
+            rows.append({
+                'id': sample_id,
+                'question': sample_data['question'],
+                'answer': sample_data['answer'],
+                'topic': sample_data['topic'],
+                'difficulty': sample_data['difficulty'],
+                'case_citation': sample_data['case_citation'] or 'No case citation provided',
+                'reasoning': sample_data['reasoning'] or 'No reasoning provided',
+                'jurisdiction': sample_data.get('jurisdiction', 'uk'),
+                'batch_id': sample_data.get('batch_id'),
+                'sample_type': sample_data.get('sample_type', 'case_analysis'),
+                'created_at': now,
+                'updated_at': now
+            })
+            row_indexes.append(idx)
 
+        added = 0
+        if rows:
+            try:
+                self.session.execute(insert(LegalSample), rows)
+                self.session.commit()
+                added = len(rows)
+            except Exception:
+                self.session.rollback()
+                # Retry row by row so one bad row doesn't fail the whole batch
+                for idx, row in zip(row_indexes, rows):
+                    try:
+                        with self.session.begin_nested():
+                            self.session.execute(insert(LegalSample), [row])
+                        added += 1
+                    except Exception as e:
+                        errors.append({'index': idx, 'id': row['id'], 'error': str(e)})
+                self.session.commit()
+            DataService._count_cache = None
+
+        errors.sort(key=lambda error: error['index'])
         return {
             'added': added,
             'total': len(samples_data),
@@ -286,8 +474,7 @@ class DataService:
         # If ID is being changed, check for duplicates
         new_id = updates.get('id')
         if new_id and new_id != sample_id:
-            existing = self.session.query(LegalSample).filter_by(id=new_id).first()
-            if existing:
+            if self.exists(new_id):
                 raise ValueError(f'Sample with ID "{new_id}" already exists')
 
         # Update fields
@@ -317,6 +504,7 @@ class DataService:
 
         self.session.delete(sample)
         self.session.commit()
+        DataService._count_cache = None
         return True
 
     # ========================================================================
@@ -327,9 +515,16 @@ class DataService:
         """
         Get comprehensive dataset statistics.
 
+        On PostgreSQL every aggregate comes from one GROUPING SETS query (one
+        table scan, one round-trip); other databases run one query per
+        aggregate.
+
         Returns:
             Dictionary with statistics
         """
+        if self.session.get_bind().dialect.name == 'postgresql':
+            return self._get_stats_grouping_sets()
+
         total = self.session.query(func.count(LegalSample.id)).scalar()
 
         # Difficulty distribution
@@ -394,10 +589,91 @@ class DataService:
             'unique_topics': unique_topics
         }
 
+    def _get_stats_grouping_sets(self) -> Dict:
+        """get_stats() computed with a single GROUPING SETS query (PostgreSQL)."""
+        rows = self.session.execute(text(_STATS_SQL)).mappings().all()
+
+        total = 0
+        avg_lengths = {}
+        distributions = {'difficulty': [], 'topic': [], 'sample_type': [], 'jurisdiction': []}
+        for row in rows:
+            group = row['grouped_by']
+            if group == 'total':
+                total = row['count']
+                avg_lengths = {
+                    field: round(float(row[f'avg_{field}'] or 0), 2)
+                    for field in ('question', 'answer', 'reasoning', 'case_citation')
+                }
+            else:
+                distributions[group].append((row[group], row['count']))
+
+        top_topics = sorted(distributions['topic'], key=lambda item: item[1], reverse=True)[:10]
+
+        return {
+            'total': total,
+            'difficulty_distribution': [
+                {'difficulty': d, 'count': c} for d, c in distributions['difficulty']
+            ],
+            'top_topics': [
+                {'topic': t, 'count': c} for t, c in top_topics
+            ],
+            'sample_type_distribution': [
+                {'sample_type': st, 'count': c} for st, c in distributions['sample_type']
+            ],
+            'jurisdiction_distribution': [
+                {'jurisdiction': j, 'count': c} for j, c in distributions['jurisdiction']
+            ],
+            'avg_lengths': avg_lengths or {
+                'question': 0, 'answer': 0, 'reasoning': 0, 'case_citation': 0
+            },
+            'unique_topics': sum(1 for topic, _ in distributions['topic'] if topic is not None)
+        }
+
     def count(self) -> int:
         """Get total sample count."""
         return self.session.query(func.count(LegalSample.id)).scalar()
 
+    def count_cached(self, ttl: float = 5) -> int:
+        """
+        Get total sample count, reusing a result younger than ttl seconds.
+
+        The cache is cleared by add()/delete(), so it only goes stale for
+        writes made by other processes.
+
+        Args:
+            ttl: Maximum age of the cached count in seconds
+
+        Returns:
+            Total sample count
+        """
+        cached = DataService._count_cache
+        if cached and time.time() - cached[0] < ttl:
+            return cached[1]
+
+        total = self.count()
+        DataService._count_cache = (time.time(), total)
+        return total
+
+    def count_estimate(self) -> int:
+        """
+        Get an approximate sample count without scanning the table.
+
+        Uses PostgreSQL's planner statistics (pg_class.reltuples); falls back
+        to an exact count on other databases or before the table is analyzed.
+        """
+        if self.session.get_bind().dialect.name != 'postgresql':
+            return self.count()
+
+        estimate = self.session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE relname = :table"),
+            {'table': LegalSample.__tablename__}
+        ).scalar()
+        if estimate is None or estimate < 0:
+            return self.count()
+        return estimate
+
     def exists(self, sample_id: str) -> bool:
-        """Check if a sample exists."""
-        return self.session.query(LegalSample).filter_by(id=sample_id).first() is not None
+        """Check if a sample exists (primary-key lookup, no row materialization)."""
+        return self.session.execute(
+            select(LegalSample.id).where(LegalSample.id == sample_id)
+        ).first() is not None
@@ -3,170 +3,230 @@ Generation Service - Handles sample generation logic with intelligent failover.
 Coordinates between providers, models, and error handling.
 """
 
+import asyncio
+import functools
+import itertools
 import json
+import logging
 import time
-import uuid
-from typing import Dict, List, Optional, Tuple
+from string import Template
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from uuid import uuid4
 from datetime import datetime
 
 from services.llm_service import LLMProviderFactory, BaseLLMProvider
+from services.llm_cache import get_llm_cache
+from services.rate_limit import TokenBucket
 from utils.error_handler import categorize_error
-from config import PROVIDERS, DIFFICULTY_SPECS, SCENARIO_PATTERNS, SAMPLE_TYPES, THINKING_MODELS
+from utils.json_utils import loads
+from config import PROVIDERS, DIFFICULTY_SPECS, SCENARIO_PATTERNS, SAMPLE_TYPES, THINKING_MODELS, REQUIRED_FIELDS
 import random
 import re
 
-
-class GenerationService:
-    """
-    Service for generating legal training samples.
-    Handles provider coordination, model fallback, and error recovery.
-    """
-
-    def __init__(self):
-        """Initialize generation service with provider factory."""
-        self.factory = LLMProviderFactory()
-
-    def _get_sample_type_guidance(self, sample_type: str) -> Dict[str, str]:
-        """
-        Get specific guidance for different sample types.
-
-        Args:
-            sample_type: Type of sample to generate
-
-        Returns:
-            Dictionary with type-specific guidance
-        """
-        sample_config = SAMPLE_TYPES.get(sample_type, SAMPLE_TYPES['case_analysis'])
-
-        type_guidance = {
-            'case_analysis': {
-                'objective': 'Analyze a practical legal problem using case law and statutes',
-                'question_format': 'Present a realistic client scenario requiring legal analysis and advice',
-                'answer_approach': 'Apply IRAC methodology to analyze the legal issue and provide clear guidance',
-                'focus': 'Problem-solving with comprehensive legal reasoning',
-                'example_context': 'A client comes to you with a factual situation requiring legal assessment'
-            },
-            'educational': {
-                'objective': 'Explain legal principles, doctrines, and rules to teach foundational concepts',
-                'question_format': 'Ask a question about a legal concept, doctrine, or principle',
-                'answer_approach': 'Provide a clear, structured explanation with examples and case law support',
-                'focus': 'Teaching legal concepts with clarity and accuracy',
-                'example_context': 'A student or junior lawyer wants to understand a legal doctrine'
-            },
-            'client_interaction': {
-                'objective': 'Demonstrate effective lawyer-client communication and practical advice',
-                'question_format': 'Present a client communication scenario requiring professional guidance',
-                'answer_approach': 'Balance legal accuracy with client-friendly explanations and next steps',
-                'focus': 'Real-world client communication and relationship management',
-                'example_context': 'A client asks for practical guidance on how to proceed with a matter'
-            },
-            'statutory_interpretation': {
-                'objective': 'Explain and apply specific statutory provisions',
-                'question_format': 'Ask about the meaning, application, or implications of a statute',
-                'answer_approach': 'Systematically explain the statute with case law showing its interpretation',
-                'focus': 'Understanding and applying legislation',
-                'example_context': 'Someone needs to understand what a statutory provision means and how it applies'
-            },
-            'legal_dialogue': {
-                'objective': 'Conduct multi-turn legal conversations demonstrating reasoning through dialogue',
-                'question_format': 'Present a conversational exchange about a legal topic or scenario',
-                'answer_approach': 'Use dialogue format (Q&A, discussion, debate) showing reasoning development',
-                'focus': 'Conversational AI with dialectical legal reasoning',
-                'example_context': 'A conversation between lawyer and client, or between opposing counsel discussing legal points'
-            },
-            'pure_conceptual': {
-                'objective': 'Provide factual legal knowledge without analytical reasoning (textbook-style)',
-                'question_format': 'Ask for definition, explanation, or description of legal concepts',
-                'answer_approach': 'Present clear, encyclopedic knowledge without case analysis or reasoning',
-                'focus': 'Knowledge retention and factual accuracy',
-                'example_context': 'A reference question asking what a legal term means or how a law developed historically'
-            },
-            'comparative_analysis': {
-                'objective': 'Compare different legal approaches, jurisdictions, or doctrines',
-                'question_format': 'Ask for comparison between legal systems, approaches, or concepts',
-                'answer_approach': 'Systematically compare and contrast with similarities and differences',
-                'focus': 'Critical thinking and analytical reasoning across legal systems',
-                'example_context': 'Someone wants to understand how different jurisdictions or doctrines differ'
-            },
-            'ethical_reasoning': {
-                'objective': 'Analyze ethical dilemmas and professional responsibility issues',
-                'question_format': 'Present an ethical scenario requiring moral and professional judgment',
-                'answer_approach': 'Apply ethical frameworks and professional conduct rules to the dilemma',
-                'focus': 'Moral reasoning within legal professional contexts',
-                'example_context': 'A lawyer faces an ethical dilemma requiring professional judgment'
-            },
-            'procedural_guide': {
-                'objective': 'Provide step-by-step procedural instructions for legal processes',
-                'question_format': 'Ask how to complete a specific legal procedure or process',
-                'answer_approach': 'Present sequential, actionable steps in chronological order',
-                'focus': 'Practical procedural knowledge and execution',
-                'example_context': 'Someone needs to know the exact steps to follow for a legal procedure'
-            },
-            'legal_news_analysis': {
-                'objective': 'Analyze recent legal developments and their implications',
-                'question_format': 'Present a recent court decision, legislation, or regulatory change',
-                'answer_approach': 'Analyze the development, its legal basis, and practical implications',
-                'focus': 'Current legal affairs and forward-looking analysis',
-                'example_context': 'A recent Supreme Court ruling or new legislation has been announced'
-            },
-            'case_study': {
-                'objective': 'Provide comprehensive analysis of landmark cases',
-                'question_format': 'Ask for in-depth analysis of a significant legal case',
-                'answer_approach': 'Thoroughly examine facts, legal issues, reasoning, and broader implications',
-                'focus': 'Deep legal learning through case examination',
-                'example_context': 'A landmark case needs detailed analysis for educational purposes'
-            },
-            'practical_application': {
-                'objective': 'Address real-world legal scenarios in specific practice domains',
-                'question_format': 'Present practical scenarios in immigration, criminal, family law, etc.',
-                'answer_approach': 'Provide actionable legal guidance tailored to the specific domain',
-                'focus': 'Domain-specific practical legal problem-solving',
-                'example_context': 'A client needs practical guidance in immigration, criminal defense, or family matters'
-            },
-            'simple_qa': {
-                'objective': 'Provide direct, concise answers to straightforward legal questions',
-                'question_format': 'Ask a simple, direct question requiring a factual answer',
-                'answer_approach': 'Give a clear, concise answer without complex structure',
-                'focus': 'Quick factual knowledge and simple explanations',
-                'example_context': 'Someone needs a quick factual answer or brief explanation'
-            },
-            'general_reasoning': {
-                'objective': 'Explain legal principles and reasoning without rigid structure',
-                'question_format': 'Ask about legal concepts, reasoning, or principles',
-                'answer_approach': 'Provide flexible, thoughtful reasoning without mandatory format',
-                'focus': 'Natural legal reasoning and explanation',
-                'example_context': 'Someone wants to understand the reasoning behind a legal principle'
-            },
-            'hypothetical': {
-                'objective': 'Analyze brief hypothetical scenarios concisely',
-                'question_format': 'Present a short "what if" legal scenario',
-                'answer_approach': 'Provide concise analysis without extensive structure',
-                'focus': 'Quick scenario analysis and legal thinking',
-                'example_context': 'Someone poses a hypothetical situation requiring quick legal analysis'
-            },
-            'conversational': {
-                'objective': 'Respond like a professional lawyer in natural conversation',
-                'question_format': 'Question requiring professional but conversational response',
-                'answer_approach': 'Sound like an experienced lawyer speaking naturally - professional yet approachable',
-                'focus': 'Professional legal voice in everyday conversation',
-                'example_context': 'Client or colleague asks a question in conversation'
-            }
-        }
-
-        return type_guidance.get(sample_type, type_guidance['case_analysis'])
-
-    def _get_answer_structure_guidance(self, sample_type: str) -> str:
-        """
-        Get answer structure guidance based on sample type.
-
-        Args:
-            sample_type: Type of sample
-
-        Returns:
-            Formatted string with structure guidance
-        """
-        structures = {
-            'case_analysis': """IRAC Methodology (MANDATORY)
+# Optional: Aho-Corasick finds every structure keyword in one pass over the answer
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Optional: RE2 matches the thinking/fence patterns in linear time (no backtracking)
+try:
+    import re2 as _re
+except ImportError:
+    _re = re
+
+logger = logging.getLogger(__name__)
+
+# Cross-provider fallback chain: each provider falls back to the next one (wrapping around);
+# providers outside the chain fall back to its first entry
+_FALLBACK_CHAIN = ('groq', 'cerebras')
+_NEXT_PROVIDER = {
+    provider: _FALLBACK_CHAIN[(i + 1) % len(_FALLBACK_CHAIN)]
+    for i, provider in enumerate(_FALLBACK_CHAIN)
+}
+
+# Sample types accepted for generation ('balance' must be resolved before generation)
+_SAMPLE_TYPE_NAMES = (
+    'case_analysis',
+    'educational',
+    'client_interaction',
+    'statutory_interpretation',
+    'legal_dialogue',
+    'pure_conceptual',
+    'comparative_analysis',
+    'ethical_reasoning',
+    'procedural_guide',
+    'legal_news_analysis',
+    'case_study',
+    'practical_application',
+    'simple_qa',
+    'general_reasoning',
+    'hypothetical',
+    'conversational'
+)
+_VALID_SAMPLE_TYPES = frozenset(_SAMPLE_TYPE_NAMES)
+_VALID_SAMPLE_TYPES_STR = ', '.join(_SAMPLE_TYPE_NAMES)
+
+# Question framing for each scenario pattern (case_analysis samples)
+_SCENARIO_GUIDANCE = {
+    "client_consultation": "Frame as a client's initial consultation question seeking legal guidance",
+    "procedural_tactical": "Frame as a question about specific procedural steps or tactical considerations",
+    "risk_assessment": "Frame as a request for risk assessment or commercial legal advice",
+    "dispute_resolution": "Frame as a question about dispute resolution options and strategies",
+    "compliance_preventive": "Frame as a compliance or preventive legal guidance question"
+}
+_SCENARIO_TEXTS = tuple(_SCENARIO_GUIDANCE[pattern] for pattern in SCENARIO_PATTERNS)
+
+# Fields every generated sample must contain
+_REQUIRED_FIELDS = frozenset(REQUIRED_FIELDS)
+
+# Reasoning step markers counted by quality validation
+_STEP_RE = re.compile(r'Step \d+:')
+
+# Thinking-model reasoning blocks stripped before JSON extraction
+_THINK_RE = _re.compile(r'<thinking>.*?</thinking>', _re.DOTALL)
+# Greedy DOTALL runs to the end of the text (RE2 has no \Z)
+_UNCLOSED_THINK_RE = _re.compile(r'<thinking>.*', _re.DOTALL)
+
+# Markdown code fence around the JSON (```json ... ``` or ``` ... ```)
+_JSON_FENCE_RE = _re.compile(r'```(?:json)?\s*\n?(.*?)```', _re.DOTALL)
+
+# Output budget for one request carrying several samples (kept within common model output limits)
+_MARSHALED_MAX_TOKENS = 16000
+
+# Locates the first complete JSON object in a response
+_JSON_DECODER = json.JSONDecoder()
+
+# Words counted by the answer substance check
+_WORD_RE = re.compile(r'\S+')
+_MIN_ANSWER_WORDS = 100
+
+# Minimum reasoning steps per difficulty (lower bound of reasoning_steps, e.g. '3-4' -> 3)
+_MIN_STEPS: Dict[str, int] = {
+    difficulty: int(spec['reasoning_steps'].split('-')[0])
+    for difficulty, spec in DIFFICULTY_SPECS.items()
+}
+
+# Prompt guidance for each sample type
+_TYPE_GUIDANCE = {
+    'case_analysis': {
+        'objective': 'Analyze a practical legal problem using case law and statutes',
+        'question_format': 'Present a realistic client scenario requiring legal analysis and advice',
+        'answer_approach': 'Apply IRAC methodology to analyze the legal issue and provide clear guidance',
+        'focus': 'Problem-solving with comprehensive legal reasoning',
+        'example_context': 'A client comes to you with a factual situation requiring legal assessment'
+    },
+    'educational': {
+        'objective': 'Explain legal principles, doctrines, and rules to teach foundational concepts',
+        'question_format': 'Ask a question about a legal concept, doctrine, or principle',
+        'answer_approach': 'Provide a clear, structured explanation with examples and case law support',
+        'focus': 'Teaching legal concepts with clarity and accuracy',
+        'example_context': 'A student or junior lawyer wants to understand a legal doctrine'
+    },
+    'client_interaction': {
+        'objective': 'Demonstrate effective lawyer-client communication and practical advice',
+        'question_format': 'Present a client communication scenario requiring professional guidance',
+        'answer_approach': 'Balance legal accuracy with client-friendly explanations and next steps',
+        'focus': 'Real-world client communication and relationship management',
+        'example_context': 'A client asks for practical guidance on how to proceed with a matter'
+    },
+    'statutory_interpretation': {
+        'objective': 'Explain and apply specific statutory provisions',
+        'question_format': 'Ask about the meaning, application, or implications of a statute',
+        'answer_approach': 'Systematically explain the statute with case law showing its interpretation',
+        'focus': 'Understanding and applying legislation',
+        'example_context': 'Someone needs to understand what a statutory provision means and how it applies'
+    },
+    'legal_dialogue': {
+        'objective': 'Conduct multi-turn legal conversations demonstrating reasoning through dialogue',
+        'question_format': 'Present a conversational exchange about a legal topic or scenario',
+        'answer_approach': 'Use dialogue format (Q&A, discussion, debate) showing reasoning development',
+        'focus': 'Conversational AI with dialectical legal reasoning',
+        'example_context': 'A conversation between lawyer and client, or between opposing counsel discussing legal points'
+    },
+    'pure_conceptual': {
+        'objective': 'Provide factual legal knowledge without analytical reasoning (textbook-style)',
+        'question_format': 'Ask for definition, explanation, or description of legal concepts',
+        'answer_approach': 'Present clear, encyclopedic knowledge without case analysis or reasoning',
+        'focus': 'Knowledge retention and factual accuracy',
+        'example_context': 'A reference question asking what a legal term means or how a law developed historically'
+    },
+    'comparative_analysis': {
+        'objective': 'Compare different legal approaches, jurisdictions, or doctrines',
+        'question_format': 'Ask for comparison between legal systems, approaches, or concepts',
+        'answer_approach': 'Systematically compare and contrast with similarities and differences',
+        'focus': 'Critical thinking and analytical reasoning across legal systems',
+        'example_context': 'Someone wants to understand how different jurisdictions or doctrines differ'
+    },
+    'ethical_reasoning': {
+        'objective': 'Analyze ethical dilemmas and professional responsibility issues',
+        'question_format': 'Present an ethical scenario requiring moral and professional judgment',
+        'answer_approach': 'Apply ethical frameworks and professional conduct rules to the dilemma',
+        'focus': 'Moral reasoning within legal professional contexts',
+        'example_context': 'A lawyer faces an ethical dilemma requiring professional judgment'
+    },
+    'procedural_guide': {
+        'objective': 'Provide step-by-step procedural instructions for legal processes',
+        'question_format': 'Ask how to complete a specific legal procedure or process',
+        'answer_approach': 'Present sequential, actionable steps in chronological order',
+        'focus': 'Practical procedural knowledge and execution',
+        'example_context': 'Someone needs to know the exact steps to follow for a legal procedure'
+    },
+    'legal_news_analysis': {
+        'objective': 'Analyze recent legal developments and their implications',
+        'question_format': 'Present a recent court decision, legislation, or regulatory change',
+        'answer_approach': 'Analyze the development, its legal basis, and practical implications',
+        'focus': 'Current legal affairs and forward-looking analysis',
+        'example_context': 'A recent Supreme Court ruling or new legislation has been announced'
+    },
+    'case_study': {
+        'objective': 'Provide comprehensive analysis of landmark cases',
+        'question_format': 'Ask for in-depth analysis of a significant legal case',
+        'answer_approach': 'Thoroughly examine facts, legal issues, reasoning, and broader implications',
+        'focus': 'Deep legal learning through case examination',
+        'example_context': 'A landmark case needs detailed analysis for educational purposes'
+    },
+    'practical_application': {
+        'objective': 'Address real-world legal scenarios in specific practice domains',
+        'question_format': 'Present practical scenarios in immigration, criminal, family law, etc.',
+        'answer_approach': 'Provide actionable legal guidance tailored to the specific domain',
+        'focus': 'Domain-specific practical legal problem-solving',
+        'example_context': 'A client needs practical guidance in immigration, criminal defense, or family matters'
+    },
+    'simple_qa': {
+        'objective': 'Provide direct, concise answers to straightforward legal questions',
+        'question_format': 'Ask a simple, direct question requiring a factual answer',
+        'answer_approach': 'Give a clear, concise answer without complex structure',
+        'focus': 'Quick factual knowledge and simple explanations',
+        'example_context': 'Someone needs a quick factual answer or brief explanation'
+    },
+    'general_reasoning': {
+        'objective': 'Explain legal principles and reasoning without rigid structure',
+        'question_format': 'Ask about legal concepts, reasoning, or principles',
+        'answer_approach': 'Provide flexible, thoughtful reasoning without mandatory format',
+        'focus': 'Natural legal reasoning and explanation',
+        'example_context': 'Someone wants to understand the reasoning behind a legal principle'
+    },
+    'hypothetical': {
+        'objective': 'Analyze brief hypothetical scenarios concisely',
+        'question_format': 'Present a short "what if" legal scenario',
+        'answer_approach': 'Provide concise analysis without extensive structure',
+        'focus': 'Quick scenario analysis and legal thinking',
+        'example_context': 'Someone poses a hypothetical situation requiring quick legal analysis'
+    },
+    'conversational': {
+        'objective': 'Respond like a professional lawyer in natural conversation',
+        'question_format': 'Question requiring professional but conversational response',
+        'answer_approach': 'Sound like an experienced lawyer speaking naturally - professional yet approachable',
+        'focus': 'Professional legal voice in everyday conversation',
+        'example_context': 'Client or colleague asks a question in conversation'
+    }
+}
+_DEFAULT_TYPE_GUIDANCE = _TYPE_GUIDANCE['case_analysis']
+
+# Answer structure instructions for each sample type
+_ANSWER_STRUCTURES = {
+    'case_analysis': """IRAC Methodology (MANDATORY)
    Your answer MUST follow this exact structure:
 
    │ ISSUE: Identify the core legal question/problem
@@ -174,7 +234,7 @@ class GenerationService:
    │ APPLICATION: Apply legal rules to the facts with step-by-step analysis
    │ CONCLUSION: Provide clear answer with legal justification""",
 
-            'educational': """Structured Explanation (MANDATORY)
+    'educational': """Structured Explanation (MANDATORY)
    Your answer should follow this teaching structure:
 
    │ DEFINITION: Clearly define the legal concept or doctrine
@@ -183,7 +243,7 @@ class GenerationService:
    │ EXAMPLES: Provide practical examples showing how it works
    │ DISTINCTIONS: Clarify common misconceptions or similar concepts""",
 
-            'client_interaction': """Client Communication Structure (MANDATORY)
+    'client_interaction': """Client Communication Structure (MANDATORY)
    Your answer should follow this practical structure:
 
    │ UNDERSTANDING: Acknowledge and clarify the client's situation
@@ -192,7 +252,7 @@ class GenerationService:
    │ RECOMMENDATION: Advise on best approach with reasoning
    │ NEXT STEPS: Provide clear, actionable next steps""",
 
-            'statutory_interpretation': """Statutory Analysis Structure (MANDATORY)
+    'statutory_interpretation': """Statutory Analysis Structure (MANDATORY)
    Your answer should follow this interpretive structure:
 
    │ STATUTORY TEXT: Quote the relevant statutory provision(s)
@@ -201,7 +261,7 @@ class GenerationService:
    │ CASE LAW: Show how courts have interpreted and applied the statute
    │ APPLICATION: Demonstrate how the statute applies in practice""",
 
-            'legal_dialogue': """Dialogue Format (MANDATORY)
+    'legal_dialogue': """Dialogue Format (MANDATORY)
    Your answer should follow this conversational structure:
 
    │ OPENING: Start the dialogue with initial question or statement
@@ -219,7 +279,7 @@ class GenerationService:
    Client: [follow-up]
    Lawyer: [deeper analysis]""",
 
-            'pure_conceptual': """Encyclopedic Knowledge Format (MANDATORY)
+    'pure_conceptual': """Encyclopedic Knowledge Format (MANDATORY)
    Your answer should follow this factual structure:
 
    │ CORE DEFINITION: Precise definition of the concept/term
@@ -230,7 +290,7 @@ class GenerationService:
 
    NOTE: NO reasoning steps needed - focus on factual knowledge only""",
 
-            'comparative_analysis': """Comparative Structure (MANDATORY)
+    'comparative_analysis': """Comparative Structure (MANDATORY)
    Your answer should follow this comparative framework:
 
    │ INTRODUCTION: State what is being compared and why
@@ -241,7 +301,7 @@ class GenerationService:
    │ ANALYSIS: Evaluate strengths and weaknesses of each
    │ CONCLUSION: Synthesize insights from comparison""",
 
-            'ethical_reasoning': """Ethical Analysis Structure (MANDATORY)
+    'ethical_reasoning': """Ethical Analysis Structure (MANDATORY)
    Your answer should follow this ethical reasoning framework:
 
    │ ETHICAL DILEMMA: Identify the core ethical conflict
@@ -251,7 +311,7 @@ class GenerationService:
    │ PRACTICAL CONSIDERATIONS: Assess real-world implications
    │ RESOLUTION: Recommend course of action with moral justification""",
 
-            'procedural_guide': """Step-by-Step Procedural Format (MANDATORY)
+    'procedural_guide': """Step-by-Step Procedural Format (MANDATORY)
    Your answer should follow this sequential structure:
 
    │ OVERVIEW: Brief summary of the procedure and its purpose
@@ -265,7 +325,7 @@ class GenerationService:
 
    Each step should be actionable and specific""",
 
-            'legal_news_analysis': """Legal News Analysis Format (MANDATORY)
+    'legal_news_analysis': """Legal News Analysis Format (MANDATORY)
    Your answer should follow this current affairs structure:
 
    │ THE DEVELOPMENT: Describe the recent legal development (case, legislation, regulation)
@@ -277,7 +337,7 @@ class GenerationService:
 
    Focus on contemporary relevance and practical impact""",
 
-            'case_study': """Case Study Format (MANDATORY)
+    'case_study': """Case Study Format (MANDATORY)
    Your answer should follow this comprehensive analytical structure:
 
    │ CASE OVERVIEW: Name, citation, court, date, and significance
@@ -290,7 +350,7 @@ class GenerationService:
 
    Provide comprehensive educational analysis""",
 
-            'practical_application': """Practical Application Format (MANDATORY)
+    'practical_application': """Practical Application Format (MANDATORY)
    Your answer should follow this domain-specific structure:
 
    │ SCENARIO ASSESSMENT: Understand the specific domain context
@@ -303,7 +363,7 @@ class GenerationService:
 
    Tailor advice to the specific legal domain""",
 
-            'simple_qa': """Simple Q&A Format (NO COMPLEX STRUCTURE REQUIRED)
+    'simple_qa': """Simple Q&A Format (NO COMPLEX STRUCTURE REQUIRED)
    Your answer should be:
 
    │ Direct and concise (2-4 sentences maximum)
@@ -315,7 +375,7 @@ class GenerationService:
    ⚠️  CRITICAL: This is a SIMPLE Q&A - do NOT write a complex legal analysis!
    Keep it straightforward like answering a quick question - no essays!""",
 
-            'general_reasoning': """General Reasoning Format (FLEXIBLE STRUCTURE)
+    'general_reasoning': """General Reasoning Format (FLEXIBLE STRUCTURE)
    Your answer should naturally explain the reasoning:
 
    │ Start with the core principle or concept
@@ -325,7 +385,7 @@ class GenerationService:
 
    No rigid structure - write naturally and clearly""",
 
-            'hypothetical': """Hypothetical Format (BRIEF AND CONCISE)
+    'hypothetical': """Hypothetical Format (BRIEF AND CONCISE)
    Your answer should:
 
    │ Quickly identify the legal issue
@@ -335,7 +395,7 @@ class GenerationService:
 
    Keep it short and to the point - this is a quick analysis""",
 
-            'conversational': """Professional Legal Conversation (LAWYER VOICE)
+    'conversational': """Professional Legal Conversation (LAWYER VOICE)
    Your answer should sound like a professional lawyer speaking naturally:
 
    │ Professional but approachable tone
@@ -345,9 +405,312 @@ class GenerationService:
    │ Reference law casually when relevant
 
    Write how an experienced lawyer would explain something in conversation - professional, clear, authoritative yet natural!"""
-        }
+}
+_DEFAULT_ANSWER_STRUCTURE = _ANSWER_STRUCTURES['case_analysis']
+
+# Few-shot example for simple_qa samples (whole examples section)
+_FEW_SHOT_SIMPLE_QA = """
+╔══════════════════════════════════════════════════════════════╗
+║ SIMPLE Q&A EXAMPLES (Keep it this brief!)                   ║
+╚══════════════════════════════════════════════════════════════╝
+
+EXAMPLE (Simple Q&A):
+{
+    "question": "What is the limitation period for breach of contract claims in England?",
+    "answer": "Under the Limitation Act 1980, the limitation period for breach of contract claims is six years from the date of the breach. This applies to simple contracts. For contracts made by deed, the period is 12 years.",
+    "reasoning": "The Limitation Act 1980 sets statutory time limits for bringing claims. For contract breaches, the six-year period starts when the breach occurs, giving claimants a reasonable window to pursue remedies while ensuring defendants aren't exposed to indefinite liability."
+}"""
+
+# Few-shot example shown to structured sample types
+_FEW_SHOT_CASE_ANALYSIS = """EXAMPLE 1 (Basic Difficulty):
+{
+    "id": "example_001",
+    "question": "A homeowner agreed verbally to sell their property to a buyer for £300,000. The buyer paid a £5,000 deposit. Is this contract enforceable under UK law?",
+    "answer": "**ISSUE**: Whether a verbal agreement for the sale of land is enforceable under UK law. **RULE**: Under Section 2 of the Law of Property (Miscellaneous Provisions) Act 1989, contracts for the sale of land must be in writing and signed by both parties. A verbal agreement, regardless of deposit payment, cannot satisfy the statutory formality requirements. The seminal case *McCausland v Duncan Lawrie Ltd* [1997] 1 WLR 38 confirms that Section 2 renders oral land contracts void, not merely unenforceable. **APPLICATION**: In this scenario, the homeowner and buyer entered a verbal agreement for property sale at £300,000. Despite the buyer paying a £5,000 deposit (demonstrating intention and part performance), the absence of a written contract signed by both parties means the agreement fails to meet Section 2 requirements. The court in *McCausland* held that no doctrine of part performance can overcome the statutory writing requirement. The deposit payment, while evidencing serious intent, cannot cure the fundamental defect. **CONCLUSION**: The verbal contract is void and unenforceable. The buyer may be entitled to recover the £5,000 deposit under principles of unjust enrichment, but cannot compel the sale. The homeowner is not bound to complete the transaction. To create an enforceable contract, the parties must execute a written agreement signed by both, incorporating all agreed terms.",
+    "topic": "Property Law - Contract Formation",
+    "difficulty": "basic",
+    "case_citation": "Law of Property (Miscellaneous Provisions) Act 1989, Section 2; McCausland v Duncan Lawrie Ltd [1997] 1 WLR 38",
+    "reasoning": "Step 1: Identify the governing statute - Section 2 of the Law of Property (Miscellaneous Provisions) Act 1989 requires written contracts for land sales → verbal agreements are insufficient. Step 2: Apply *McCausland v Duncan Lawrie Ltd* [1997] 1 WLR 38 - court held Section 2 renders oral contracts void, not voidable → formality requirement is absolute. Step 3: Assess deposit payment significance - while showing intent, deposit cannot satisfy writing requirement → part performance doctrine abolished by Section 2. Step 4: Determine enforceability - absence of written signed contract means agreement is void → neither party can enforce specific performance. Step 5: Consider buyer's remedies - buyer may recover deposit under unjust enrichment principles → restitution available but not contract enforcement.",
+    "sample_type": "case_analysis"
+}"""
+
+# Self-validation checklist line and reasoning guidance per sample type
+_STRUCTURE_VALIDATION: Dict[str, Tuple[str, str]] = {
+    'case_analysis': (
+        "☐ 2. IRAC structure: Answer follows Issue → Rule → Application → Conclusion",
+        "Demonstrate IRAC progression through steps"
+    ),
+    'educational': (
+        "☐ 2. Educational structure: Answer follows Definition → Legal Basis → Key Elements → Examples → Distinctions",
+        "Show progression from definition to practical application"
+    ),
+    'client_interaction': (
+        "☐ 2. Client communication structure: Answer follows Understanding → Legal Position → Options → Recommendation → Next Steps",
+        "Show client-focused reasoning from understanding to action"
+    ),
+    'statutory_interpretation': (
+        "☐ 2. Statutory analysis structure: Answer follows Statutory Text → Purpose → Interpretation → Case Law → Application",
+        "Show progression from statutory text to practical application"
+    ),
+    'legal_dialogue': (
+        "☐ 2. Dialogue structure: Answer uses conversational format with Opening → Exchange → Follow-up → Resolution",
+        "Show reasoning development through multi-turn dialogue"
+    ),
+    'pure_conceptual': (
+        "☐ 2. Encyclopedic structure: Answer follows Core Definition → Historical Context → Statutory Basis → Key Features → Scope",
+        "Present factual knowledge systematically (NO reasoning steps needed)"
+    ),
+    'comparative_analysis': (
+        "☐ 2. Comparative structure: Answer follows Introduction → Approach A → Approach B → Similarities → Differences → Analysis → Conclusion",
+        "Show comparative reasoning across jurisdictions or doctrines"
+    ),
+    'ethical_reasoning': (
+        "☐ 2. Ethical analysis structure: Answer follows Ethical Dilemma → Professional Duties → Competing Values → Frameworks → Resolution",
+        "Show moral reasoning through ethical frameworks"
+    ),
+    'procedural_guide': (
+        "☐ 2. Procedural structure: Answer follows Overview → Prerequisites → Step-by-step instructions → Important Notes",
+        "Show sequential procedural progression"
+    ),
+    'legal_news_analysis': (
+        "☐ 2. Legal news structure: Answer follows The Development → Background → Key Changes → Legal Reasoning → Implications → Future Outlook",
+        "Show analysis of contemporary legal developments"
+    ),
+    'case_study': (
+        "☐ 2. Case study structure: Answer follows Case Overview → Facts → Legal Issues → Court's Reasoning → Judgment → Broader Implications → Subsequent Treatment",
+        "Show comprehensive case analysis for legal learning"
+    ),
+    'practical_application': (
+        "☐ 2. Practical application structure: Answer follows Scenario Assessment → Applicable Law → Practical Analysis → Options → Recommended Approach → Procedural Steps → Risks",
+        "Show domain-specific practical problem-solving"
+    ),
+    'simple_qa': (
+        "☐ 2. Simple Q&A: Answer is direct and concise (no complex structure required)",
+        "Provide clear, straightforward answer"
+    ),
+    'general_reasoning': (
+        "☐ 2. General reasoning: Answer naturally explains the reasoning (flexible structure)",
+        "Explain reasoning naturally without rigid format"
+    ),
+    'hypothetical': (
+        "☐ 2. Hypothetical: Answer is brief and to the point (concise analysis)",
+        "Provide quick, focused analysis"
+    ),
+    'conversational': (
+        "☐ 2. Conversational: Answer sounds like a professional lawyer speaking naturally (no formal structure)",
+        "Sound professional yet natural in conversation"
+    )
+}
+_DEFAULT_STRUCTURE_VALIDATION = (
+    "☐ 2. Answer structure: Follow the specified format for this sample type",
+    "Demonstrate logical progression through steps"
+)
+
+# Required structure keywords for each sample type (matched against the upper-cased answer)
+_STRUCTURE_REQUIREMENTS = {
+    'case_analysis': {
+        'keywords': ['ISSUE', 'RULE', 'APPLICATION', 'CONCLUSION'],
+        'min_required': 3  # Must have at least 3 of 4 sections (some flexibility)
+    },
+    'educational': {
+        'keywords': ['DEFINITION', 'LEGAL BASIS', 'KEY ELEMENTS', 'EXAMPLES'],
+        'min_required': 3
+    },
+    'client_interaction': {
+        'keywords': ['UNDERSTANDING', 'LEGAL POSITION', 'OPTIONS', 'RECOMMENDATION'],
+        'min_required': 3
+    },
+    'statutory_interpretation': {
+        'keywords': ['STATUTORY TEXT', 'PURPOSE', 'INTERPRETATION', 'APPLICATION'],
+        'min_required': 3
+    },
+    'legal_dialogue': {
+        # More flexible - check for dialogue indicators
+        'keywords': ['LAWYER:', 'CLIENT:', 'COUNSEL:', 'JUDGE:', 'Q:', 'A:'],
+        'min_required': 2  # Must have at least 2 speakers/turns
+    },
+    'pure_conceptual': {
+        # Factual knowledge structure
+        'keywords': ['DEFINITION', 'HISTORICAL', 'BASIS', 'FEATURES', 'SCOPE'],
+        'min_required': 3  # More lenient for factual content
+    },
+    'comparative_analysis': {
+        # Comparison structure
+        'keywords': ['INTRODUCTION', 'APPROACH', 'SIMILARITIES', 'DIFFERENCES', 'ANALYSIS'],
+        'min_required': 3
+    },
+    'ethical_reasoning': {
+        # Ethical analysis structure
+        'keywords': ['DILEMMA', 'DUTIES', 'VALUES', 'FRAMEWORK', 'RESOLUTION'],
+        'min_required': 3
+    },
+    'procedural_guide': {
+        # Step-by-step procedural structure
+        'keywords': ['OVERVIEW', 'STEP', 'PREREQUISITES', 'PROCEDURE', 'NOTES'],
+        'min_required': 2  # Must have overview and steps
+    },
+    'legal_news_analysis': {
+        # Legal news and developments structure
+        'keywords': ['DEVELOPMENT', 'BACKGROUND', 'CHANGES', 'REASONING', 'IMPLICATIONS', 'OUTLOOK'],
+        'min_required': 3
+    },
+    'case_study': {
+        # Case study structure
+        'keywords': ['OVERVIEW', 'FACTS', 'ISSUES', 'REASONING', 'JUDGMENT', 'IMPLICATIONS'],
+        'min_required': 4  # More comprehensive analysis required
+    },
+    'practical_application': {
+        # Practical domain-specific structure
+        'keywords': ['ASSESSMENT', 'APPLICABLE', 'ANALYSIS', 'OPTIONS', 'APPROACH', 'STEPS', 'RISKS'],
+        'min_required': 3
+    },
+    'simple_qa': {
+        # Simple Q&A - no structure required
+        'keywords': [],  # No mandatory keywords
+        'min_required': 0
+    },
+    'general_reasoning': {
+        # General reasoning - flexible
+        'keywords': [],
+        'min_required': 0
+    },
+    'hypothetical': {
+        # Hypothetical - flexible
+        'keywords': [],
+        'min_required': 0
+    },
+    'conversational': {
+        # Conversational - no structure required
+        'keywords': [],
+        'min_required': 0
+    }
+}
+
+
+def _build_structure_automaton(keywords: List[str]):
+    """Build an Aho-Corasick automaton whose values are keyword indexes."""
+    automaton = ahocorasick.Automaton()
+    for index, keyword in enumerate(keywords):
+        automaton.add_word(keyword, index)
+    automaton.make_automaton()
+    return automaton
+
+
+def _make_structure_validator(sample_type: str, requirements: Dict) -> Callable[[str], Optional[str]]:
+    """
+    Build the answer structure validator for one sample type.
+
+    The keyword list, threshold and (when pyahocorasick is installed) the
+    keyword automaton are captured once at import.
+    """
+    required_keywords = requirements['keywords']
+    min_required = requirements['min_required']
+
+    if min_required == 0:
+        # No mandatory structure for this type
+        return lambda answer: None
+
+    automaton = _build_structure_automaton(required_keywords) if ahocorasick is not None else None
+
+    def validate(answer: str) -> Optional[str]:
+        # Case-insensitive check
+        answer_upper = answer.upper()
+
+        # Record each keyword found as a bit, so missing keywords come from the
+        # same scan instead of a second pass over the answer
+        found_mask = 0
+        if automaton is not None:
+            # Single pass over the answer for all keywords
+            for _, index in automaton.iter(answer_upper):
+                found_mask |= 1 << index
+        else:
+            found_count = 0
+            for index, kw in enumerate(required_keywords):
+                if kw in answer_upper:
+                    found_count += 1
+                    if found_count >= min_required:
+                        # Enough sections present - skip scanning for the rest
+                        return None
+                    found_mask |= 1 << index
+
+        found_count = bin(found_mask).count('1')
+        if found_count < min_required:
+            missing_keywords = [kw for i, kw in enumerate(required_keywords) if not found_mask >> i & 1]
+            return (f"Answer structure does not match sample_type '{sample_type}'. "
+                    f"Found {found_count}/{len(required_keywords)} required sections. "
+                    f"Missing: {', '.join(missing_keywords[:2])}")  # Show first 2 missing
+
+        # Validation passed
+        return None
+
+    return validate
+
+
+# Answer structure validator per sample type
+_VALIDATORS: Dict[str, Callable[[str], Optional[str]]] = {
+    sample_type: _make_structure_validator(sample_type, requirements)
+    for sample_type, requirements in _STRUCTURE_REQUIREMENTS.items()
+}
+
+
+class GenerationService:
+    """
+    Service for generating legal training samples.
+    Handles provider coordination, model fallback, and error recovery.
+    """
+
+    # Class-level shared state (persists across all instances)
+    _fallback_orders: Dict[str, Tuple[str, ...]] = {}  # provider -> model fallback order
+
+    def __init__(self):
+        """Initialize generation service with provider factory."""
+        self.factory = LLMProviderFactory()
+
+    def _get_fallback_order(self, provider: str) -> Tuple[str, ...]:
+        """
+        Get a provider's model fallback order, built once per provider.
 
-        return structures.get(sample_type, structures['case_analysis'])
+        The order is a class constant on the provider, so failover lookups
+        reuse it instead of building a provider instance (and querying the
+        database) on every failed model.
+
+        Args:
+            provider: Provider ID
+
+        Returns:
+            Tuple of model IDs in fallback order
+        """
+        fallback_order = GenerationService._fallback_orders.get(provider)
+        if fallback_order is None:
+            fallback_order = self.factory.get_provider(provider).get_fallback_order()
+            GenerationService._fallback_orders[provider] = fallback_order
+        return fallback_order
+
+    @staticmethod
+    def _get_sample_type_guidance(sample_type: str) -> Dict[str, str]:
+        """
+        Get specific guidance for different sample types.
+
+        Args:
+            sample_type: Type of sample to generate
+
+        Returns:
+            Dictionary with type-specific guidance
+        """
+        return _TYPE_GUIDANCE.get(sample_type, _DEFAULT_TYPE_GUIDANCE)
+
+    @staticmethod
+    def _get_answer_structure_guidance(sample_type: str) -> str:
+        """
+        Get answer structure guidance based on sample type.
+
+        Args:
+            sample_type: Type of sample
+
+        Returns:
+            Formatted string with structure guidance
+        """
+        return _ANSWER_STRUCTURES.get(sample_type, _DEFAULT_ANSWER_STRUCTURE)
 
     def generate_single_sample(
         self,
@@ -359,7 +722,10 @@ class GenerationService:
         model: Optional[str] = None,
         reasoning_instruction: Optional[str] = None,
         batch_id: Optional[str] = None,
-        sample_type: str = 'case_analysis'
+        sample_type: str = 'case_analysis',
+        allow_cached: bool = True,
+        created_at: Optional[str] = None,
+        include_few_shot: bool = True
     ) -> Tuple[Optional[Dict], int, float, Optional[str]]:
         """
         Generate a single legal Q&A sample using specified LLM provider.
@@ -374,137 +740,484 @@ class GenerationService:
             reasoning_instruction: Optional custom reasoning requirements
             batch_id: Optional batch identifier
             sample_type: Type of sample (case_analysis, educational, client_interaction, statutory_interpretation)
+            allow_cached: Reuse a cached response for this request and counter
+                          (only when LLM_CACHE_BACKEND is configured)
+            created_at: Optional ISO timestamp for created_at/updated_at
+                        (defaults to the time the sample is built)
+            include_few_shot: Include the few-shot example in the prompt
 
         Returns:
             Tuple of (sample_dict, tokens_used, elapsed_time, error_message)
         """
+        request, error = self._prepare_request(
+            practice_area, topic, difficulty, provider, model, reasoning_instruction, sample_type, include_few_shot
+        )
+        if error:
+            return None, 0, 0, error
+
+        try:
+            start_time = time.time()
+
+            # Development response cache (counter keeps samples from one request distinct)
+            cache = get_llm_cache() if allow_cached else None
+            cache_key = cache.make_key(provider, request, counter) if cache else None
+            result = cache.get(cache_key) if cache else None
+            from_cache = result is not None
+
+            if not from_cache:
+                # Get provider instance
+                provider_instance = self.factory.get_provider(provider)
+
+                # Generate using provider
+                result = provider_instance.generate(**request)
+
+            generated = self._build_sample(
+                result, provider, request['model'], difficulty, sample_type, batch_id, start_time, created_at
+            )
+
+            # Only cache responses that passed validation, so a retry after a
+            # rejected sample goes back to the provider
+            if cache and not from_cache and generated[0] is not None:
+                cache.set(cache_key, result)
+
+            return generated
+
+        except Exception as e:
+            return self._generation_error(e, provider)
+
+    async def generate_single_sample_async(
+        self,
+        practice_area: str,
+        topic: str,
+        difficulty: str,
+        counter: int,
+        provider: str = 'groq',
+        model: Optional[str] = None,
+        reasoning_instruction: Optional[str] = None,
+        batch_id: Optional[str] = None,
+        sample_type: str = 'case_analysis',
+        allow_cached: bool = True,
+        created_at: Optional[str] = None,
+        include_few_shot: bool = True,
+        *,
+        provider_instance: BaseLLMProvider
+    ) -> Tuple[Optional[Dict], int, float, Optional[str]]:
+        """
+        Async variant of generate_single_sample for event-loop batch workers.
+
+        Same arguments and return value; the provider call is awaited via
+        BaseLLMProvider.generate_async so many batches can share one loop.
+        provider_instance is resolved by the caller (once per batch, provider
+        switch or generate_batch call): a database lookup here would run
+        concurrently with other samples on the caller's scoped session.
+        """
+        request, error = self._prepare_request(
+            practice_area, topic, difficulty, provider, model, reasoning_instruction, sample_type, include_few_shot
+        )
+        if error:
+            return None, 0, 0, error
+
+        try:
+            start_time = time.time()
+
+            # Development response cache (counter keeps samples from one request distinct)
+            cache = get_llm_cache() if allow_cached else None
+            cache_key = cache.make_key(provider, request, counter) if cache else None
+            result = await asyncio.to_thread(cache.get, cache_key) if cache else None
+            from_cache = result is not None
+
+            if not from_cache:
+                # Generate using provider
+                result = await provider_instance.generate_async(**request)
+
+            generated = self._build_sample(
+                result, provider, request['model'], difficulty, sample_type, batch_id, start_time, created_at
+            )
+
+            # Only cache responses that passed validation, so a retry after a
+            # rejected sample goes back to the provider
+            if cache and not from_cache and generated[0] is not None:
+                await asyncio.to_thread(cache.set, cache_key, result)
+
+            return generated
+
+        except Exception as e:
+            return self._generation_error(e, provider)
+
+    async def generate_batch(
+        self,
+        specs: List[Dict],
+        concurrency: int = 16,
+        few_shot_samples: int = 50,
+        few_shot_offset: int = 0,
+        bucket: Optional[TokenBucket] = None,
+        samples_per_request: int = 1
+    ) -> List[Tuple[Optional[Dict], int, float, Optional[str]]]:
+        """
+        Generate several samples concurrently.
+
+        Specs without a provider_instance get one resolved here, once per
+        provider and before any call is fanned out, so no worker thread
+        queries the database on the caller's session concurrently.
+
+        Args:
+            specs: Keyword arguments for generate_single_sample_async, one dict per sample
+            concurrency: Maximum provider calls in flight (keep within the provider's rate limit)
+            few_shot_samples: Specs that keep the few-shot example in their prompt; later
+                              specs omit it to save input tokens (unless they set include_few_shot)
+            few_shot_offset: Samples of the same batch already generated by earlier calls, so
+                             the few_shot_samples warm-up counts across a whole batch
+            bucket: Optional shared rate limiter (BatchService._get_rate_bucket); every provider
+                    call takes one token, so concurrent batches on the same provider
+                    stay within its rate limit together
+            samples_per_request: Pack up to this many specs sharing provider, model, sample
+                                 type, difficulty and batch into one provider call (see
+                                 generate_marshaled_async); 1 sends one call per spec
+
+        Returns:
+            One (sample_dict, tokens_used, elapsed_time, error_message) tuple per spec, in order
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        # One timestamp for the whole batch instead of one datetime.now() per sample
+        created_at = datetime.now().isoformat()
+
+        # Resolve missing provider instances one at a time (DB lookup + key decryption)
+        instances: Dict[str, BaseLLMProvider] = {}
+        resolve_errors: Dict[str, Tuple] = {}
+        for spec in specs:
+            provider = spec.get('provider', 'groq')
+            if spec.get('provider_instance') is None and provider not in instances and provider not in resolve_errors:
+                try:
+                    instances[provider] = await asyncio.to_thread(self.factory.get_provider, provider)
+                except Exception as e:
+                    resolve_errors[provider] = self._generation_error(e, provider)
+
+        def with_defaults(index: int) -> Dict:
+            defaults = {'created_at': created_at, 'include_few_shot': few_shot_offset + index < few_shot_samples}
+            kwargs = {**defaults, **specs[index]}
+            if kwargs.get('provider_instance') is None:
+                kwargs['provider_instance'] = instances[kwargs.get('provider', 'groq')]
+            return kwargs
+
+        async def generate_group(indices: List[int]):
+            error = resolve_errors.get(specs[indices[0]].get('provider', 'groq'))
+            if error and specs[indices[0]].get('provider_instance') is None:
+                return [error] * len(indices)
+            async with semaphore:
+                if bucket is not None:
+                    wait = bucket.take(1)
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                if len(indices) == 1:
+                    return [await self.generate_single_sample_async(**with_defaults(indices[0]))]
+                return await self.generate_marshaled_async([with_defaults(index) for index in indices])
+
+        groups = self._group_specs(specs, samples_per_request)
+        group_results = await asyncio.gather(
+            *(generate_group(indices) for indices in groups),
+            return_exceptions=True
+        )
+
+        # Failures are normally returned as error tuples; convert anything that escaped
+        results: List[Optional[Tuple]] = [None] * len(specs)
+        for indices, group_result in zip(groups, group_results):
+            for position, index in enumerate(indices):
+                if isinstance(group_result, Exception):
+                    results[index] = self._generation_error(group_result, specs[index].get('provider', 'groq'))
+                else:
+                    results[index] = group_result[position]
+        return results
+
+    @staticmethod
+    def _group_specs(specs: List[Dict], samples_per_request: int) -> List[List[int]]:
+        """
+        Group spec indices into provider calls.
+
+        Specs are packed together only when they share provider, model,
+        sample type, difficulty and batch (so they share one cached system
+        prompt) and the provider accepts a multi-sample response; everything
+        else gets a call of its own.
+
+        Returns:
+            Lists of spec indices, one list per provider call
+        """
+        if samples_per_request <= 1:
+            return [[index] for index in range(len(specs))]
+
+        groups: List[List[int]] = []
+        open_groups: Dict[Tuple, List[int]] = {}
+        for index, spec in enumerate(specs):
+            provider = spec.get('provider', 'groq')
+            model = spec.get('model') or PROVIDERS.get(provider, {}).get('default_model')
+            if not GenerationService._supports_marshaling(provider, model):
+                groups.append([index])
+                continue
+
+            key = (provider, model, spec.get('sample_type', 'case_analysis'), spec['difficulty'], spec.get('batch_id'))
+            group = open_groups.get(key)
+            if group is None or len(group) >= samples_per_request:
+                group = open_groups[key] = []
+                groups.append(group)
+            group.append(index)
+        return groups
+
+    @staticmethod
+    def _supports_marshaling(provider: str, model: Optional[str]) -> bool:
+        """
+        Check whether a provider/model can return several samples in one response.
+
+        Gemini and Cerebras instruct models are constrained to a single-sample
+        JSON schema, so they cannot return a list of samples.
+        """
+        if provider == 'google':
+            return False
+        if provider == 'cerebras':
+            return model in THINKING_MODELS
+        return True
+
+    async def generate_marshaled_async(self, specs: List[Dict]) -> List[Tuple[Optional[Dict], int, float, Optional[str]]]:
+        """
+        Generate several samples with one provider call.
+
+        All specs must share provider, model, sample_type, difficulty and
+        batch_id (see _group_specs); the call uses the first spec's
+        provider_instance. The prompt reuses their shared cached
+        system prompt and lists one line per sample; the response is a
+        {"samples": [...]} object that is split and validated per sample.
+        Each line carries a sample_index the model echoes back, and results
+        are matched on it rather than on position. Responses are not stored
+        in the development cache.
+
+        Args:
+            specs: Keyword arguments for generate_single_sample_async, one dict per sample
+
+        Returns:
+            One (sample_dict, tokens_used, elapsed_time, error_message) tuple per spec, in order;
+            the call's tokens_used is reported once, on the first successful sample
+        """
+        first = specs[0]
+        provider = first.get('provider', 'groq')
+        difficulty = first['difficulty']
+        sample_type = first.get('sample_type', 'case_analysis')
+
+        request, error = self._prepare_request(
+            first['practice_area'], first['topic'], difficulty, provider, first.get('model'),
+            None, sample_type, first.get('include_few_shot', True)
+        )
+        if error:
+            return [(None, 0, 0, error)] * len(specs)
+
+        # Same system prompt and sampling params, multi-sample task and a larger output budget
+        request['prompt'] = self._build_marshaled_prompt(specs, sample_type, difficulty)
+        request['max_tokens'] = min(request['max_tokens'] * len(specs), _MARSHALED_MAX_TOKENS)
+
+        try:
+            start_time = time.time()
+            result = await first['provider_instance'].generate_async(**request)
+
+            response_text = self._extract_json(result['text'])
+            if not response_text:
+                raise ValueError("Empty response after JSON extraction")
+            parsed = loads(response_text)
+        except Exception as e:
+            return [self._generation_error(e, provider)] * len(specs)
+
+        if isinstance(parsed, dict):
+            items = parsed.get('samples', [parsed])
+        else:
+            items = parsed if isinstance(parsed, list) else []
+        items_by_index = {}
+        for item in items:
+            if isinstance(item, dict):
+                try:
+                    items_by_index.setdefault(int(item.pop('sample_index')), item)
+                except (KeyError, TypeError, ValueError):
+                    continue
+
+        tokens_unreported = result['tokens_used']
+        results = []
+        for number, spec in enumerate(specs, 1):
+            try:
+                item = items_by_index.get(number)
+                if item is None:
+                    raise ValueError(f"Response held no sample with sample_index {number}")
+                generated = self._finish_sample(
+                    item, tokens_unreported, provider, request['model'], difficulty,
+                    sample_type, spec.get('batch_id'), start_time, spec.get('created_at')
+                )
+                if generated[0] is not None:
+                    tokens_unreported = 0
+                results.append(generated)
+            except Exception as e:
+                results.append(self._generation_error(e, provider))
+        return results
+
+    def _prepare_request(
+        self,
+        practice_area: str,
+        topic: str,
+        difficulty: str,
+        provider: str,
+        model: Optional[str],
+        reasoning_instruction: Optional[str],
+        sample_type: str,
+        include_few_shot: bool = True
+    ) -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        Validate generation inputs and build the provider request.
+
+        Returns:
+            Tuple of (request, error_message); request holds the keyword
+            arguments for provider.generate() (model, prompt, system, sampling params)
+        """
         if provider not in PROVIDERS:
-            return None, 0, 0, f"Unknown provider: {provider}"
+            return None, f"Unknown provider: {provider}"
 
         # Validate sample_type (exclude 'balance' - it should be converted before reaching here)
-        valid_sample_types = [
-            'case_analysis',
-            'educational',
-            'client_interaction',
-            'statutory_interpretation',
-            'legal_dialogue',
-            'pure_conceptual',
-            'comparative_analysis',
-            'ethical_reasoning',
-            'procedural_guide',
-            'legal_news_analysis',
-            'case_study',
-            'practical_application',
-            'simple_qa',
-            'general_reasoning',
-            'hypothetical',
-            'conversational'
-        ]
-        if sample_type not in valid_sample_types:
-            return None, 0, 0, f"Invalid sample_type: {sample_type}. Valid types: {', '.join(valid_sample_types)} (Note: 'balance' should be converted to a specific type before generation)"
+        if sample_type not in _VALID_SAMPLE_TYPES:
+            return None, f"Invalid sample_type: {sample_type}. Valid types: {_VALID_SAMPLE_TYPES_STR} (Note: 'balance' should be converted to a specific type before generation)"
 
         if model is None:
             model = PROVIDERS[provider]['default_model']
 
-        # Get difficulty specifications
-        diff_spec = DIFFICULTY_SPECS.get(difficulty, DIFFICULTY_SPECS['intermediate'])
+        system_prompt, prompt = self._build_prompt(
+            practice_area, topic, difficulty, reasoning_instruction, sample_type, include_few_shot
+        )
 
-        # Get sample type guidance
-        type_guide = self._get_sample_type_guidance(sample_type)
-        sample_type_config = SAMPLE_TYPES.get(sample_type, SAMPLE_TYPES['case_analysis'])
+        # Adjust max_tokens for thinking models (they need more tokens for reasoning)
+        # Check against THINKING_MODELS constant for robust detection
+        is_thinking_model = model in THINKING_MODELS
+        max_tokens = 8000 if is_thinking_model else 4000
+
+        return {
+            'model': model,
+            'prompt': prompt,
+            'system': system_prompt,
+            'temperature': 0.9 if provider == 'groq' else 0.6,
+            'max_tokens': max_tokens,
+            'top_p': 1 if provider == 'groq' else 0.95
+        }, None
+
+    def _build_prompt(
+        self,
+        practice_area: str,
+        topic: str,
+        difficulty: str,
+        reasoning_instruction: Optional[str],
+        sample_type: str,
+        include_few_shot: bool = True
+    ) -> Tuple[str, str]:
+        """
+        Build the generation prompt for one sample.
 
-        # Select random scenario pattern for diversity (only for case_analysis)
+        Returns:
+            Tuple of (system_prompt, task_prompt)
+        """
+        # Select random scenario pattern for diversity (only for case_analysis;
+        # other types have their fixed context baked into the cached template)
+        scenario_text = ''
         if sample_type == 'case_analysis':
-            scenario_pattern = random.choice(SCENARIO_PATTERNS)
-            scenario_guidance = {
-                "client_consultation": "Frame as a client's initial consultation question seeking legal guidance",
-                "procedural_tactical": "Frame as a question about specific procedural steps or tactical considerations",
-                "risk_assessment": "Frame as a request for risk assessment or commercial legal advice",
-                "dispute_resolution": "Frame as a question about dispute resolution options and strategies",
-                "compliance_preventive": "Frame as a compliance or preventive legal guidance question"
-            }
-            scenario_text = scenario_guidance[scenario_pattern]
-        else:
-            scenario_text = type_guide['example_context']
+            scenario_text = _SCENARIO_TEXTS[random.randrange(len(_SCENARIO_TEXTS))]
 
         # Build custom reasoning instruction if provided
         reasoning_req = ""
         if reasoning_instruction:
             reasoning_req = f"\n- ADDITIONAL REQUIREMENT: {reasoning_instruction}"
 
-        # Build dynamic structure validation based on sample_type (MUST be before reasoning_section)
-        structure_validations = {
-            'case_analysis': (
-                "☐ 2. IRAC structure: Answer follows Issue → Rule → Application → Conclusion",
-                "Demonstrate IRAC progression through steps"
-            ),
-            'educational': (
-                "☐ 2. Educational structure: Answer follows Definition → Legal Basis → Key Elements → Examples → Distinctions",
-                "Show progression from definition to practical application"
-            ),
-            'client_interaction': (
-                "☐ 2. Client communication structure: Answer follows Understanding → Legal Position → Options → Recommendation → Next Steps",
-                "Show client-focused reasoning from understanding to action"
-            ),
-            'statutory_interpretation': (
-                "☐ 2. Statutory analysis structure: Answer follows Statutory Text → Purpose → Interpretation → Case Law → Application",
-                "Show progression from statutory text to practical application"
-            ),
-            'legal_dialogue': (
-                "☐ 2. Dialogue structure: Answer uses conversational format with Opening → Exchange → Follow-up → Resolution",
-                "Show reasoning development through multi-turn dialogue"
-            ),
-            'pure_conceptual': (
-                "☐ 2. Encyclopedic structure: Answer follows Core Definition → Historical Context → Statutory Basis → Key Features → Scope",
-                "Present factual knowledge systematically (NO reasoning steps needed)"
-            ),
-            'comparative_analysis': (
-                "☐ 2. Comparative structure: Answer follows Introduction → Approach A → Approach B → Similarities → Differences → Analysis → Conclusion",
-                "Show comparative reasoning across jurisdictions or doctrines"
-            ),
-            'ethical_reasoning': (
-                "☐ 2. Ethical analysis structure: Answer follows Ethical Dilemma → Professional Duties → Competing Values → Frameworks → Resolution",
-                "Show moral reasoning through ethical frameworks"
-            ),
-            'procedural_guide': (
-                "☐ 2. Procedural structure: Answer follows Overview → Prerequisites → Step-by-step instructions → Important Notes",
-                "Show sequential procedural progression"
-            ),
-            'legal_news_analysis': (
-                "☐ 2. Legal news structure: Answer follows The Development → Background → Key Changes → Legal Reasoning → Implications → Future Outlook",
-                "Show analysis of contemporary legal developments"
-            ),
-            'case_study': (
-                "☐ 2. Case study structure: Answer follows Case Overview → Facts → Legal Issues → Court's Reasoning → Judgment → Broader Implications → Subsequent Treatment",
-                "Show comprehensive case analysis for legal learning"
-            ),
-            'practical_application': (
-                "☐ 2. Practical application structure: Answer follows Scenario Assessment → Applicable Law → Practical Analysis → Options → Recommended Approach → Procedural Steps → Risks",
-                "Show domain-specific practical problem-solving"
-            ),
-            'simple_qa': (
-                "☐ 2. Simple Q&A: Answer is direct and concise (no complex structure required)",
-                "Provide clear, straightforward answer"
-            ),
-            'general_reasoning': (
-                "☐ 2. General reasoning: Answer naturally explains the reasoning (flexible structure)",
-                "Explain reasoning naturally without rigid format"
-            ),
-            'hypothetical': (
-                "☐ 2. Hypothetical: Answer is brief and to the point (concise analysis)",
-                "Provide quick, focused analysis"
-            ),
-            'conversational': (
-                "☐ 2. Conversational: Answer sounds like a professional lawyer speaking naturally (no formal structure)",
-                "Sound professional yet natural in conversation"
+        # Only the per-sample fields are substituted into the cached task template
+        system_prompt, task_template = self._build_prompt_template(sample_type, difficulty, include_few_shot)
+        return system_prompt, task_template.safe_substitute(
+            practice_area=practice_area,
+            topic=topic,
+            scenario_text=scenario_text,
+            reasoning_req=reasoning_req
+        )
+
+    def _build_marshaled_prompt(self, specs: List[Dict], sample_type: str, difficulty: str) -> str:
+        """
+        Build the task prompt asking for one sample per spec in a single response.
+
+        Pairs with the cached system prompt of _build_prompt_template; only this
+        task part differs from a single-sample request.
+
+        Returns:
+            Task prompt listing each sample's practice area, topic and context
+        """
+        diff_spec = DIFFICULTY_SPECS.get(difficulty, DIFFICULTY_SPECS['intermediate'])
+        type_guide = self._get_sample_type_guidance(sample_type)
+        sample_type_config = SAMPLE_TYPES.get(sample_type, SAMPLE_TYPES['case_analysis'])
+
+        lines = []
+        for number, spec in enumerate(specs, 1):
+            if sample_type == 'case_analysis':
+                scenario_text = _SCENARIO_TEXTS[random.randrange(len(_SCENARIO_TEXTS))]
+            else:
+                scenario_text = type_guide['example_context']
+            line = (
+                f"sample_index {number}: Practice Area: {spec['practice_area']} | "
+                f"Specific Topic: {spec['topic']} | Context: {scenario_text}"
             )
-        }
+            if spec.get('reasoning_instruction'):
+                line += f" | ADDITIONAL REQUIREMENT: {spec['reasoning_instruction']}"
+            lines.append(line)
+        sample_lines = '\n'.join(lines)
 
-        structure_validation, reasoning_guidance = structure_validations.get(
-            sample_type,
-            ("☐ 2. Answer structure: Follow the specified format for this sample type",
-             "Demonstrate logical progression through steps")
-        )
+        return f"""╔══════════════════════════════════════════════════════════════╗
+║ GENERATION TASK (MULTIPLE SAMPLES)                           ║
+╚══════════════════════════════════════════════════════════════╝
+
+Difficulty Level: {difficulty} ({diff_spec['description']})
+Sample Type: {sample_type_config['name']}
+Type Objective: {type_guide['objective']}
+Question Format: {type_guide['question_format']}
+
+Generate {len(specs)} separate, independent samples - one for each line below:
+{sample_lines}
+
+Every sample must meet all the requirements above on its own. Set each sample's
+"topic" field to "<Practice Area> - <Specific Topic>" from its line, and add a
+"sample_index" field holding the number of that line.
+
+Return ONLY a valid JSON object of the form {{"samples": [<sample 1>, <sample 2>, ...]}}
+with exactly {len(specs)} sample objects (each in the output format above plus "sample_index").
+
+Generate NOW:"""
+
+    @staticmethod
+    @functools.lru_cache(maxsize=32)
+    def _build_prompt_template(
+        sample_type: str,
+        difficulty: str,
+        include_few_shot: bool = True
+    ) -> Tuple[str, Template]:
+        """
+        Build the static parts of the generation prompt for a sample type and difficulty.
+
+        Everything except the practice area, topic, scenario and extra reasoning
+        requirement depends only on these arguments, so the rendered text is
+        cached and only the $-placeholders are filled in per sample.
+
+        Args:
+            sample_type: Type of sample
+            difficulty: Difficulty level
+            include_few_shot: Include the few-shot example section
+
+        Returns:
+            Tuple of (system_prompt, task_template); the system prompt holds the
+            quality standards, examples, checklist and output format, the task
+            template has $practice_area, $topic and $reasoning_req placeholders
+            (plus $scenario_text for case_analysis, whose scenario varies per sample)
+        """
+        # Get difficulty specifications
+        diff_spec = DIFFICULTY_SPECS.get(difficulty, DIFFICULTY_SPECS['intermediate'])
+
+        # Get sample type guidance
+        type_guide = GenerationService._get_sample_type_guidance(sample_type)
+        sample_type_config = SAMPLE_TYPES.get(sample_type, SAMPLE_TYPES['case_analysis'])
+
+        # Structure checklist line and reasoning guidance for this sample_type (MUST be before reasoning_section)
+        structure_validation, reasoning_guidance = _STRUCTURE_VALIDATION.get(sample_type, _DEFAULT_STRUCTURE_VALIDATION)
 
         # Add special warning and adjust word count for simple types
         simple_warning = ""
@@ -527,19 +1240,9 @@ class GenerationService:
             elif sample_type == 'conversational':
                 depth_guidance = "Keep response natural: 100-200 words (conversational length)"
 
-        # Build examples section based on sample type
+        # Build examples section based on sample type (few-shot examples are optional)
         if sample_type == 'simple_qa':
-            examples_section = """
-╔══════════════════════════════════════════════════════════════╗
-║ SIMPLE Q&A EXAMPLES (Keep it this brief!)                   ║
-╚══════════════════════════════════════════════════════════════╝
-
-EXAMPLE (Simple Q&A):
-{
-    "question": "What is the limitation period for breach of contract claims in England?",
-    "answer": "Under the Limitation Act 1980, the limitation period for breach of contract claims is six years from the date of the breach. This applies to simple contracts. For contracts made by deed, the period is 12 years.",
-    "reasoning": "The Limitation Act 1980 sets statutory time limits for bringing claims. For contract breaches, the six-year period starts when the breach occurs, giving claimants a reasonable window to pursue remedies while ensuring defendants aren't exposed to indefinite liability."
-}"""
+            examples_section = _FEW_SHOT_SIMPLE_QA if include_few_shot else ""
         elif sample_type in ['hypothetical', 'conversational']:
             examples_section = f"""
 ╔══════════════════════════════════════════════════════════════╗
@@ -548,27 +1251,19 @@ EXAMPLE (Simple Q&A):
 
 ⚠️  Remember: This is {sample_type} - NO long IRAC analysis needed!
 Keep your answer SHORT and DIRECT."""
-        else:
-            examples_section = """
+        elif include_few_shot:
+            examples_section = f"""
 ╔══════════════════════════════════════════════════════════════╗
 ║ FEW-SHOT EXAMPLES (Learn from these)                        ║
 ╚══════════════════════════════════════════════════════════════╝
 
-⚠️  CRITICAL: These examples show case_analysis type. YOU MUST use the sample_type
-specified above ("{sample_type}") and follow its required answer structure. Do NOT
+⚠️  CRITICAL: These examples show case_analysis type. YOU MUST use the requested
+sample_type ("{sample_type}") and follow its required answer structure. Do NOT
 default to IRAC if a different sample_type is requested!
 
-EXAMPLE 1 (Basic Difficulty):
-{{
-    "id": "example_001",
-    "question": "A homeowner agreed verbally to sell their property to a buyer for £300,000. The buyer paid a £5,000 deposit. Is this contract enforceable under UK law?",
-    "answer": "**ISSUE**: Whether a verbal agreement for the sale of land is enforceable under UK law. **RULE**: Under Section 2 of the Law of Property (Miscellaneous Provisions) Act 1989, contracts for the sale of land must be in writing and signed by both parties. A verbal agreement, regardless of deposit payment, cannot satisfy the statutory formality requirements. The seminal case *McCausland v Duncan Lawrie Ltd* [1997] 1 WLR 38 confirms that Section 2 renders oral land contracts void, not merely unenforceable. **APPLICATION**: In this scenario, the homeowner and buyer entered a verbal agreement for property sale at £300,000. Despite the buyer paying a £5,000 deposit (demonstrating intention and part performance), the absence of a written contract signed by both parties means the agreement fails to meet Section 2 requirements. The court in *McCausland* held that no doctrine of part performance can overcome the statutory writing requirement. The deposit payment, while evidencing serious intent, cannot cure the fundamental defect. **CONCLUSION**: The verbal contract is void and unenforceable. The buyer may be entitled to recover the £5,000 deposit under principles of unjust enrichment, but cannot compel the sale. The homeowner is not bound to complete the transaction. To create an enforceable contract, the parties must execute a written agreement signed by both, incorporating all agreed terms.",
-    "topic": "Property Law - Contract Formation",
-    "difficulty": "basic",
-    "case_citation": "Law of Property (Miscellaneous Provisions) Act 1989, Section 2; McCausland v Duncan Lawrie Ltd [1997] 1 WLR 38",
-    "reasoning": "Step 1: Identify the governing statute - Section 2 of the Law of Property (Miscellaneous Provisions) Act 1989 requires written contracts for land sales → verbal agreements are insufficient. Step 2: Apply *McCausland v Duncan Lawrie Ltd* [1997] 1 WLR 38 - court held Section 2 renders oral contracts void, not voidable → formality requirement is absolute. Step 3: Assess deposit payment significance - while showing intent, deposit cannot satisfy writing requirement → part performance doctrine abolished by Section 2. Step 4: Determine enforceability - absence of written signed contract means agreement is void → neither party can enforce specific performance. Step 5: Consider buyer's remedies - buyer may recover deposit under unjust enrichment principles → restitution available but not contract enforcement.",
-    "sample_type": "case_analysis"
-}}"""
+{_FEW_SHOT_CASE_ANALYSIS}"""
+        else:
+            examples_section = ""
 
         # Build reasoning section based on sample type (MUST be after reasoning_guidance is defined)
         # Simple types don't need complex reasoning structure
@@ -580,56 +1275,46 @@ EXAMPLE 1 (Basic Difficulty):
    - Focus on encyclopedic accuracy and clarity
    - Present information systematically without analytical reasoning
    - The 'reasoning' field should briefly explain how the concept developed or its logical structure
-   - No "Step 1, Step 2" format needed{reasoning_req}"""
+   - No "Step 1, Step 2" format needed"""
             elif sample_type == 'simple_qa':
                 reasoning_section = f"""4. BRIEF EXPLANATION (OPTIONAL)
    - The 'reasoning' field can contain a brief explanation of your answer
    - No complex step-by-step analysis needed
-   - Keep it simple and direct{reasoning_req}"""
+   - Keep it simple and direct"""
             elif sample_type == 'hypothetical':
                 reasoning_section = f"""4. QUICK REASONING (CONCISE)
    - Briefly explain the legal reasoning (2-3 steps maximum)
    - Keep it concise and focused
-   - No extensive chain-of-thought needed{reasoning_req}"""
+   - No extensive chain-of-thought needed"""
             elif sample_type == 'conversational':
                 reasoning_section = f"""4. INFORMAL REASONING (NATURAL)
    - The 'reasoning' field should explain your thinking informally
    - Write how a lawyer would explain their reasoning in conversation
-   - No step format needed - just natural explanation{reasoning_req}"""
+   - No step format needed - just natural explanation"""
         elif sample_type == 'general_reasoning':
             reasoning_section = f"""4. FLEXIBLE REASONING
    - Explain the reasoning naturally without rigid step format
    - Can use informal steps or flowing explanation
    - Focus on clarity over format
-   - {reasoning_guidance}{reasoning_req}"""
+   - {reasoning_guidance}"""
         else:
             reasoning_section = f"""4. REASONING - Chain-of-Thought Analysis
    - Minimum {diff_spec['reasoning_steps']} steps
    - Each step format: "Step X: [legal principle] → [application to facts] → [intermediate conclusion]"
    - Connect steps logically (each builds on previous)
    - Reference specific cases/statutes within reasoning steps
-   - {reasoning_guidance}{reasoning_req}"""
-
-        prompt = f"""You are a UK legal expert creating high-quality training data for an AI legal assistant. Your samples will train LLMs to provide accurate legal guidance to UK lawyers and clients.
+   - {reasoning_guidance}"""
 
-╔══════════════════════════════════════════════════════════════╗
-║ GENERATION TASK                                              ║
-╚══════════════════════════════════════════════════════════════╝
-
-Practice Area: {practice_area}
-Specific Topic: {topic}
-Difficulty Level: {difficulty} ({diff_spec['description']})
-Sample Type: {sample_type_config['name']}
-Type Objective: {type_guide['objective']}
-Question Format: {type_guide['question_format']}
-Context: {scenario_text}
+        # Static instructions first (system message) so providers can reuse the
+        # cached prefix; the per-sample task follows as the user message
+        system_prompt = f"""You are a UK legal expert creating high-quality training data for an AI legal assistant. Your samples will train LLMs to provide accurate legal guidance to UK lawyers and clients.
 
 ╔══════════════════════════════════════════════════════════════╗
 ║ QUALITY STANDARDS (Research-Based 2024-2025)                ║
 ╚══════════════════════════════════════════════════════════════╝
 {simple_warning}
 1. ANSWER STRUCTURE
-   {self._get_answer_structure_guidance(sample_type)}
+   {GenerationService._get_answer_structure_guidance(sample_type)}
 
 2. ANSWER DEPTH - {depth_guidance}
    - Legal content appropriate for {difficulty} level
@@ -684,84 +1369,125 @@ Return ONLY a valid JSON object:
     "id": "temporary_id",
     "question": "your generated question here",
     "answer": "your comprehensive answer following the {sample_type} structure (minimum {diff_spec['min_words']} words)",
-    "topic": "{practice_area} - {topic}",
+    "topic": "Practice Area - Specific Topic (from the generation task)",
     "difficulty": "{difficulty}",
     "case_citation": "Real UK cases/statutes (minimum {diff_spec['min_citations']})",
     "reasoning": "Step 1: ... Step 2: ... [minimum {diff_spec['reasoning_steps']} steps]",
     "sample_type": "{sample_type}"
-}}
+}}"""
+
+        # Only case_analysis picks a scenario per sample; other types always use their example context
+        scenario_text = '$scenario_text' if sample_type == 'case_analysis' else type_guide['example_context']
+
+        task_prompt = f"""╔══════════════════════════════════════════════════════════════╗
+║ GENERATION TASK                                              ║
+╚══════════════════════════════════════════════════════════════╝
+
+Practice Area: $practice_area
+Specific Topic: $topic
+Difficulty Level: {difficulty} ({diff_spec['description']})
+Sample Type: {sample_type_config['name']}
+Type Objective: {type_guide['objective']}
+Question Format: {type_guide['question_format']}
+Context: {scenario_text}$reasoning_req
+
+Set the "topic" field to "$practice_area - $topic".
 
 Generate NOW:"""
 
-        try:
-            start_time = time.time()
+        return system_prompt, Template(task_prompt)
 
-            # Get provider instance
-            provider_instance = self.factory.get_provider(provider)
-
-            # Adjust max_tokens for thinking models (they need more tokens for reasoning)
-            # Check against THINKING_MODELS constant for robust detection
-            is_thinking_model = model in THINKING_MODELS
-            max_tokens = 8000 if is_thinking_model else 4000
-
-            # Generate using provider
-            result = provider_instance.generate(
-                model=model,
-                prompt=prompt,
-                temperature=0.9 if provider == 'groq' else 0.6,
-                max_tokens=max_tokens,
-                top_p=1 if provider == 'groq' else 0.95
-            )
+    def _build_sample(
+        self,
+        result: Dict,
+        provider: str,
+        model: str,
+        difficulty: str,
+        sample_type: str,
+        batch_id: Optional[str],
+        start_time: float,
+        created_at: Optional[str] = None
+    ) -> Tuple[Optional[Dict], int, float, Optional[str]]:
+        """
+        Parse a provider result into a validated sample.
 
-            response_text = result['text']
-            tokens_used = result['tokens_used']
+        Raises:
+            json.JSONDecodeError / ValueError: If the response is not a usable sample
+        """
+        response_text = result['text']
+        tokens_used = result['tokens_used']
 
-            # Extract JSON from response (handle various formats)
-            response_text = self._extract_json(response_text)
+        # Extract JSON from response (handle various formats)
+        response_text = self._extract_json(response_text)
 
-            if not response_text:
-                raise ValueError("Empty response after JSON extraction")
+        if not response_text:
+            raise ValueError("Empty response after JSON extraction")
 
-            sample = json.loads(response_text)
+        return self._finish_sample(
+            loads(response_text), tokens_used, provider, model, difficulty, sample_type, batch_id, start_time, created_at
+        )
+
+    def _finish_sample(
+        self,
+        sample: Dict,
+        tokens_used: int,
+        provider: str,
+        model: str,
+        difficulty: str,
+        sample_type: str,
+        batch_id: Optional[str],
+        start_time: float,
+        created_at: Optional[str] = None
+    ) -> Tuple[Optional[Dict], int, float, Optional[str]]:
+        """
+        Validate a parsed sample object and add its metadata.
 
-            # Validate required fields
-            required_fields = ["id", "question", "answer", "topic", "difficulty", "case_citation", "reasoning"]
-            if not all(field in sample for field in required_fields):
-                raise ValueError(f"Missing required fields in generated sample")
+        Raises:
+            ValueError: If the object is not a sample or lacks required fields
+        """
+        if not isinstance(sample, dict):
+            raise ValueError(f"Generated sample is not a JSON object: {type(sample).__name__}")
 
-            # Generate truly unique UUID for the sample
-            unique_id = f"{provider}_{str(uuid.uuid4())}"
-            sample['id'] = unique_id
+        # Validate required fields
+        missing = _REQUIRED_FIELDS.difference(sample)
+        if missing:
+            raise ValueError(f"Missing required fields in generated sample: {', '.join(sorted(missing))}")
 
-            # ALWAYS override sample_type to prevent LLM from changing it
-            # Validation will check if structure matches the requested type
-            sample['sample_type'] = sample_type
+        # Generate truly unique UUID for the sample
+        unique_id = f"{provider}_{uuid4().hex}"
+        sample['id'] = unique_id
 
-            # Add metadata (timestamps, provider, model, batch_id)
-            now = datetime.now().isoformat()
-            sample['created_at'] = now
-            sample['updated_at'] = now
-            sample['provider'] = provider
-            sample['model'] = model
+        # ALWAYS override sample_type to prevent LLM from changing it
+        # Validation will check if structure matches the requested type
+        sample['sample_type'] = sample_type
 
-            if batch_id:
-                sample['batch_id'] = batch_id
+        # Add metadata (timestamps, provider, model, batch_id)
+        now = created_at or datetime.now().isoformat()
+        sample['created_at'] = now
+        sample['updated_at'] = now
+        sample['provider'] = provider
+        sample['model'] = model
 
-            elapsed = time.time() - start_time
+        if batch_id:
+            sample['batch_id'] = batch_id
 
-            # POST-GENERATION QUALITY VALIDATION
-            validation_error = self._validate_sample_quality(sample, difficulty)
-            if validation_error:
-                return None, 0, 0, f"[quality_error] {validation_error}"
+        elapsed = time.time() - start_time
 
-            return sample, tokens_used, elapsed, None
+        # POST-GENERATION QUALITY VALIDATION
+        validation_error = self._validate_sample_quality(sample, difficulty)
+        if validation_error:
+            return None, 0, 0, f"[quality_error] {validation_error}"
 
-        except json.JSONDecodeError as e:
-            return None, 0, 0, f"[json_error] JSON parsing error: {str(e)}"
-        except Exception as e:
-            # Use comprehensive error categorization function
-            error_type = categorize_error(str(e), provider)
-            return None, 0, 0, f"[{error_type}] {str(e)}"
+        return sample, tokens_used, elapsed, None
+
+    def _generation_error(self, error: Exception, provider: str) -> Tuple[None, int, int, str]:
+        """Convert a generation exception into the (None, 0, 0, message) result tuple."""
+        if isinstance(error, json.JSONDecodeError):
+            return None, 0, 0, f"[json_error] JSON parsing error: {str(error)}"
+
+        # Use comprehensive error categorization function
+        error_type = categorize_error(str(error), provider)
+        return None, 0, 0, f"[{error_type}] {str(error)}"
 
     def _validate_sample_quality(self, sample: Dict, difficulty: str) -> Optional[str]:
         """
@@ -775,8 +1501,6 @@ Generate NOW:"""
         Returns:
             Error message if validation fails, None if passes
         """
-        diff_spec = DIFFICULTY_SPECS.get(difficulty, DIFFICULTY_SPECS['intermediate'])
-
         answer = sample.get('answer', '')
         reasoning = sample.get('reasoning', '')
         case_citation = sample.get('case_citation', '')
@@ -790,8 +1514,8 @@ Generate NOW:"""
         simple_types_no_reasoning = ['pure_conceptual', 'simple_qa', 'hypothetical', 'conversational']
 
         if sample_type not in simple_types_no_reasoning:
-            step_count = len(re.findall(r'Step \d+:', reasoning))
-            min_steps = int(diff_spec['reasoning_steps'].split('-')[0])
+            step_count = sum(1 for _ in _STEP_RE.finditer(reasoning))
+            min_steps = _MIN_STEPS.get(difficulty, _MIN_STEPS['intermediate'])
 
             # General reasoning can be flexible - allow lower threshold
             if sample_type == 'general_reasoning':
@@ -810,8 +1534,9 @@ Generate NOW:"""
         # Note: case_citation can be empty for questions that don't require case law
 
         # 5. Basic content quality check - ensure answer has minimum substance
-        word_count = len(answer.split())
-        if word_count < 100:  # Very low threshold - just ensures it's not trivial
+        # Stop counting at the threshold instead of splitting the whole answer
+        word_count = sum(1 for _ in itertools.islice(_WORD_RE.finditer(answer), _MIN_ANSWER_WORDS))
+        if word_count < _MIN_ANSWER_WORDS:  # Very low threshold - just ensures it's not trivial
             return f"Answer lacks substance: {word_count} words (minimum 100 for meaningful legal analysis)"
 
         # 6. Validate answer structure matches sample_type
@@ -840,108 +1565,8 @@ Generate NOW:"""
         Returns:
             Error message if structure validation fails, None if passes
         """
-        # Define required structure keywords for each sample type
-        structure_requirements = {
-            'case_analysis': {
-                'keywords': ['ISSUE', 'RULE', 'APPLICATION', 'CONCLUSION'],
-                'min_required': 3  # Must have at least 3 of 4 sections (some flexibility)
-            },
-            'educational': {
-                'keywords': ['DEFINITION', 'LEGAL BASIS', 'KEY ELEMENTS', 'EXAMPLES'],
-                'min_required': 3
-            },
-            'client_interaction': {
-                'keywords': ['UNDERSTANDING', 'LEGAL POSITION', 'OPTIONS', 'RECOMMENDATION'],
-                'min_required': 3
-            },
-            'statutory_interpretation': {
-                'keywords': ['STATUTORY TEXT', 'PURPOSE', 'INTERPRETATION', 'APPLICATION'],
-                'min_required': 3
-            },
-            'legal_dialogue': {
-                # More flexible - check for dialogue indicators
-                'keywords': ['LAWYER:', 'CLIENT:', 'COUNSEL:', 'JUDGE:', 'Q:', 'A:'],
-                'min_required': 2  # Must have at least 2 speakers/turns
-            },
-            'pure_conceptual': {
-                # Factual knowledge structure
-                'keywords': ['DEFINITION', 'HISTORICAL', 'BASIS', 'FEATURES', 'SCOPE'],
-                'min_required': 3  # More lenient for factual content
-            },
-            'comparative_analysis': {
-                # Comparison structure
-                'keywords': ['INTRODUCTION', 'APPROACH', 'SIMILARITIES', 'DIFFERENCES', 'ANALYSIS'],
-                'min_required': 3
-            },
-            'ethical_reasoning': {
-                # Ethical analysis structure
-                'keywords': ['DILEMMA', 'DUTIES', 'VALUES', 'FRAMEWORK', 'RESOLUTION'],
-                'min_required': 3
-            },
-            'procedural_guide': {
-                # Step-by-step procedural structure
-                'keywords': ['OVERVIEW', 'STEP', 'PREREQUISITES', 'PROCEDURE', 'NOTES'],
-                'min_required': 2  # Must have overview and steps
-            },
-            'legal_news_analysis': {
-                # Legal news and developments structure
-                'keywords': ['DEVELOPMENT', 'BACKGROUND', 'CHANGES', 'REASONING', 'IMPLICATIONS', 'OUTLOOK'],
-                'min_required': 3
-            },
-            'case_study': {
-                # Case study structure
-                'keywords': ['OVERVIEW', 'FACTS', 'ISSUES', 'REASONING', 'JUDGMENT', 'IMPLICATIONS'],
-                'min_required': 4  # More comprehensive analysis required
-            },
-            'practical_application': {
-                # Practical domain-specific structure
-                'keywords': ['ASSESSMENT', 'APPLICABLE', 'ANALYSIS', 'OPTIONS', 'APPROACH', 'STEPS', 'RISKS'],
-                'min_required': 3
-            },
-            'simple_qa': {
-                # Simple Q&A - no structure required
-                'keywords': [],  # No mandatory keywords
-                'min_required': 0
-            },
-            'general_reasoning': {
-                # General reasoning - flexible
-                'keywords': [],
-                'min_required': 0
-            },
-            'hypothetical': {
-                # Hypothetical - flexible
-                'keywords': [],
-                'min_required': 0
-            },
-            'conversational': {
-                # Conversational - no structure required
-                'keywords': [],
-                'min_required': 0
-            }
-        }
-
         # Default to case_analysis if type not recognized
-        if sample_type not in structure_requirements:
-            sample_type = 'case_analysis'
-
-        requirements = structure_requirements[sample_type]
-        required_keywords = requirements['keywords']
-        min_required = requirements['min_required']
-
-        # Case-insensitive check
-        answer_upper = answer.upper()
-
-        # Count how many required keywords are present
-        found_keywords = [kw for kw in required_keywords if kw in answer_upper]
-
-        if len(found_keywords) < min_required:
-            missing_keywords = [kw for kw in required_keywords if kw not in answer_upper]
-            return (f"Answer structure does not match sample_type '{sample_type}'. "
-                    f"Found {len(found_keywords)}/{len(required_keywords)} required sections. "
-                    f"Missing: {', '.join(missing_keywords[:2])}")  # Show first 2 missing
-
-        # Validation passed
-        return None
+        return _VALIDATORS.get(sample_type, _VALIDATORS['case_analysis'])(answer)
 
     def _extract_json(self, response_text: str) -> str:
         """
@@ -953,84 +1578,97 @@ Generate NOW:"""
         Returns:
             Extracted JSON string
         """
-        # STEP 1: Remove ALL thinking tags (Cerebras thinking models can have multiple)
-        # Add iteration limit to prevent infinite loops on malformed tags
-        max_thinking_removals = 10
-        thinking_removal_count = 0
-
-        while ('<thinking>' in response_text or '</thinking>' in response_text) and thinking_removal_count < max_thinking_removals:
-            thinking_removal_count += 1
-
-            # Find and remove thinking sections
-            start_think = response_text.find('<thinking>')
-            end_think = response_text.find('</thinking>')
-
-            if start_think != -1 and end_think != -1:
-                # Remove the entire thinking section including tags
-                response_text = response_text[:start_think] + response_text[end_think + len('</thinking>'):]
-            elif start_think != -1:
-                # Unclosed thinking tag - remove everything from there
-                response_text = response_text[:start_think]
-                break
-            elif end_think != -1:
-                # Orphaned closing tag - remove it and everything before
-                response_text = response_text[end_think + len('</thinking>'):]
-            else:
-                break
-
-        # STEP 2: Extract JSON from markdown code blocks
-        if "```json" in response_text:
-            start = response_text.find("```json") + 7
-            end = response_text.find("```", start)
-            if end != -1:
-                response_text = response_text[start:end].strip()
-            else:
+        # Fast path: JSON-mode responses are usually already a bare object
+        stripped = response_text.strip()
+        if stripped[:1] == '{' and stripped[-1:] == '}':
+            try:
+                loads(stripped)
+                return stripped
+            except ValueError:
+                pass
+
+        # STEP 1: Remove ALL thinking sections (Cerebras thinking models can have multiple)
+        # A single-character probe skips the tag handling for responses without any tags
+        if '<' in response_text:
+            response_text = _THINK_RE.sub('', response_text)
+
+            # Unclosed thinking tag - remove everything from there
+            response_text = _UNCLOSED_THINK_RE.sub('', response_text)
+
+            # Orphaned closing tag - remove it and everything before
+            if '</thinking>' in response_text:
+                response_text = response_text.rpartition('</thinking>')[2]
+
+        # STEP 2: Extract JSON from markdown code blocks (```json or generic)
+        if '`' in response_text:
+            fence = _JSON_FENCE_RE.search(response_text)
+            if fence:
+                response_text = fence.group(1)
+            elif "```json" in response_text:
                 # Incomplete code block, take everything after ```json
-                response_text = response_text[start:].strip()
-        elif "```" in response_text:
-            # Generic code block
-            lines = response_text.split("\n")
-            response_text = "\n".join(lines[1:-1]) if len(lines) > 2 else response_text
+                response_text = response_text[response_text.find("```json") + 7:]
+            elif "```" in response_text:
+                # Incomplete generic code block, skip the opening fence line and slice once
+                start = response_text.find("```") + 3
+                newline = response_text.find("\n", start)
+                if newline != -1:
+                    start = newline + 1
+                response_text = response_text[start:]
 
         # STEP 3: Find the JSON object (most robust method)
+        # Steps 3 and 4 only move the (lo, hi) bounds; the text is sliced once at the end
+        lo, hi = 0, len(response_text)
+        while lo < hi and response_text[lo].isspace():
+            lo += 1
+
         # Look for the first complete JSON object
-        if not response_text.strip().startswith('{'):
-            start_json = response_text.find('{')
+        if response_text[lo:lo + 1] != '{':
+            start_json = response_text.find('{', lo)
             if start_json != -1:
-                # Find the matching closing brace by counting braces
-                brace_count = 0
-                end_json = -1
-                for i in range(start_json, len(response_text)):
-                    if response_text[i] == '{':
-                        brace_count += 1
-                    elif response_text[i] == '}':
-                        brace_count -= 1
-                        if brace_count == 0:
-                            end_json = i
+                try:
+                    # The C decoder finds the end of the object in one pass (and,
+                    # unlike brace counting, ignores braces inside strings)
+                    _, end_json = _JSON_DECODER.raw_decode(response_text, start_json)
+                    # Ends exactly on the closing brace - nothing for STEP 4 to trim
+                    return response_text[start_json:end_json]
+                except json.JSONDecodeError:
+                    # Not valid JSON - match braces, jumping between them with str.find
+                    depth = 0
+                    pos = start_json
+                    while True:
+                        close = response_text.find('}', pos)
+                        if close == -1:
                             break
-
-                if end_json != -1:
-                    response_text = response_text[start_json:end_json+1]
-                else:
-                    # Fallback to rfind if counting fails
+                        open_ = response_text.find('{', pos, close)
+                        if open_ != -1:
+                            depth += 1
+                            pos = open_ + 1
+                        else:
+                            depth -= 1
+                            pos = close + 1
+                            if depth == 0:
+                                return response_text[start_json:close + 1]
+
+                    # Braces never balance (truncated) - fallback to rfind
                     end_json = response_text.rfind('}')
                     if end_json != -1:
-                        response_text = response_text[start_json:end_json+1]
+                        lo, hi = start_json, end_json + 1
 
         # STEP 4: Clean up any remaining whitespace or artifacts
-        response_text = response_text.strip()
+        while hi > lo and response_text[hi - 1].isspace():
+            hi -= 1
 
         # Remove any trailing incomplete strings or commas (common in truncated responses)
-        if response_text.endswith(','):
-            response_text = response_text[:-1]
+        if hi > lo and response_text[hi - 1] == ',':
+            hi -= 1
 
-        return response_text
+        return response_text[lo:hi]
 
     def get_next_provider_and_model(
         self,
         current_provider: str,
         current_model: str,
-        failed_models_by_provider: Dict[str, List[str]]
+        failed_models_by_provider: Dict[str, Set[str]]
     ) -> Tuple[Optional[str], Optional[str]]:
         """
         Get next provider/model combination with cross-provider fallback.
@@ -1038,36 +1676,41 @@ Generate NOW:"""
         Args:
             current_provider: Provider that just failed
             current_model: Model that just failed
-            failed_models_by_provider: Dict mapping provider -> list of failed models
+            failed_models_by_provider: Dict mapping provider -> set of failed models
+                                       (lists are still accepted and converted once)
 
         Returns:
             Tuple of (next_provider, next_model) or (None, None) if all exhausted
         """
         # Try next model in same provider first
-        failed_models = failed_models_by_provider.get(current_provider, [])
-        provider_instance = self.factory.get_provider(current_provider)
-        next_model = self.factory.get_next_model(current_model, failed_models, provider_instance)
+        failed_models = failed_models_by_provider.get(current_provider)
+        if not isinstance(failed_models, set):
+            failed_models = set(failed_models or ())
+        next_model = self.factory.next_in_order(
+            current_model, failed_models, self._get_fallback_order(current_provider)
+        )
 
         if next_model:
             return current_provider, next_model
 
         # All models in current provider failed, try switching provider
-        print(f"⚠️  All {current_provider} models exhausted, attempting cross-provider fallback")
+        logger.warning("⚠️  All %s models exhausted, attempting cross-provider fallback", current_provider)
 
         # Determine alternative provider
-        alternative_provider = 'cerebras' if current_provider == 'groq' else 'groq'
+        alternative_provider = _NEXT_PROVIDER.get(current_provider, _FALLBACK_CHAIN[0])
 
         # Check if alternative provider is available and has unfailed models
         if PROVIDERS.get(alternative_provider, {}).get('enabled'):
-            alt_failed = failed_models_by_provider.get(alternative_provider, [])
-            alt_provider_instance = self.factory.get_provider(alternative_provider)
-            fallback_order = alt_provider_instance.get_fallback_order()
+            alt_failed = failed_models_by_provider.get(alternative_provider)
+            if not isinstance(alt_failed, set):
+                alt_failed = set(alt_failed or ())
+            fallback_order = self._get_fallback_order(alternative_provider)
 
             # Try to find an unfailed model in alternative provider
-            for model in fallback_order:
-                if model not in alt_failed:
-                    print(f"🔄 Switching to {alternative_provider} provider with model {model}")
-                    return alternative_provider, model
+            model = next((m for m in fallback_order if m not in alt_failed), None)
+            if model:
+                logger.info("🔄 Switching to %s provider with model %s", alternative_provider, model)
+                return alternative_provider, model
 
         # All providers and models exhausted
         return None, None
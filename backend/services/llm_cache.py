@@ -0,0 +1,194 @@
+"""
+LLM response cache for provider calls.
+Stores {text, tokens_used} keyed on provider, model, sampling parameters and
+prompts so development reruns and retries reuse paid generations.
+
+Disabled unless LLM_CACHE_BACKEND is set ('memory', 'sqlite' or 'redis').
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Protocol
+
+from config import (
+    LLM_CACHE_BACKEND, LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_PATH, LLM_CACHE_REDIS_URL
+)
+
+# Optional: only needed for LLM_CACHE_BACKEND=redis
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+class CacheBackend(Protocol):
+    """Storage used by LLMCache."""
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the stored value, or None if missing or expired."""
+        ...
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        """Store value for ttl seconds."""
+        ...
+
+
+class MemoryCacheBackend:
+    """
+    In-process cache (lost on restart).
+
+    Bounded LRU: set() evicts the least recently used entries beyond
+    max_entries, so expired entries that are never read again age out too.
+    """
+
+    def __init__(self, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self._entries: OrderedDict = OrderedDict()
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+
+class SQLiteCacheBackend:
+    """On-disk cache in a standalone SQLite file (survives restarts)."""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM llm_cache WHERE key = ? AND expires_at >= ?",
+                (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl)
+            )
+            self._conn.commit()
+
+
+class RedisCacheBackend:
+    """Redis cache (shared between API processes)."""
+
+    def __init__(self, url: str):
+        if redis is None:
+            raise RuntimeError("LLM_CACHE_BACKEND=redis requires the redis package")
+        self._client = redis.Redis.from_url(url, decode_responses=True)
+
+    def get(self, key: str) -> Optional[str]:
+        return self._client.get(key)
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        self._client.setex(key, ttl, value)
+
+
+class LLMCache:
+    """
+    Cache of provider results keyed on the full request.
+
+    Sampling temperatures are high, so identical requests are expected to
+    produce different samples. Callers pass a variant (the sample counter)
+    so N samples from one request get N keys, while a rerun with the same
+    counters hits the cache.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: int = LLM_CACHE_TTL):
+        """
+        Initialize cache.
+
+        Args:
+            backend: Storage backend
+            ttl: Seconds an entry stays valid
+        """
+        self.backend = backend
+        self.ttl = ttl
+
+    @staticmethod
+    def make_key(provider: str, request: Dict, variant: Optional[int] = None) -> str:
+        """
+        Build the cache key for a provider request.
+
+        Args:
+            provider: Provider name
+            request: Keyword arguments for provider.generate() (model, prompt, system, sampling params)
+            variant: Optional nonce distinguishing samples generated from the same request
+
+        Returns:
+            Hex digest key (with ':variant' suffix when given)
+        """
+        raw = (
+            f"{provider}|{request['model']}|{request.get('temperature')}|"
+            f"{request.get('top_p')}|{request.get('max_tokens')}|{request.get('system')}|{request['prompt']}"
+        )
+        key = hashlib.sha256(raw.encode('utf-8')).hexdigest()
+        if variant is not None:
+            key = f"{key}:{variant}"
+        return key
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Get a cached result ({'text', 'tokens_used'}) or None."""
+        value = self.backend.get(key)
+        return json.loads(value) if value else None
+
+    def set(self, key: str, result: Dict) -> None:
+        """Store the parts of a provider result needed to rebuild the sample."""
+        value = json.dumps({'text': result['text'], 'tokens_used': result['tokens_used']})
+        self.backend.set(key, value, self.ttl)
+
+
+# Shared cache, created lazily from config (None when caching is disabled)
+_llm_cache: Optional[LLMCache] = None
+_llm_cache_loaded = False
+_llm_cache_lock = threading.Lock()  # to_thread workers can race the first lookup
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """Get the shared LLMCache, or None if LLM_CACHE_BACKEND is unset."""
+    global _llm_cache, _llm_cache_loaded
+    if _llm_cache_loaded:
+        return _llm_cache
+    with _llm_cache_lock:
+        if not _llm_cache_loaded:
+            backend_name = LLM_CACHE_BACKEND.lower()
+            if backend_name == 'memory':
+                _llm_cache = LLMCache(MemoryCacheBackend())
+            elif backend_name == 'sqlite':
+                _llm_cache = LLMCache(SQLiteCacheBackend(LLM_CACHE_PATH))
+            elif backend_name == 'redis':
+                _llm_cache = LLMCache(RedisCacheBackend(LLM_CACHE_REDIS_URL))
+            elif backend_name not in ('', 'none'):
+                print(f"⚠️  Unknown LLM_CACHE_BACKEND '{LLM_CACHE_BACKEND}', response caching disabled")
+            _llm_cache_loaded = True
+    return _llm_cache
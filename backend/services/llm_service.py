@@ -3,15 +3,61 @@ LLM Provider Service - Abstraction layer for multiple AI providers.
 Implements factory pattern and provider-specific logic using OOP.
 """
 
+import asyncio
+import importlib.util
+import sys
+import weakref
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
-from groq import Groq
-from cerebras.cloud.sdk import Cerebras
+from typing import Dict, Optional, Sequence, Tuple
+from groq import Groq, AsyncGroq
+from cerebras.cloud.sdk import Cerebras, AsyncCerebras
+import httpx
 import requests
 import json
 
 from config import PROVIDERS, MODEL_FALLBACK_ORDER, CEREBRAS_FALLBACK_ORDER, OLLAMA_FALLBACK_ORDER, GOOGLE_FALLBACK_ORDER, MISTRAL_FALLBACK_ORDER, THINKING_MODELS
 
+# HTTP/2 needs the optional h2 package; without it the clients keep HTTP/1.1 keep-alive
+_HTTP2_AVAILABLE = importlib.util.find_spec('h2') is not None
+
+# Async HTTP clients, one per event loop: an httpx.AsyncClient's connection
+# pool is bound to the loop that first used it, so each loop (the batch worker
+# loop, or an asyncio.run() elsewhere) gets its own, dropped with the loop
+_async_http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+# Shared requests session for the blocking generate() paths, so repeated
+# calls reuse TCP/TLS connections instead of opening one per request
+_http_session: Optional[requests.Session] = None
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Get the running event loop's shared httpx.AsyncClient used by generate_async()."""
+    loop = asyncio.get_running_loop()
+    client = _async_http_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            http2=_HTTP2_AVAILABLE,
+            timeout=90,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=100)
+        )
+        _async_http_clients[loop] = client
+    return client
+
+
+async def close_async_http_client() -> None:
+    """Close the running event loop's async HTTP client (call before the loop stops)."""
+    client = _async_http_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def get_http_session() -> requests.Session:
+    """Get the shared requests.Session used by generate()."""
+    global _http_session
+    if _http_session is None:
+        _http_session = requests.Session()
+    return _http_session
+
 
 class BaseLLMProvider(ABC):
     """
@@ -19,6 +65,9 @@ class BaseLLMProvider(ABC):
     All provider implementations must inherit from this class.
     """
 
+    # Model IDs in fallback priority order (interned, so lookups against them compare by identity first)
+    FALLBACK_ORDER: Tuple[str, ...] = ()
+
     def __init__(self, api_key: str):
         """
         Initialize provider with API key.
@@ -35,14 +84,36 @@ class BaseLLMProvider(ABC):
 
         Args:
             model: Model identifier
-            prompt: Input prompt
-            **kwargs: Additional generation parameters
+            prompt: Input prompt (sent as the user message)
+            **kwargs: Additional generation parameters; 'system' is an optional
+                      system prompt sent ahead of the user message
 
         Returns:
             Dictionary with 'text', 'tokens_used', 'finish_reason'
         """
         pass
 
+    @staticmethod
+    def _messages(prompt: str, system: Optional[str] = None) -> list:
+        """
+        Build chat messages for a prompt.
+
+        The static system prompt goes first so providers with automatic prefix
+        caching can reuse it across requests.
+        """
+        if system:
+            return [{'role': 'system', 'content': system}, {'role': 'user', 'content': prompt}]
+        return [{'role': 'user', 'content': prompt}]
+
+    async def generate_async(self, model: str, prompt: str, **kwargs) -> Dict:
+        """
+        Async variant of generate() with the same arguments and result.
+
+        Providers with an async client override this; the default runs the
+        blocking generate() in a worker thread so it never stalls the loop.
+        """
+        return await asyncio.to_thread(self.generate, model, prompt, **kwargs)
+
     @abstractmethod
     def get_rate_limits(self) -> Dict[str, int]:
         """
@@ -53,42 +124,61 @@ class BaseLLMProvider(ABC):
         """
         pass
 
-    @abstractmethod
-    def get_fallback_order(self) -> list:
+    def get_fallback_order(self) -> Tuple[str, ...]:
         """
         Get model fallback order for this provider.
 
         Returns:
-            List of model names in fallback priority order
+            Tuple of model names in fallback priority order (the class's FALLBACK_ORDER)
         """
-        pass
+        return self.FALLBACK_ORDER
 
 
 class GroqProvider(BaseLLMProvider):
     """Groq AI provider implementation."""
 
+    FALLBACK_ORDER = tuple(map(sys.intern, MODEL_FALLBACK_ORDER))
+
     def __init__(self, api_key: str):
         super().__init__(api_key)
         self.client = Groq(api_key=api_key)
+        self.async_client = None  # Created on first generate_async(), per event loop
+        self._async_http_client = None  # HTTP client async_client was built on
 
-    def generate(self, model: str, prompt: str, **kwargs) -> Dict:
-        """Generate completion using Groq API."""
-        response = self.client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=kwargs.get('temperature', 0.9),
-            max_tokens=kwargs.get('max_tokens', 4000),
-            top_p=kwargs.get('top_p', 1),
-            stream=kwargs.get('stream', False),
-            timeout=kwargs.get('timeout', 90)  # 90 second timeout
-        )
+    def _request_params(self, model: str, prompt: str, **kwargs) -> Dict:
+        """Build chat completion parameters for Groq."""
+        return {
+            'model': model,
+            'messages': self._messages(prompt, kwargs.get('system')),
+            'temperature': kwargs.get('temperature', 0.9),
+            'max_tokens': kwargs.get('max_tokens', 4000),
+            'top_p': kwargs.get('top_p', 1),
+            'stream': kwargs.get('stream', False),
+            'timeout': kwargs.get('timeout', 90)  # 90 second timeout
+        }
 
+    def _parse_response(self, response) -> Dict:
+        """Convert a Groq chat completion into the provider result dict."""
         return {
             'text': response.choices[0].message.content.strip(),
             'tokens_used': response.usage.total_tokens,
             'finish_reason': response.choices[0].finish_reason
         }
 
+    def generate(self, model: str, prompt: str, **kwargs) -> Dict:
+        """Generate completion using Groq API."""
+        response = self.client.chat.completions.create(**self._request_params(model, prompt, **kwargs))
+        return self._parse_response(response)
+
+    async def generate_async(self, model: str, prompt: str, **kwargs) -> Dict:
+        """Generate completion using Groq's async client."""
+        http_client = get_async_http_client()
+        if self._async_http_client is not http_client:
+            self.async_client = AsyncGroq(api_key=self.api_key, http_client=http_client)
+            self._async_http_client = http_client
+        response = await self.async_client.chat.completions.create(**self._request_params(model, prompt, **kwargs))
+        return self._parse_response(response)
+
     def get_rate_limits(self) -> Dict[str, int]:
         """Get Groq rate limits."""
         return {
@@ -96,21 +186,21 @@ class GroqProvider(BaseLLMProvider):
             'tokens_per_minute': 5500
         }
 
-    def get_fallback_order(self) -> list:
-        """Get Groq model fallback order."""
-        return MODEL_FALLBACK_ORDER
-
 
 class CerebrasProvider(BaseLLMProvider):
     """Cerebras AI provider implementation."""
 
+    FALLBACK_ORDER = tuple(map(sys.intern, CEREBRAS_FALLBACK_ORDER))
+
     def __init__(self, api_key: str):
         super().__init__(api_key)
         self.client = Cerebras(api_key=api_key)
+        self.async_client = None  # Created on first generate_async(), per event loop
+        self._async_http_client = None  # HTTP client async_client was built on
 
-    def generate(self, model: str, prompt: str, **kwargs) -> Dict:
+    def _request_params(self, model: str, prompt: str, **kwargs) -> Dict:
         """
-        Generate completion using Cerebras API.
+        Build chat completion parameters for Cerebras.
 
         Thinking models: No JSON schema (outputs thinking tags naturally)
         Instruct models: Use strict JSON schema for structured output
@@ -121,7 +211,7 @@ class CerebrasProvider(BaseLLMProvider):
         # Build request parameters
         request_params = {
             'model': model,
-            'messages': [{'role': 'user', 'content': prompt}],
+            'messages': self._messages(prompt, kwargs.get('system')),
             'temperature': kwargs.get('temperature', 0.6),
             'top_p': kwargs.get('top_p', 0.95),
             'max_tokens': kwargs.get('max_tokens', 4000),
@@ -156,14 +246,30 @@ class CerebrasProvider(BaseLLMProvider):
                 }
             }
 
-        response = self.client.chat.completions.create(**request_params)
+        return request_params
 
+    def _parse_response(self, response) -> Dict:
+        """Convert a Cerebras chat completion into the provider result dict."""
         return {
             'text': response.choices[0].message.content.strip(),
             'tokens_used': response.usage.total_tokens,
             'finish_reason': response.choices[0].finish_reason
         }
 
+    def generate(self, model: str, prompt: str, **kwargs) -> Dict:
+        """Generate completion using Cerebras API."""
+        response = self.client.chat.completions.create(**self._request_params(model, prompt, **kwargs))
+        return self._parse_response(response)
+
+    async def generate_async(self, model: str, prompt: str, **kwargs) -> Dict:
+        """Generate completion using Cerebras' async client."""
+        http_client = get_async_http_client()
+        if self._async_http_client is not http_client:
+            self.async_client = AsyncCerebras(api_key=self.api_key, http_client=http_client)
+            self._async_http_client = http_client
+        response = await self.async_client.chat.completions.create(**self._request_params(model, prompt, **kwargs))
+        return self._parse_response(response)
+
     def get_rate_limits(self) -> Dict[str, int]:
         """Get Cerebras rate limits."""
         return {
@@ -171,23 +277,35 @@ class CerebrasProvider(BaseLLMProvider):
             'tokens_per_minute': 48000  # 60k/min with buffer
         }
 
-    def get_fallback_order(self) -> list:
-        """Get Cerebras model fallback order."""
-        return CEREBRAS_FALLBACK_ORDER
-
 
 class OllamaProvider(BaseLLMProvider):
     """Ollama Cloud provider implementation."""
 
+    FALLBACK_ORDER = tuple(map(sys.intern, OLLAMA_FALLBACK_ORDER))
+
     def __init__(self, api_key: str, base_url: str = 'https://ollama.com/api'):
         super().__init__(api_key)
         self.base_url = base_url
 
-    def generate(self, model: str, prompt: str, **kwargs) -> Dict:
+    def _build_request(self, model: str, prompt: str, **kwargs) -> Tuple[str, Dict, Dict]:
+        """Build (url, headers, payload) for Ollama's native /chat endpoint."""
+        headers = {
+            'Authorization': f'Bearer {self.api_key}',
+            'Content-Type': 'application/json'
+        }
+
+        payload = {
+            'model': model,
+            'messages': self._messages(prompt, kwargs.get('system')),
+            'stream': False
+        }
+
+        return f'{self.base_url}/chat', headers, payload
+
+    def _parse_response(self, data: Dict) -> Dict:
         """
-        Generate completion using Ollama Cloud API.
+        Parse Ollama's native response format (NOT OpenAI-compatible).
 
-        Uses Ollama's native API format (NOT OpenAI-compatible).
         Response structure:
         {
           "message": {"role": "assistant", "content": "..."},
@@ -197,45 +315,56 @@ class OllamaProvider(BaseLLMProvider):
           "eval_count": M
         }
         """
-        headers = {
-            'Authorization': f'Bearer {self.api_key}',
-            'Content-Type': 'application/json'
-        }
+        # Extract content from Ollama-specific response format
+        content = data['message']['content'].strip()
 
-        payload = {
-            'model': model,
-            'messages': [{'role': 'user', 'content': prompt}],
-            'stream': False
+        # Calculate token usage from prompt_eval_count + eval_count
+        prompt_tokens = data.get('prompt_eval_count', 0)
+        completion_tokens = data.get('eval_count', 0)
+        tokens_used = prompt_tokens + completion_tokens
+
+        finish_reason = data.get('done_reason', 'stop')
+
+        return {
+            'text': content,
+            'tokens_used': tokens_used,
+            'finish_reason': finish_reason
         }
 
+    def generate(self, model: str, prompt: str, **kwargs) -> Dict:
+        """Generate completion using Ollama Cloud API."""
+        url, headers, payload = self._build_request(model, prompt, **kwargs)
+
         try:
-            response = requests.post(
-                f'{self.base_url}/chat',
+            response = get_http_session().post(
+                url,
                 headers=headers,
                 json=payload,
                 timeout=kwargs.get('timeout', 90)
             )
             response.raise_for_status()
+            return self._parse_response(response.json())
 
-            data = response.json()
-
-            # Extract content from Ollama-specific response format
-            content = data['message']['content'].strip()
-
-            # Calculate token usage from prompt_eval_count + eval_count
-            prompt_tokens = data.get('prompt_eval_count', 0)
-            completion_tokens = data.get('eval_count', 0)
-            tokens_used = prompt_tokens + completion_tokens
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Ollama Cloud API error: {str(e)}")
+        except KeyError as e:
+            raise Exception(f"Ollama Cloud response format error: missing key {str(e)}")
 
-            finish_reason = data.get('done_reason', 'stop')
+    async def generate_async(self, model: str, prompt: str, **kwargs) -> Dict:
+        """Generate completion using Ollama Cloud API over the shared async client."""
+        url, headers, payload = self._build_request(model, prompt, **kwargs)
 
-            return {
-                'text': content,
-                'tokens_used': tokens_used,
-                'finish_reason': finish_reason
-            }
+        try:
+            response = await get_async_http_client().post(
+                url,
+                headers=headers,
+                json=payload,
+                timeout=kwargs.get('timeout', 90)
+            )
+            response.raise_for_status()
+            return self._parse_response(response.json())
 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             raise Exception(f"Ollama Cloud API error: {str(e)}")
         except KeyError as e:
             raise Exception(f"Ollama Cloud response format error: missing key {str(e)}")
@@ -247,23 +376,20 @@ class OllamaProvider(BaseLLMProvider):
             'tokens_per_minute': 10000  # Conservative estimate
         }
 
-    def get_fallback_order(self) -> list:
-        """Get Ollama Cloud model fallback order."""
-        return OLLAMA_FALLBACK_ORDER
-
 
 class GoogleProvider(BaseLLMProvider):
     """Google AI Studio (Gemini) provider implementation."""
 
+    FALLBACK_ORDER = tuple(map(sys.intern, GOOGLE_FALLBACK_ORDER))
+
     def __init__(self, api_key: str, base_url: str = 'https://generativelanguage.googleapis.com/v1beta'):
         super().__init__(api_key)
         self.base_url = base_url
 
-    def generate(self, model: str, prompt: str, **kwargs) -> Dict:
+    def _build_request(self, model: str, prompt: str, **kwargs) -> Tuple[str, Dict, Dict]:
         """
-        Generate completion using Google Gemini API.
+        Build (url, headers, payload) for the Gemini generateContent endpoint.
 
-        Uses REST API directly for better control and compatibility.
         Gemini requires BOTH responseMimeType AND responseSchema for structured output.
         """
         headers = {
@@ -301,40 +427,74 @@ class GoogleProvider(BaseLLMProvider):
             }
         }
 
-        try:
-            # Gemini API endpoint format: /v1beta/models/{model}:generateContent
-            url = f'{self.base_url}/models/{model}:generateContent?key={self.api_key}'
+        # Gemini takes the system prompt separately from the conversation contents
+        if kwargs.get('system'):
+            payload['systemInstruction'] = {'parts': [{'text': kwargs['system']}]}
+
+        # Gemini API endpoint format: /v1beta/models/{model}:generateContent
+        url = f'{self.base_url}/models/{model}:generateContent?key={self.api_key}'
+
+        return url, headers, payload
+
+    def _parse_response(self, data: Dict) -> Dict:
+        """Parse a Gemini generateContent response."""
+        # Extract content from Gemini response
+        if 'candidates' not in data or len(data['candidates']) == 0:
+            raise Exception("No response candidates from Gemini API")
+
+        candidate = data['candidates'][0]
+        content = candidate['content']['parts'][0]['text'].strip()
+
+        # Get token usage from usageMetadata
+        usage = data.get('usageMetadata', {})
+        tokens_used = usage.get('totalTokenCount', 0)
 
-            response = requests.post(
+        finish_reason = candidate.get('finishReason', 'STOP')
+
+        return {
+            'text': content,
+            'tokens_used': tokens_used,
+            'finish_reason': finish_reason
+        }
+
+    def generate(self, model: str, prompt: str, **kwargs) -> Dict:
+        """
+        Generate completion using Google Gemini API.
+
+        Uses REST API directly for better control and compatibility.
+        """
+        url, headers, payload = self._build_request(model, prompt, **kwargs)
+
+        try:
+            response = get_http_session().post(
                 url,
                 headers=headers,
                 json=payload,
                 timeout=kwargs.get('timeout', 90)
             )
             response.raise_for_status()
+            return self._parse_response(response.json())
 
-            data = response.json()
-
-            # Extract content from Gemini response
-            if 'candidates' not in data or len(data['candidates']) == 0:
-                raise Exception("No response candidates from Gemini API")
-
-            candidate = data['candidates'][0]
-            content = candidate['content']['parts'][0]['text'].strip()
-
-            # Get token usage from usageMetadata
-            usage = data.get('usageMetadata', {})
-            tokens_used = usage.get('totalTokenCount', 0)
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Google AI Studio API error: {str(e)}")
+        except (KeyError, IndexError) as e:
+            raise Exception(f"Google AI Studio response format error: {str(e)}")
 
-            finish_reason = candidate.get('finishReason', 'STOP')
+    async def generate_async(self, model: str, prompt: str, **kwargs) -> Dict:
+        """Generate completion using Google Gemini API over the shared async client."""
+        url, headers, payload = self._build_request(model, prompt, **kwargs)
 
-            return {
-                'text': content,
-                'tokens_used': tokens_used,
-                'finish_reason': finish_reason
-            }
+        try:
+            response = await get_async_http_client().post(
+                url,
+                headers=headers,
+                json=payload,
+                timeout=kwargs.get('timeout', 90)
+            )
+            response.raise_for_status()
+            return self._parse_response(response.json())
 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             raise Exception(f"Google AI Studio API error: {str(e)}")
         except (KeyError, IndexError) as e:
             raise Exception(f"Google AI Studio response format error: {str(e)}")
@@ -346,23 +506,20 @@ class GoogleProvider(BaseLLMProvider):
             'tokens_per_minute': 32000  # Conservative estimate
         }
 
-    def get_fallback_order(self) -> list:
-        """Get Google (Gemini) model fallback order."""
-        return GOOGLE_FALLBACK_ORDER
-
 
 class MistralProvider(BaseLLMProvider):
     """Mistral AI provider implementation."""
 
+    FALLBACK_ORDER = tuple(map(sys.intern, MISTRAL_FALLBACK_ORDER))
+
     def __init__(self, api_key: str, base_url: str = 'https://api.mistral.ai/v1'):
         super().__init__(api_key)
         self.base_url = base_url
 
-    def generate(self, model: str, prompt: str, **kwargs) -> Dict:
+    def _build_request(self, model: str, prompt: str, **kwargs) -> Tuple[str, Dict, Dict]:
         """
-        Generate completion using Mistral AI API.
+        Build (url, headers, payload) for Mistral's chat completions endpoint.
 
-        Uses OpenAI-compatible chat completions endpoint.
         Mistral API is compatible with OpenAI's format but uses their own models.
         """
         headers = {
@@ -372,7 +529,7 @@ class MistralProvider(BaseLLMProvider):
 
         payload = {
             'model': model,
-            'messages': [{'role': 'user', 'content': prompt}],
+            'messages': self._messages(prompt, kwargs.get('system')),
             'temperature': kwargs.get('temperature', 0.9),
             'max_tokens': kwargs.get('max_tokens', 4000),
             'top_p': kwargs.get('top_p', 1),
@@ -380,37 +537,67 @@ class MistralProvider(BaseLLMProvider):
             'response_format': {'type': 'json_object'}  # Force JSON output
         }
 
+        return f'{self.base_url}/chat/completions', headers, payload
+
+    def _parse_response(self, data: Dict) -> Dict:
+        """Parse an OpenAI-compatible Mistral chat completion response."""
+        # Extract from OpenAI-compatible response
+        if 'choices' not in data or len(data['choices']) == 0:
+            raise Exception("No response choices from Mistral API")
+
+        choice = data['choices'][0]
+        content = choice['message']['content'].strip()
+
+        # Get token usage
+        usage = data.get('usage', {})
+        tokens_used = usage.get('total_tokens', 0)
+
+        finish_reason = choice.get('finish_reason', 'stop')
+
+        return {
+            'text': content,
+            'tokens_used': tokens_used,
+            'finish_reason': finish_reason
+        }
+
+    def generate(self, model: str, prompt: str, **kwargs) -> Dict:
+        """
+        Generate completion using Mistral AI API.
+
+        Uses OpenAI-compatible chat completions endpoint.
+        """
+        url, headers, payload = self._build_request(model, prompt, **kwargs)
+
         try:
-            response = requests.post(
-                f'{self.base_url}/chat/completions',
+            response = get_http_session().post(
+                url,
                 headers=headers,
                 json=payload,
                 timeout=kwargs.get('timeout', 90)
             )
             response.raise_for_status()
+            return self._parse_response(response.json())
 
-            data = response.json()
-
-            # Extract from OpenAI-compatible response
-            if 'choices' not in data or len(data['choices']) == 0:
-                raise Exception("No response choices from Mistral API")
-
-            choice = data['choices'][0]
-            content = choice['message']['content'].strip()
-
-            # Get token usage
-            usage = data.get('usage', {})
-            tokens_used = usage.get('total_tokens', 0)
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Mistral AI API error: {str(e)}")
+        except (KeyError, IndexError) as e:
+            raise Exception(f"Mistral AI response format error: {str(e)}")
 
-            finish_reason = choice.get('finish_reason', 'stop')
+    async def generate_async(self, model: str, prompt: str, **kwargs) -> Dict:
+        """Generate completion using Mistral AI API over the shared async client."""
+        url, headers, payload = self._build_request(model, prompt, **kwargs)
 
-            return {
-                'text': content,
-                'tokens_used': tokens_used,
-                'finish_reason': finish_reason
-            }
+        try:
+            response = await get_async_http_client().post(
+                url,
+                headers=headers,
+                json=payload,
+                timeout=kwargs.get('timeout', 90)
+            )
+            response.raise_for_status()
+            return self._parse_response(response.json())
 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             raise Exception(f"Mistral AI API error: {str(e)}")
         except (KeyError, IndexError) as e:
             raise Exception(f"Mistral AI response format error: {str(e)}")
@@ -422,10 +609,6 @@ class MistralProvider(BaseLLMProvider):
             'tokens_per_minute': 32000  # Conservative estimate
         }
 
-    def get_fallback_order(self) -> list:
-        """Get Mistral model fallback order."""
-        return MISTRAL_FALLBACK_ORDER
-
 
 class LLMProviderFactory:
     """
@@ -565,30 +748,22 @@ class LLMProviderFactory:
         }
 
     @staticmethod
-    def get_next_model_from_db(
+    def next_in_order(
         current_model: str,
-        failed_models: list,
-        provider_id: str
+        failed_models,
+        fallback_order: Sequence[str]
     ) -> Optional[str]:
         """
-        Get next model in fallback order for a provider from database.
+        Pick the next unfailed model from a fallback order.
 
         Args:
             current_model: Model that just failed
-            failed_models: List of models that have failed
-            provider_id: Provider ID
+            failed_models: Models that have failed (list or set)
+            fallback_order: Model IDs in fallback priority order
 
         Returns:
             Next model to try, or None if all exhausted
         """
-        from models import Model
-
-        # Get all enabled models for this provider, ordered by fallback priority
-        models = Model.query.filter_by(provider_id=provider_id, enabled=True)\
-                           .order_by(Model.fallback_priority).all()
-
-        fallback_order = [m.model_id for m in models]
-
         try:
             current_index = fallback_order.index(current_model) if current_model in fallback_order else -1
         except ValueError:
@@ -607,6 +782,33 @@ class LLMProviderFactory:
 
         return None  # No models left to try
 
+    @staticmethod
+    def get_next_model_from_db(
+        current_model: str,
+        failed_models: list,
+        provider_id: str
+    ) -> Optional[str]:
+        """
+        Get next model in fallback order for a provider from database.
+
+        Args:
+            current_model: Model that just failed
+            failed_models: List of models that have failed
+            provider_id: Provider ID
+
+        Returns:
+            Next model to try, or None if all exhausted
+        """
+        from models import Model
+
+        # Get all enabled models for this provider, ordered by fallback priority
+        models = Model.query.filter_by(provider_id=provider_id, enabled=True)\
+                           .order_by(Model.fallback_priority).all()
+
+        fallback_order = [sys.intern(m.model_id) for m in models]
+
+        return LLMProviderFactory.next_in_order(current_model, failed_models, fallback_order)
+
     @staticmethod
     def get_next_model(
         current_model: str,
@@ -637,20 +839,4 @@ class LLMProviderFactory:
         # Fallback to provider's get_fallback_order() method
         fallback_order = provider.get_fallback_order()
 
-        try:
-            current_index = fallback_order.index(current_model) if current_model in fallback_order else -1
-        except ValueError:
-            current_index = -1
-
-        # Try models after the current one
-        for i in range(current_index + 1, len(fallback_order)):
-            model = fallback_order[i]
-            if model not in failed_models:
-                return model
-
-        # If we've tried all models after current, try from the beginning
-        for model in fallback_order:
-            if model != current_model and model not in failed_models:
-                return model
-
-        return None  # No models left to try
+        return LLMProviderFactory.next_in_order(current_model, failed_models, fallback_order)
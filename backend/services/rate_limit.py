@@ -0,0 +1,52 @@
+"""
+Token-bucket rate limiting for LLM provider requests.
+Buckets are shared per provider so concurrent batches draw from one budget.
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket holding up to one minute of a provider's request budget.
+
+    Tokens refill continuously at requests_per_minute / 60 per second. take()
+    reserves a token immediately and returns how long the caller must wait
+    before using it, so concurrent callers queue up instead of all waking at
+    once when the bucket refills.
+    """
+
+    __slots__ = ('capacity', 'rate', 'tokens', 'last', 'lock')
+
+    def __init__(self, requests_per_minute: float):
+        """
+        Initialize a full bucket.
+
+        Args:
+            requests_per_minute: Provider request limit (bucket capacity)
+        """
+        self.capacity = float(requests_per_minute)
+        self.rate = requests_per_minute / 60.0
+        self.tokens = self.capacity
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self, cost: float = 1.0) -> float:
+        """
+        Reserve cost tokens.
+
+        Args:
+            cost: Tokens to consume (one per request)
+
+        Returns:
+            Seconds to wait before sending the request (0 if tokens were available)
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            self.tokens -= cost
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
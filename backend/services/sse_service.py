@@ -2,10 +2,11 @@
 SSE (Server-Sent Events) Service - Real-time batch update broadcasting.
 Decoupled from routes layer to avoid circular imports.
 """
-import json
 import queue
 from typing import Optional, Dict
 
+from utils.json_utils import sse_event
+
 
 class SSEService:
     """
@@ -54,7 +55,8 @@ class SSEService:
             batches = batch_service.get_running_batches()
             data = {'type': 'all_batches', 'batches': batches}
 
-        message = f"data: {json.dumps(data)}\n\n"
+        # Encoded once as bytes and shared by every subscriber
+        message = sse_event(data)
 
         # Send to all subscribers, remove disconnected ones
         active_subscribers = []
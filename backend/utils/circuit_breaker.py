@@ -135,6 +135,19 @@ class CircuitBreaker:
 
         return False
 
+    def trip(self, topic: str) -> None:
+        """
+        Force a circuit open immediately (e.g. a provider whose models all failed).
+
+        Args:
+            topic: Circuit key to open; it half-opens after recovery_timeout
+        """
+        circuit = self.get_state(topic)
+        circuit['state'] = 'open'
+        circuit['opened_at'] = time.time()
+        circuit['success_count'] = 0
+        print(f"⛔ Circuit breaker for '{topic}' TRIPPED (retry after {self.recovery_timeout} seconds)")
+
     def get_summary(self) -> Dict[str, List[Dict]]:
         """
         Get summary of all circuit states.
@@ -0,0 +1,59 @@
+"""
+JSON helpers for batch state serialization and LLM response parsing.
+Uses orjson (C extension) when installed, falling back to the stdlib json module.
+"""
+
+import json
+from typing import Any, Union
+
+# Optional: orjson encodes several times faster than the stdlib encoder
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """Encode the few non-JSON types that appear in batch state."""
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """
+    Serialize obj to UTF-8 JSON bytes.
+
+    Args:
+        obj: JSON-compatible object (sets are emitted as sorted lists)
+
+    Returns:
+        Encoded JSON document
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default).encode('utf-8')
+
+
+def dumps(obj: Any) -> str:
+    """Serialize obj to a JSON string (see dumps_bytes)."""
+    if orjson is not None:
+        return dumps_bytes(obj).decode('utf-8')
+    return json.dumps(obj, default=_default)
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """
+    Parse a JSON document.
+
+    Raises:
+        json.JSONDecodeError: If data is not valid JSON (orjson's error subclasses it)
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def sse_event(data: Any) -> bytes:
+    """Format data as a single SSE 'data:' event, encoded once as bytes."""
+    return b'data: ' + dumps_bytes(data) + b'\n\n'
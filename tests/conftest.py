@@ -0,0 +1,7 @@
+"""Make the backend package importable for the unit tests."""
+
+import sys
+from pathlib import Path
+
+backend_path = Path(__file__).parent.parent / 'backend'
+sys.path.insert(0, str(backend_path))
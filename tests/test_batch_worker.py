@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""Unit tests for the BatchService wave loop (stubbed generation, in-memory SQLite)"""
+
+import asyncio
+from collections import defaultdict
+from uuid import uuid4
+
+import pytest
+from flask import Flask
+
+import services.batch_service as batch_module
+from models import db, LegalSample
+from services.batch_service import BatchService, FastRLock
+
+
+def make_sample(spec: dict) -> dict:
+    return {
+        'id': f"{spec['provider']}_{uuid4().hex}",
+        'question': f"Question on {spec['topic']}",
+        'answer': 'Answer',
+        'topic': f"{spec['practice_area']} - {spec['topic']}",
+        'difficulty': spec['difficulty'],
+        'case_citation': 'Carlill v Carbolic Smoke Ball Co [1893] 1 QB 256',
+        'reasoning': 'Step 1: Offer.',
+        'sample_type': spec['sample_type'],
+        'batch_id': spec['batch_id']
+    }
+
+
+class FakeGeneration:
+    """Stands in for GenerationService.generate_batch; fail(spec, wave) decides per spec."""
+
+    def __init__(self, fail=lambda spec, wave: None):
+        self.fail = fail
+        self.waves = []
+
+    async def generate_batch(self, specs, **kwargs):
+        wave = len(self.waves)
+        self.waves.append((specs, kwargs))
+        results = []
+        for spec in specs:
+            error = self.fail(spec, wave)
+            results.append((None, 0, 0, error) if error else (make_sample(spec), 10, 0.1, None))
+        return results
+
+
+@pytest.fixture
+def app(monkeypatch):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+
+    async def no_sleep(_seconds):
+        return None
+
+    async def stub_provider(_provider):
+        return object()
+
+    monkeypatch.setattr(batch_module.LLMProviderFactory, 'get_rate_limits',
+                        staticmethod(lambda provider, use_db=True: {'requests_per_minute': 6000}))
+    monkeypatch.setattr(BatchService, '_resolve_provider', staticmethod(stub_provider))
+    monkeypatch.setattr(BatchService, '_get_fallback_order', lambda self, provider, ttl=None: ['m1', 'm2', 'm3'])
+    monkeypatch.setattr(BatchService, '_queue_batch_save', lambda self, batch_state: None)
+    monkeypatch.setattr(batch_module.asyncio, 'sleep', no_sleep)
+    monkeypatch.setattr(BatchService, '_buckets', {})
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+    BatchService._active_batches.clear()
+    BatchService._batch_locks.clear()
+
+
+def run_worker(app, generation, target, smart_mode=False):
+    service = BatchService()
+    service.generation_service = generation
+    batch_id = f'batch_test_{uuid4().hex[:8]}'
+    batch_state = service.create_batch_state(batch_id, 'groq', 'm1', target)
+    batch_state.update({
+        'topic_filter': None,
+        'difficulty_filter': None,
+        'reasoning_instruction': None,
+        'sample_type_filter': 'case_analysis',
+        'smart_mode': smart_mode,
+        'provider_failures': defaultdict(int),
+        'available_providers': ['groq', 'cerebras'],
+        'tried_models_by_provider': defaultdict(set, {'groq': {'m1'}})
+    })
+    BatchService._active_batches[batch_id] = batch_state
+    BatchService._batch_locks[batch_id] = FastRLock()
+
+    asyncio.run(service._batch_worker(batch_id, target, 0, 'groq', 'm1', app))
+    return batch_state
+
+
+def test_worker_generates_target_in_waves(app):
+    generation = FakeGeneration()
+
+    batch_state = run_worker(app, generation, target=20)
+
+    assert batch_state['counters'].samples_generated == 20
+    assert LegalSample.query.count() == 20
+    assert [len(specs) for specs, _ in generation.waves] == [8, 8, 4]
+    # Shared bucket and warm-up offset are passed on every wave
+    assert all(kwargs['bucket'] is BatchService._buckets['groq'] for _, kwargs in generation.waves)
+    assert [kwargs['few_shot_offset'] for _, kwargs in generation.waves] == [0, 8, 16]
+    # Cache variants never repeat within the batch
+    counters = [spec['counter'] for specs, _ in generation.waves for spec in specs]
+    assert len(counters) == len(set(counters))
+
+
+def test_worker_requeues_failed_samples(app):
+    first_topic = {}
+
+    def fail_first_spec_once(spec, wave):
+        if wave == 0 and not first_topic:
+            first_topic['topic'] = spec['topic']
+            return '[json_error] bad response'
+        return None
+
+    generation = FakeGeneration(fail_first_spec_once)
+
+    batch_state = run_worker(app, generation, target=8)
+
+    assert batch_state['counters'].samples_generated == 8
+    # The failed sample leads the next wave
+    retry_specs, _ = generation.waves[1]
+    assert len(retry_specs) == 1
+    assert retry_specs[0]['topic'] == first_topic['topic']
+
+
+def test_worker_gives_up_on_a_sample_after_max_retries(app):
+    generation = FakeGeneration(lambda spec, wave: '[json_error] bad response')
+
+    batch_state = run_worker(app, generation, target=1)
+
+    assert batch_state['counters'].samples_generated == 0
+    # max_iterations (3 x target) topics, each tried MAX_SAMPLE_RETRIES times, one per wave
+    topics = [specs[0]['topic'] for specs, _ in generation.waves]
+    assert len(topics) == 3 * batch_module.MAX_SAMPLE_RETRIES
+    assert topics[:batch_module.MAX_SAMPLE_RETRIES] == [topics[0]] * batch_module.MAX_SAMPLE_RETRIES
+    assert LegalSample.query.count() == 0
+
+
+def test_smart_mode_switches_model_once_per_failing_wave(app):
+    # Every m1 call is rejected; the replacement model succeeds
+    generation = FakeGeneration(
+        lambda spec, wave: '[auth_error] 401 unauthorized' if spec['model'] == 'm1' else None
+    )
+
+    batch_state = run_worker(app, generation, target=8, smart_mode=True)
+
+    assert batch_state['counters'].samples_generated == 8
+    assert [switch['to'] for switch in batch_state['model_switches']] == ['m2']
+    assert {spec['model'] for spec in generation.waves[1][0]} == {'m2'}
+
+
+def test_failover_skips_a_provider_that_cannot_be_built(app, monkeypatch):
+    def fallback_order(self, provider, ttl=None):
+        if provider == 'cerebras':
+            raise ValueError("Provider 'cerebras' has no API key")
+        return ['m1']
+
+    monkeypatch.setattr(BatchService, '_get_fallback_order', fallback_order)
+    # groq's only model keeps failing, and cerebras can't be built: the batch
+    # must stop cleanly instead of the worker crashing
+    generation = FakeGeneration(lambda spec, wave: '[rate_limit] 429 too many requests')
+
+    batch_state = run_worker(app, generation, target=4, smart_mode=True)
+
+    assert batch_state['running'] is False
+    assert not any('crashed' in error['error'] for error in batch_state['errors'])
+    assert any(error['error'] == 'All providers and models exhausted' for error in batch_state['errors'])
+    assert {spec['provider'] for specs, _ in generation.waves for spec in specs} == {'groq'}
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Unit tests for DataService.add_bulk against an in-memory SQLite database"""
+
+import pytest
+from flask import Flask
+
+from models import db, LegalSample
+from services.data_service import DataService
+
+
+@pytest.fixture
+def data_service():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield DataService()
+        db.session.remove()
+
+
+def make_row(sample_id: str, **overrides) -> dict:
+    return {
+        'id': sample_id,
+        'question': f'Question {sample_id}',
+        'answer': 'Answer',
+        'topic': 'Contract Law - Formation',
+        'difficulty': 'basic',
+        'case_citation': None,
+        'reasoning': 'Step 1: Offer.',
+        **overrides
+    }
+
+
+def test_add_bulk_rejects_null_required_fields_before_insert(data_service):
+    rows = [make_row('a'), make_row('b', question=None), make_row('c')]
+
+    result = data_service.add_bulk(rows)
+
+    assert result['added'] == 2
+    assert [(error['index'], error['id']) for error in result['errors']] == [(1, 'b')]
+    assert 'question' in result['errors'][0]['error']
+    assert {sample.id for sample in LegalSample.query.all()} == {'a', 'c'}
+
+
+def test_add_bulk_reports_only_rows_the_database_rejects(data_service):
+    # An unbindable value fails the executemany INSERT; the row-by-row retry keeps the rest
+    rows = [make_row('a'), make_row('b', answer=object()), make_row('c')]
+
+    result = data_service.add_bulk(rows)
+
+    assert result['added'] == 2
+    assert [error['id'] for error in result['errors']] == ['b']
+    assert {sample.id for sample in LegalSample.query.all()} == {'a', 'c'}
+
+
+def test_add_bulk_skips_existing_and_repeated_ids(data_service):
+    data_service.add_bulk([make_row('a')])
+
+    result = data_service.add_bulk([make_row('a'), make_row('b'), make_row('b')])
+
+    assert result['added'] == 1
+    assert [error['id'] for error in result['errors']] == ['a', 'b']
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""Unit tests for GenerationService batch and multi-sample generation (stub provider, no API calls)"""
+
+import asyncio
+import json
+
+import pytest
+
+from services.generation_service import GenerationService
+
+
+def make_sample(question: str, **extra) -> dict:
+    return {
+        'id': 'placeholder',
+        'question': question,
+        'answer': f'Answer to {question}',
+        'topic': 'Contract Law - Formation',
+        'difficulty': 'basic',
+        'case_citation': 'Carlill v Carbolic Smoke Ball Co [1893] 1 QB 256',
+        'reasoning': 'Step 1: Offer. Step 2: Acceptance.',
+        **extra
+    }
+
+
+class StubProvider:
+    """Provider double: returns queued response texts and records each request."""
+
+    def __init__(self, responses, tokens_used=100):
+        self.responses = list(responses)
+        self.tokens_used = tokens_used
+        self.requests = []
+
+    async def generate_async(self, **request):
+        self.requests.append(request)
+        return {'text': self.responses.pop(0), 'tokens_used': self.tokens_used, 'finish_reason': 'stop'}
+
+
+class RecordingBucket:
+    """Rate bucket double that never waits and counts takes."""
+
+    def __init__(self):
+        self.taken = 0
+
+    def take(self, cost=1.0):
+        self.taken += cost
+        return 0.0
+
+
+class FailingFactory:
+    def __init__(self):
+        self.calls = 0
+
+    def get_provider(self, provider, use_db=True):
+        self.calls += 1
+        raise ValueError(f"Provider '{provider}' is disabled")
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = GenerationService()
+    # Quality rules are covered elsewhere; these tests are about orchestration
+    monkeypatch.setattr(service, '_validate_sample_quality', lambda sample, difficulty: None)
+    monkeypatch.setattr('services.generation_service.get_llm_cache', lambda: None)
+    return service
+
+
+def make_spec(topic: str, provider_instance=None, **extra) -> dict:
+    return {
+        'practice_area': 'Contract Law',
+        'topic': topic,
+        'difficulty': 'basic',
+        'counter': 1,
+        'provider': 'groq',
+        'provider_instance': provider_instance,
+        **extra
+    }
+
+
+def test_generate_batch_returns_results_in_spec_order(service):
+    provider = StubProvider([json.dumps(make_sample(f'Q{i}')) for i in range(3)], tokens_used=40)
+    bucket = RecordingBucket()
+    specs = [make_spec(f'Topic {i}', provider) for i in range(3)]
+
+    results = asyncio.run(service.generate_batch(specs, concurrency=1, bucket=bucket))
+
+    assert [sample['question'] for sample, _, _, _ in results] == ['Q0', 'Q1', 'Q2']
+    assert all(error is None and tokens == 40 for _, tokens, _, error in results)
+    assert bucket.taken == 3
+    assert len(provider.requests) == 3
+
+
+def test_generate_batch_converts_bad_responses_to_errors(service):
+    provider = StubProvider(['not json at all', json.dumps(make_sample('Q1'))])
+    specs = [make_spec('Topic 0', provider), make_spec('Topic 1', provider)]
+
+    results = asyncio.run(service.generate_batch(specs, concurrency=1))
+
+    assert results[0][0] is None and results[0][3]
+    assert results[1][0]['question'] == 'Q1'
+
+
+def test_generate_batch_counts_few_shot_warm_up_across_calls(service, monkeypatch):
+    seen = []
+
+    async def record(**kwargs):
+        seen.append(kwargs['include_few_shot'])
+        return None, 0, 0, 'skipped'
+
+    monkeypatch.setattr(service, 'generate_single_sample_async', record)
+    specs = [make_spec(f'Topic {i}', StubProvider([])) for i in range(3)]
+
+    asyncio.run(service.generate_batch(specs, concurrency=1, few_shot_samples=2, few_shot_offset=1))
+
+    assert seen == [True, False, False]
+
+
+def test_generate_batch_resolves_missing_provider_once(service):
+    factory = FailingFactory()
+    service.factory = factory
+    specs = [make_spec(f'Topic {i}') for i in range(3)]
+
+    results = asyncio.run(service.generate_batch(specs, concurrency=2))
+
+    assert factory.calls == 1
+    assert all(sample is None and 'disabled' in error for sample, _, _, error in results)
+
+
+def test_marshaled_samples_are_matched_on_sample_index(service):
+    # Returned out of order: matching must follow the echoed sample_index
+    response = {'samples': [
+        make_sample('Second question', sample_index=2),
+        make_sample('First question', sample_index=1)
+    ]}
+    provider = StubProvider([json.dumps(response)], tokens_used=300)
+    specs = [make_spec('Offer', provider), make_spec('Acceptance', provider)]
+
+    results = asyncio.run(service.generate_batch(specs, samples_per_request=2))
+
+    assert len(provider.requests) == 1
+    assert 'sample_index 1' in provider.requests[0]['prompt']
+    assert 'sample_index 2' in provider.requests[0]['prompt']
+    assert [sample['question'] for sample, _, _, _ in results] == ['First question', 'Second question']
+    assert all('sample_index' not in sample for sample, _, _, _ in results)
+    # The packed call's tokens are reported once
+    assert [tokens for _, tokens, _, _ in results] == [300, 0]
+
+
+def test_marshaled_sample_without_matching_index_is_an_error(service):
+    response = {'samples': [
+        make_sample('Only question', sample_index=2),
+        make_sample('Unlabelled question')
+    ]}
+    provider = StubProvider([json.dumps(response)], tokens_used=300)
+    specs = [make_spec('Offer', provider), make_spec('Acceptance', provider)]
+
+    results = asyncio.run(service.generate_batch(specs, samples_per_request=2))
+
+    assert results[0][0] is None
+    assert 'sample_index 1' in results[0][3]
+    assert results[1][0]['question'] == 'Only question'
+    assert results[1][1] == 300
+
+
+@pytest.mark.parametrize('text', [
+    '{"question": "q"}',
+    '```json\n{"question": "q"}\n```',
+    '<thinking>Working it out {draft}</thinking>\n{"question": "q"}',
+    'Here is the sample: {"question": "q"} Hope this helps.'
+])
+def test_extract_json_handles_common_response_shapes(service, text):
+    assert json.loads(service._extract_json(text)) == {'question': 'q'}
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""Unit tests for the LLM response cache backends (no server or database needed)"""
+
+from services.llm_cache import LLMCache, MemoryCacheBackend
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryCacheBackend(max_entries=2)
+    backend.set('a', '1', ttl=60)
+    backend.set('b', '2', ttl=60)
+
+    # Reading 'a' makes 'b' the least recently used entry
+    assert backend.get('a') == '1'
+    backend.set('c', '3', ttl=60)
+
+    assert backend.get('b') is None
+    assert backend.get('a') == '1'
+    assert backend.get('c') == '3'
+
+
+def test_memory_backend_never_exceeds_max_entries():
+    backend = MemoryCacheBackend(max_entries=3)
+    for i in range(10):
+        backend.set(f'key{i}', str(i), ttl=60)
+
+    assert len(backend._entries) == 3
+    assert [backend.get(f'key{i}') for i in range(7, 10)] == ['7', '8', '9']
+
+
+def test_memory_backend_drops_expired_entries():
+    backend = MemoryCacheBackend(max_entries=2)
+    backend.set('stale', 'x', ttl=-1)
+
+    assert backend.get('stale') is None
+    assert 'stale' not in backend._entries
+
+
+def test_llm_cache_round_trip():
+    cache = LLMCache(MemoryCacheBackend(), ttl=60)
+    request = {'model': 'm', 'prompt': 'p', 'system': 's', 'temperature': 0.6}
+    key = cache.make_key('groq', request, variant=1)
+
+    cache.set(key, {'text': '{}', 'tokens_used': 12, 'finish_reason': 'stop'})
+
+    assert cache.get(key) == {'text': '{}', 'tokens_used': 12}
+    assert cache.make_key('groq', request, variant=2) != key